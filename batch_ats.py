@@ -0,0 +1,227 @@
+import argparse
+import asyncio
+import collections
+import csv
+import json
+import os
+import sys
+import time
+
+from candidate_store import record_analysis
+from jd_profile import USE_JD_PROFILE, get_jd_profile
+from keyword_matcher import match_keywords
+from prompt_compaction import count_tokens
+from resume_core import calculate_ats_score, extract_text_from_pdf
+from structured_output import parse_json_response
+
+# Groq free-tier limits for llama3-8b-8192; override to match your plan
+DEFAULT_RPM = int(os.environ.get("GROQ_REQUESTS_PER_MINUTE", 30))
+DEFAULT_TPM = int(os.environ.get("GROQ_TOKENS_PER_MINUTE", 30000))
+DEFAULT_CONCURRENCY = 4
+# Rough allowance for the JSON reply when budgeting tokens per request
+COMPLETION_TOKEN_ESTIMATE = 600
+
+
+class RateLimiter:
+    """Sliding-window limiter for requests per minute and tokens per minute"""
+
+    def __init__(self, requests_per_minute=DEFAULT_RPM, tokens_per_minute=DEFAULT_TPM, window=60.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window = window
+        self._events = collections.deque()
+        self._tokens_in_window = 0
+        self._lock = asyncio.Lock()
+
+    def _expire(self, now):
+        while self._events and now - self._events[0][0] >= self.window:
+            _, tokens = self._events.popleft()
+            self._tokens_in_window -= tokens
+
+    async def acquire(self, tokens):
+        """Wait until a request costing `tokens` fits in both budgets, then record it"""
+        # A single request larger than the whole budget would otherwise wait forever
+        tokens = min(tokens, self.tokens_per_minute)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                if (len(self._events) < self.requests_per_minute
+                        and self._tokens_in_window + tokens <= self.tokens_per_minute):
+                    self._events.append((now, tokens))
+                    self._tokens_in_window += tokens
+                    return
+                await asyncio.sleep(self._events[0][0] + self.window - now)
+
+
+def _new_result(name, local_match=None):
+    return {
+        "resume": name,
+        "ats_score": None,
+        "local_score": local_match["ats_score"] if local_match else None,
+        "score_category": "",
+        "matched_keywords": local_match["matched_keywords"] if local_match else [],
+        "missing_keywords": local_match["missing_keywords"] if local_match else [],
+        "error": "",
+        "seconds": 0.0,
+    }
+
+
+def _apply_llm_analysis(result, ats_analysis):
+    try:
+        ats_data = parse_json_response(ats_analysis)
+        result["ats_score"] = ats_data.get("ats_score")
+        result["score_category"] = ats_data.get("score_category", "")
+        result["matched_keywords"] = ats_data.get("matched_keywords", [])
+        result["missing_keywords"] = ats_data.get("missing_keywords", [])
+    except json.JSONDecodeError as e:
+        result["error"] = f"Invalid JSON in model reply: {e}"
+
+
+async def score_resumes(resumes, job_description, concurrency=DEFAULT_CONCURRENCY,
+                        rate_limiter=None, use_cache=True, shortlist=None, index=None):
+    """Score (name, pdf) pairs against one job description, yielding results as they finish
+
+    Every resume gets an instant local keyword score. With `shortlist` set,
+    only that many resumes with the best local scores are sent to the LLM;
+    the rest are yielded with their local score alone. At most
+    `concurrency` requests are in flight and every request first reserves
+    its estimated tokens with the rate limiter. With `index` set (a
+    resume_index.ResumeIndex), every extracted resume is also added to it.
+    """
+    rate_limiter = rate_limiter or RateLimiter()
+    semaphore = asyncio.Semaphore(concurrency)
+    jd_profile = get_jd_profile(job_description)
+    jd_tokens = jd_profile.tokens if USE_JD_PROFILE else count_tokens(job_description)
+
+    async def prepare(name, pdf):
+        start = time.perf_counter()
+        try:
+            resume_text = await asyncio.to_thread(extract_text_from_pdf, pdf)
+        except Exception as e:
+            result = _new_result(name)
+            result["error"] = str(e)
+            return None, result, start
+        result = _new_result(name, match_keywords(resume_text, job_description, jd_profile.keywords))
+        if index is not None:
+            from resume_index import resume_id
+            label = os.path.abspath(pdf) if isinstance(pdf, str) else name
+            await asyncio.to_thread(index.add, resume_id(resume_text), resume_text, label)
+        return resume_text, result, start
+
+    async def score_with_llm(resume_text, result, start):
+        try:
+            tokens = count_tokens(resume_text) + jd_tokens + COMPLETION_TOKEN_ESTIMATE
+            async with semaphore:
+                await rate_limiter.acquire(tokens)
+                ats_analysis = await asyncio.to_thread(
+                    calculate_ats_score, resume_text, job_description, use_cache=use_cache
+                )
+            _apply_llm_analysis(result, ats_analysis)
+            record_analysis(resume_text, job_description, ats=ats_analysis, source="batch")
+        except Exception as e:
+            result["error"] = str(e)
+        result["seconds"] = round(time.perf_counter() - start, 2)
+        return result
+
+    async def score_one(name, pdf):
+        resume_text, result, start = await prepare(name, pdf)
+        if resume_text is None:
+            return result
+        return await score_with_llm(resume_text, result, start)
+
+    if shortlist is None:
+        tasks = [asyncio.create_task(score_one(name, pdf)) for name, pdf in resumes]
+    else:
+        prepared = await asyncio.gather(*(prepare(name, pdf) for name, pdf in resumes))
+        candidates = [item for item in prepared if item[0] is not None]
+        candidates.sort(key=lambda item: -item[1]["local_score"])
+        selected = {id(item) for item in candidates[:shortlist]}
+        tasks = []
+        for item in prepared:
+            if id(item) in selected:
+                tasks.append(asyncio.create_task(score_with_llm(*item)))
+            else:
+                if item[0] is not None:
+                    item[1]["error"] = "Not shortlisted"
+                item[1]["seconds"] = round(time.perf_counter() - item[2], 2)
+                yield item[1]
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def rank_results(results):
+    """Sort results by ATS score, best first, falling back to the local keyword score"""
+    ranked = sorted(results, key=lambda r: (
+        r["ats_score"] is None, -(r["ats_score"] or 0), -(r["local_score"] or 0)
+    ))
+    for rank, result in enumerate(ranked, 1):
+        result["rank"] = rank
+    return ranked
+
+
+def _format_row(result):
+    score = "-" if result["ats_score"] is None else result["ats_score"]
+    local = "-" if result["local_score"] is None else result["local_score"]
+    return (f"{result.get('rank', ''):>4}  {score:>5}  {local:>5}  {result['score_category']:<10}  "
+            f"{result['resume']}  {result['error']}")
+
+
+async def _run_cli(args):
+    with open(args.job_description, "r", encoding="utf-8") as f:
+        job_description = f.read()
+    resumes = [(os.path.basename(path), path) for path in args.resumes]
+    limiter = RateLimiter(args.rpm, args.tpm)
+    index = None
+    if args.index:
+        from resume_index import ResumeIndex
+        index = ResumeIndex(args.index_dir)
+    results = []
+    async for result in score_resumes(resumes, job_description, args.concurrency, limiter,
+                                      use_cache=not args.no_cache, shortlist=args.shortlist, index=index):
+        results.append(result)
+        print(f"[{len(results)}/{len(resumes)}] {_format_row(result)}", flush=True)
+
+    ranked = rank_results(results)
+    print("\nRank  Score  Local  Category    Resume")
+    for result in ranked:
+        print(_format_row(result))
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["rank", "resume", "ats_score", "local_score", "score_category",
+                             "matched_keywords", "missing_keywords", "seconds", "error"])
+            for r in ranked:
+                writer.writerow([r["rank"], r["resume"], r["ats_score"], r["local_score"], r["score_category"],
+                                 "; ".join(r["matched_keywords"]), "; ".join(r["missing_keywords"]),
+                                 r["seconds"], r["error"]])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score many resumes against one job description")
+    parser.add_argument("job_description", help="Path to a text file containing the job description")
+    parser.add_argument("resumes", nargs="+", help="Resume PDF files")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Maximum number of requests in flight")
+    parser.add_argument("--rpm", type=int, default=DEFAULT_RPM, help="Requests per minute limit")
+    parser.add_argument("--tpm", type=int, default=DEFAULT_TPM, help="Tokens per minute limit")
+    parser.add_argument("--shortlist", type=int,
+                        help="Only send this many resumes with the best local keyword scores to the LLM")
+    parser.add_argument("--csv", help="Write the ranked results to this CSV file")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the response cache")
+    parser.add_argument("--index", action="store_true",
+                        help="Add every extracted resume to the vector index used by resume_index.py")
+    parser.add_argument("--index-dir", help="Index directory (defaults to RESUME_ANA_INDEX_DIR)")
+    args = parser.parse_args(argv)
+    asyncio.run(_run_cli(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""Generate a synthetic corpus of resume PDFs with varied page counts and layouts"""
+import argparse
+import os
+import random
+
+from keyword_matcher import SKILL_TAXONOMY
+
+LAYOUTS = ("single_column", "two_column", "table", "dense")
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+
+_FIRST_NAMES = ["Alex", "Priya", "Jordan", "Wei", "Maria", "Samuel", "Aisha", "Lucas", "Keiko", "Omar"]
+_LAST_NAMES = ["Kim", "Sharma", "Garcia", "Okafor", "Novak", "Chen", "Silva", "Muller", "Haddad", "Brown"]
+_COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Stark Industries", "Wayne Tech", "Hooli"]
+_TITLES = ["Software Engineer", "Data Analyst", "Backend Developer", "ML Engineer", "DevOps Engineer"]
+_VERBS = ["Built", "Designed", "Led", "Optimized", "Migrated", "Automated", "Maintained", "Scaled"]
+_OBJECTS = ["payment APIs", "data pipelines", "a recommendation service", "CI/CD workflows",
+            "dashboards for executives", "a customer analytics platform", "internal tooling"]
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _resume_lines(rng, target_lines):
+    """Return resume text lines, padded with experience bullets to target_lines"""
+    skills = rng.sample(sorted(SKILL_TAXONOMY), 12)
+    name = f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}"
+    lines = [
+        name,
+        f"{name.split()[0].lower()}@example.com | +1 555 {rng.randint(1000, 9999)}",
+        "Professional Summary",
+        f"{rng.choice(_TITLES)} with {rng.randint(2, 15)} years of experience in {', '.join(skills[:3])}.",
+        "Skills",
+        ", ".join(skills),
+        "Education",
+        f"BSc Computer Science, State University {rng.randint(2000, 2020)}",
+        "Work Experience",
+    ]
+    while len(lines) < target_lines:
+        if rng.random() < 0.15:
+            start = rng.randint(2005, 2020)
+            lines.append(f"{rng.choice(_TITLES)}, {rng.choice(_COMPANIES)} {start}-{start + rng.randint(1, 4)}")
+        else:
+            lines.append(f"- {rng.choice(_VERBS)} {rng.choice(_OBJECTS)} using {rng.choice(skills)} "
+                         f"and {rng.choice(skills)}, improving throughput by {rng.randint(5, 80)}%")
+    return lines
+
+
+def _page_stream(lines, layout):
+    """Build a PDF content stream that draws lines in the given layout"""
+    ops = []
+    if layout == "two_column":
+        half = (len(lines) + 1) // 2
+        for x, column in ((50, lines[:half]), (320, lines[half:])):
+            ops.append(f"BT /F1 9 Tf {x} 740 Td 12 TL")
+            ops += [f"({_escape(line[:48])}) '" for line in column]
+            ops.append("ET")
+    elif layout == "table":
+        y = 740
+        for line in lines:
+            cells = [line[i:i + 25] for i in range(0, min(len(line), 75), 25)]
+            for x, cell in zip((50, 230, 410), cells):
+                ops.append(f"BT /F1 9 Tf {x} {y} Td ({_escape(cell)}) Tj ET")
+            ops.append(f"45 {y - 3} m 567 {y - 3} l S")
+            y -= 14
+    else:
+        size, leading = (8, 10) if layout == "dense" else (11, 14)
+        ops.append(f"BT /F1 {size} Tf 50 740 Td {leading} TL")
+        ops += [f"({_escape(line)}) '" for line in lines]
+        ops.append("ET")
+    return "\n".join(ops)
+
+
+def lines_per_page(layout):
+    return {"single_column": 48, "two_column": 110, "table": 50, "dense": 68}[layout]
+
+
+def make_pdf(pages):
+    """Serialize a list of content streams into a minimal, valid PDF (Helvetica only)"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages)))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>")
+    font_id = 3 + 2 * len(pages)
+    for i, stream in enumerate(pages):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Contents {4 + 2 * i} 0 R /Resources << /Font << /F1 {font_id} 0 R >> >> >>"
+        )
+        data = stream.encode("latin-1", "replace")
+        objects.append(f"<< /Length {len(data)} >>\nstream\n{data.decode('latin-1')}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def make_resume_pdf(page_count, layout, seed=0):
+    """Return (pdf_bytes, text_lines) for a synthetic resume"""
+    rng = random.Random(seed)
+    per_page = lines_per_page(layout)
+    lines = _resume_lines(rng, page_count * per_page)
+    pages = [_page_stream(lines[i:i + per_page], layout) for i in range(0, len(lines), per_page)]
+    return make_pdf(pages), lines
+
+
+def generate_corpus(output_dir, page_counts=(1, 2, 5, 10, 20, 30), layouts=LAYOUTS, seed=0):
+    """Write one PDF per (page count, layout) pair and return their paths"""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for pages in page_counts:
+        for index, layout in enumerate(layouts):
+            pdf, _ = make_resume_pdf(pages, layout, seed=seed + pages * 100 + index)
+            path = os.path.join(output_dir, f"resume_{pages:02d}p_{layout}.pdf")
+            with open(path, "wb") as f:
+                f.write(pdf)
+            paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("output_dir")
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 2, 5, 10, 20, 30])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    for path in generate_corpus(args.output_dir, args.pages, seed=args.seed):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
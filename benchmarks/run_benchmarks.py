@@ -0,0 +1,334 @@
+"""Offline benchmarks for extraction, the LLM helpers and local parsing against the stub server
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks --json results.json
+    python -m benchmarks.run_benchmarks --baseline results.json
+"""
+import argparse
+import collections
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Keep caches and metrics out of the user's home directory; set before the app modules are imported
+_WORK_DIR = tempfile.mkdtemp(prefix="resume_ana_bench_")
+os.environ.setdefault("RESUME_ANA_CACHE_DIR", _WORK_DIR)
+os.environ.setdefault("RESUME_ANA_METRICS_LOG", os.path.join(_WORK_DIR, "stages.jsonl"))
+
+from benchmarks.pdf_corpus import LAYOUTS, make_resume_pdf  # noqa: E402
+from benchmarks.stub_server import ATS_REPLY, StubSettings, start_server  # noqa: E402
+from instrumentation import METRICS_LOG_PATH  # noqa: E402
+from jd_profile import JDProfile, get_jd_profile  # noqa: E402
+from keyword_matcher import match_keywords  # noqa: E402
+from model_routing import FAST_MODEL, set_routing_mode, summarize_routes  # noqa: E402
+from pdf_extraction import BACKENDS, extract_text, iter_page_texts, text_quality  # noqa: E402
+from prompt_compaction import compact_text  # noqa: E402
+from report_pipeline import build_report  # noqa: E402
+from resume_core import (  # noqa: E402
+    calculate_ats_score,
+    configure_client,
+    extract_text_from_pdf,
+    extraction_cache,
+    get_job_role_roadmap,
+    get_resume_details,
+    get_resume_improvement_suggestions,
+    get_skill_upgrade_suggestions,
+)
+from structured_output import parse_json_response  # noqa: E402
+
+JOB_DESCRIPTION = """Senior Backend Engineer
+We are looking for a backend engineer with 5+ years of experience in Python, SQL and Docker.
+Requirements:
+- Design and operate REST APIs on AWS with Kubernetes and Terraform
+- Experience with PostgreSQL, Redis and message queues such as Kafka
+- Strong communication skills and experience mentoring engineers
+Nice to have: machine learning, CI/CD, observability with Prometheus
+"""
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an unsorted list"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_case(name, func, iterations, concurrency=1, setup=None, warmup=1):
+    """Call func `iterations` times on `concurrency` threads and summarise the latencies
+
+    The untimed warm-up calls absorb one-off costs such as lazy imports and
+    client creation.
+    """
+    def one(_):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        try:
+            func()
+        except Exception as e:
+            return time.perf_counter() - start, f"{type(e).__name__}: {e}"
+        return time.perf_counter() - start, None
+
+    for i in range(warmup):
+        one(i)
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            outcomes = list(executor.map(one, range(iterations)))
+    else:
+        outcomes = [one(i) for i in range(iterations)]
+    wall = time.perf_counter() - start
+
+    latencies = [duration for duration, error in outcomes]
+    errors = [error for duration, error in outcomes if error]
+    return {
+        "name": name,
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "throughput": iterations / wall if wall else 0.0,
+        "mean": statistics.fmean(latencies),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+    }
+
+
+def _build_index(size):
+    """Fill a throwaway resume index with `size` shuffled variants of the synthetic resumes"""
+    from resume_index import ResumeIndex, resume_id
+    rng = random.Random(0)
+    bases = ["\n".join(make_resume_pdf(1, layout, seed=seed)[1]).split()
+             for seed in range(50) for layout in LAYOUTS]
+    index = ResumeIndex(os.path.join(_WORK_DIR, f"resume_index_{size}"))
+    for i in range(size):
+        words = list(bases[i % len(bases)])
+        rng.shuffle(words)
+        text = " ".join(words[:200])
+        index.add(resume_id(f"{i}:{text}"), text, f"resume-{i}")
+    return index
+
+
+def _build_store(size):
+    """Fill a throwaway candidate store with `size` scored analyses over 20 requisitions"""
+    from candidate_store import CandidateStore, build_record
+    from keyword_matcher import SKILL_TAXONOMY
+    rng = random.Random(0)
+    skills = sorted(SKILL_TAXONOMY)
+    job_descriptions = [f"Requisition {i}\nNeeds {', '.join(rng.sample(skills, 6))}" for i in range(20)]
+    store = CandidateStore(os.path.join(_WORK_DIR, f"candidate_store_{size}"))
+    for i in range(size):
+        resume_skills = rng.sample(skills, 10)
+        ats = {"ats_score": rng.randint(0, 100), "matched_keywords": resume_skills[:3],
+               "missing_keywords": rng.sample(skills, 3)}
+        store.add(build_record(f"Candidate {i}: {', '.join(resume_skills)}", rng.choice(job_descriptions),
+                               parsed={"full_name": f"Candidate {i}", "skills": resume_skills[:6]}, ats=ats))
+    store.compact()
+    return store
+
+
+def _build_corpus(page_counts):
+    """Return {(pages, layout): (pdf_bytes, source_lines)} for the synthetic corpus"""
+    corpus = {}
+    for pages in page_counts:
+        for index, layout in enumerate(LAYOUTS):
+            corpus[(pages, layout)] = make_resume_pdf(pages, layout, seed=pages * 100 + index)
+    return corpus
+
+
+def _bigram_f1(expected, actual):
+    """F1 of word bigrams, which rewards both finding the words and keeping their reading order"""
+    def bigrams(text):
+        words = text.split()
+        return collections.Counter(zip(words, words[1:]))
+    expected, actual = bigrams(expected), bigrams(actual)
+    overlap = sum((expected & actual).values())
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / sum(actual.values()), overlap / sum(expected.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def compare_backends(page_counts):
+    """Print each backend's extraction time and text quality against the corpus source text"""
+    print(f"{'document':<22} {'backend':<11} {'ms':>9} {'quality':>8} {'bigram F1':>10}")
+    for (pages, layout), (pdf, lines) in _build_corpus(page_counts).items():
+        for backend in ("auto", *BACKENDS):
+            info = {}
+            start = time.perf_counter()
+            page_texts = list(iter_page_texts(pdf, workers=0, backend=backend, info=info))
+            elapsed = time.perf_counter() - start
+            quality = statistics.fmean(text_quality(page) for page in page_texts)
+            label = backend if backend != "auto" else f"auto:{info['backend']}"
+            print(f"{f'{pages}p/{layout}':<22} {label:<11} {elapsed * 1000:>9.1f} {quality:>8.3f} "
+                  f"{_bigram_f1(chr(10).join(lines), chr(10).join(page_texts)):>10.3f}")
+
+
+def build_cases(args):
+    """Return (name, func, iterations, concurrency, setup) tuples for every benchmark"""
+    corpus = _build_corpus(args.pages)
+    resume_text = "\n".join(make_resume_pdf(2, "single_column", seed=7)[1])
+    long_resume_text = "\n".join(make_resume_pdf(6, "single_column", seed=11)[1])
+    ats_json = json.dumps(ATS_REPLY)
+    truncated_json = "Here is the analysis:\n```json\n" + ats_json[: len(ats_json) * 2 // 3]
+
+    cases = []
+    for (pages, layout), (pdf, _) in corpus.items():
+        # Clearing the cache first measures real extraction rather than cache reads
+        cases.append((f"extract/{pages}p/{layout}", lambda pdf=pdf: extract_text_from_pdf(pdf),
+                      max(1, args.iterations // max(1, pages // 5)), 1, extraction_cache.clear))
+    cases.append(("extract/cached", lambda pdf=pdf: extract_text_from_pdf(pdf), args.iterations, 1, None))
+    # Each backend on its own, single process, without the cache or the quality check
+    for (pages, layout), (pdf, _) in corpus.items():
+        for backend in BACKENDS:
+            cases.append((f"extract_backend/{backend}/{pages}p/{layout}",
+                          lambda pdf=pdf, backend=backend: extract_text(pdf, workers=0, backend=backend),
+                          max(1, args.iterations // max(1, pages // 5)), 1, None))
+
+    llm_calls = [
+        ("llm/parse", lambda: get_resume_details(resume_text, use_cache=False)),
+        ("llm/ats", lambda: calculate_ats_score(resume_text, JOB_DESCRIPTION, use_cache=False)),
+        ("llm/ats_stream", lambda: "".join(calculate_ats_score(
+            resume_text, JOB_DESCRIPTION, use_cache=False, stream=True))),
+        ("llm/improvements", lambda: get_resume_improvement_suggestions(resume_text, ats_json, use_cache=False)),
+        ("llm/skills", lambda: get_skill_upgrade_suggestions(JOB_DESCRIPTION, use_cache=False)),
+        ("llm/roadmap", lambda: get_job_role_roadmap(JOB_DESCRIPTION, use_cache=False)),
+        ("llm/full_report", lambda: build_report(resume_text, JOB_DESCRIPTION, use_cache=False)),
+    ]
+    for name, func in llm_calls:
+        cases.append((name, func, args.iterations, 1, None))
+    cases.append((f"llm/ats@{args.concurrency}", llm_calls[1][1], args.iterations * args.concurrency,
+                  args.concurrency, None))
+    # A long resume parsed in one prompt versus one concurrent prompt per section chunk
+    cases.append(("llm/parse_long", lambda: get_resume_details(long_resume_text, use_cache=False, chunked=False),
+                  args.iterations, 1, None))
+    cases.append(("llm/parse_chunked", lambda: get_resume_details(long_resume_text, use_cache=False, chunked=True),
+                  args.iterations, 1, None))
+
+    local_iterations = args.iterations * 20
+    cases += [
+        ("parse_json/valid", lambda: parse_json_response(ats_json), local_iterations, 1, None),
+        ("parse_json/repair", lambda: parse_json_response(truncated_json), local_iterations, 1, None),
+        ("compact/ats", lambda: compact_text(resume_text, "ats"), local_iterations, 1, None),
+        ("keywords/match", lambda: match_keywords(resume_text, JOB_DESCRIPTION), local_iterations, 1, None),
+        ("keywords/match_profile", lambda: match_keywords(
+            resume_text, JOB_DESCRIPTION, get_jd_profile(JOB_DESCRIPTION).keywords), local_iterations, 1, None),
+        ("jd_profile/compile", lambda: JDProfile(JOB_DESCRIPTION), local_iterations, 1, None),
+    ]
+    if not args.only or any("index/search".startswith(p) or p.startswith("index/") for p in args.only):
+        index = _build_index(args.index_size)
+        cases += [
+            (f"index/search/{args.index_size}", lambda: index.search(JOB_DESCRIPTION, 20), local_iterations, 1, None),
+            (f"index/search_exact/{args.index_size}", lambda: index.search(JOB_DESCRIPTION, 20, exact=True),
+             local_iterations, 1, None),
+        ]
+    if not args.only or any("store/".startswith(p) or p.startswith("store/") for p in args.only):
+        store = _build_store(args.store_size)
+        frame = store.frame()
+        requisition = frame.requisitions()[0][0]
+        cases += [
+            (f"store/load/{args.store_size}", lambda: store.frame(), args.iterations, 1,
+             lambda: setattr(store, "_frame_key", None)),
+            (f"store/skills/{args.store_size}", lambda: frame.term_frequency(top=20), local_iterations, 1, None),
+            (f"store/scores/{args.store_size}", lambda: frame.score_distribution(), local_iterations, 1, None),
+            (f"store/has_but_not/{args.store_size}",
+             lambda: frame.candidates_with(["Python", "Docker"], ["Java"], requisition, min_score=50),
+             local_iterations, 1, None),
+        ]
+    return [case for case in cases if not args.only or any(case[0].startswith(p) for p in args.only)]
+
+
+def compare(results, baseline, tolerance):
+    """Return the names of cases whose p50 or p95 got slower than the baseline allows"""
+    previous = {result["name"]: result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(result["name"])
+        if before is None:
+            continue
+        for metric in ("p50", "p95"):
+            if result[metric] > before[metric] * (1 + tolerance):
+                regressions.append(f"{result['name']} {metric} {before[metric] * 1000:.1f}ms -> "
+                                   f"{result[metric] * 1000:.1f}ms")
+    return regressions
+
+
+def print_table(results):
+    print(f"{'case':<32} {'n':>5} {'ops/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>6}")
+    for r in results:
+        print(f"{r['name']:<32} {r['iterations']:>5} {r['throughput']:>9.2f} {r['p50'] * 1000:>9.2f} "
+              f"{r['p95'] * 1000:>9.2f} {r['p99'] * 1000:>9.2f} {r['errors']:>6}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed calls before each case")
+    parser.add_argument("--concurrency", type=int, default=8, help="Threads for the concurrent ATS case")
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 30], help="Page counts in the PDF corpus")
+    parser.add_argument("--store-size", type=int, default=20000, help="Analyses in the candidate store cases")
+    parser.add_argument("--index-size", type=int, default=10000, help="Resumes in the index search cases")
+    parser.add_argument("--only", nargs="+", help="Only run cases whose names start with these prefixes")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub server time to first token")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--tokens-per-second", type=float, default=2000.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of stub replies that are 429s")
+    parser.add_argument("--routing", choices=("fixed", "cascade"), default="fixed", help="Model routing mode")
+    parser.add_argument("--bad-reply-rate", type=float, default=0.0,
+                        help="Fraction of fast-model stub replies that are incomplete and should escalate")
+    parser.add_argument("--compare-backends", action="store_true",
+                        help="Print extraction time and text quality per PDF backend, then exit")
+    parser.add_argument("--json", dest="json_path", help="Write results to this file")
+    parser.add_argument("--baseline", help="Compare against results previously written with --json")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before failing")
+    args = parser.parse_args(argv)
+    if args.compare_backends:
+        compare_backends(args.pages)
+        return 0
+
+    settings = StubSettings(args.latency, args.jitter, args.tokens_per_second, args.error_rate, seed=0,
+                            bad_reply_rate=args.bad_reply_rate, bad_reply_model=FAST_MODEL)
+    server, base_url = start_server(settings)
+    configure_client("benchmark", base_url=base_url)
+    set_routing_mode(args.routing)
+    try:
+        results = []
+        for name, func, iterations, concurrency, setup in build_cases(args):
+            results.append(run_case(name, func, iterations, concurrency, setup, args.warmup))
+            print(f"  {name}: p50 {results[-1]['p50'] * 1000:.2f}ms", file=sys.stderr)
+    finally:
+        server.shutdown()
+
+    print_table(results)
+    if args.routing == "cascade":
+        with open(METRICS_LOG_PATH, encoding="utf-8") as f:
+            routes = summarize_routes(json.loads(line) for line in f)
+        for task, row in routes.items():
+            print(f"route {task}: {row['calls']} calls, {row['escalation_rate']:.1%} escalated, "
+                  f"{row['mean_tokens']} tokens per call")
+    failed = [r for r in results if r["errors"]]
+    for r in failed:
+        print(f"❌ {r['name']}: {r['errors']} errors, first: {r['first_error']}")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"⚠️ Regression: {line}")
+        if regressions:
+            return 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""Local stand-in for the Groq /chat/completions API with configurable latency and canned replies"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from prompt_compaction import count_tokens
+
+PARSE_REPLY = {
+    "full_name": "Alex Kim",
+    "email": "alex@example.com",
+    "phone": "+1 555 0100",
+    "education": [{"degree": "BSc Computer Science", "institution": "State University", "year": "2015"}],
+    "work_experience": [{
+        "job_title": "Software Engineer",
+        "company": "Acme Corp",
+        "duration": "2016-2020",
+        "responsibilities": ["Built payment APIs", "Automated CI/CD workflows"],
+    }],
+    "skills": ["Python", "SQL", "Docker", "AWS"],
+    "certifications": ["AWS Certified Developer"],
+}
+ATS_REPLY = {
+    "ats_score": 78,
+    "score_category": "Fair",
+    "matched_keywords": ["python", "sql", "docker"],
+    "missing_keywords": ["kubernetes", "terraform"],
+    "skills_gap": ["kubernetes"],
+    "experience_alignment": "Backend experience lines up with most of the role.",
+    "overall_assessment": "Solid candidate with a few infrastructure gaps.",
+    "recommendations": ["Mention Kubernetes work", "Quantify API throughput gains"],
+}
+MARKDOWN_REPLY = "\n".join(
+    f"{i}. **Recommendation {i}**: Practise the skill on a real project and describe the measurable outcome."
+    for i in range(1, 13)
+)
+
+
+def canned_reply(prompt, bad=False):
+    """Pick a reply shaped like what the app expects for this prompt
+
+    A bad reply is well-formed but incomplete, the kind of answer the
+    model cascade should escalate.
+    """
+    if "ATS Score (0-100)" in prompt:
+        return json.dumps(dict(ATS_REPLY, matched_keywords=[], missing_keywords=[]) if bad else ATS_REPLY)
+    if "resume parser" in prompt:
+        return json.dumps({"full_name": "Alex Kim"} if bad else PARSE_REPLY)
+    return "Sorry, I cannot help with that." if bad else MARKDOWN_REPLY
+
+
+class StubSettings:
+    """Latency model and failure injection shared by all request handlers"""
+
+    def __init__(self, latency=0.2, jitter=0.05, tokens_per_second=400.0, error_rate=0.0, retry_after=0.1,
+                 seed=None, bad_reply_rate=0.0, bad_reply_model=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        # Fraction of replies (from bad_reply_model only, if set) that are incomplete
+        self.bad_reply_rate = bad_reply_rate
+        self.bad_reply_model = bad_reply_model
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def first_token_delay(self):
+        with self.lock:
+            return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    def should_fail(self):
+        with self.lock:
+            self.requests += 1
+            return self.error_rate > 0 and self.random.random() < self.error_rate
+
+    def should_degrade(self, model):
+        if self.bad_reply_model is not None and model != self.bad_reply_model:
+            return False
+        with self.lock:
+            return self.bad_reply_rate > 0 and self.random.random() < self.bad_reply_rate
+
+
+def _split_chunks(text, size=16):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class CompletionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    settings = StubSettings()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+        if self.settings.should_fail():
+            self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+                            {"retry-after": str(self.settings.retry_after)})
+            return
+
+        prompt = "\n".join(str(m.get("content", "")) for m in request.get("messages", []))
+        model = request.get("model", "stub")
+        reply = canned_reply(prompt, bad=self.settings.should_degrade(model))
+        usage = {"prompt_tokens": count_tokens(prompt), "completion_tokens": count_tokens(reply)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        time.sleep(self.settings.first_token_delay())
+
+        if request.get("stream"):
+            self._stream(reply, usage, model, completion_id)
+            return
+        time.sleep(usage["completion_tokens"] / self.settings.tokens_per_second)
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+    def _stream(self, reply, usage, model, completion_id):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        chunks = _split_chunks(reply)
+        delay = count_tokens(reply) / self.settings.tokens_per_second / max(len(chunks), 1)
+        for i, piece in enumerate(chunks):
+            last = i == len(chunks) - 1
+            event = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": "stop" if last else None}],
+            }
+            if last:
+                # Groq reports streamed usage under x_groq on the final chunk
+                event["x_groq"] = {"usage": usage}
+            self._write_chunk(f"data: {json.dumps(event)}\n\n")
+            time.sleep(delay)
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, text):
+        data = text.encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients closing pooled keep-alive connections is expected, not an error
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_server(settings=None, host="127.0.0.1", port=0):
+    """Serve in a background thread; returns (server, base_url) for configure_client"""
+    handler = type("Handler", (CompletionHandler,), {"settings": settings or StubSettings()})
+    server = StubServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/openai/v1"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first token")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Uniform +/- seconds added to the latency")
+    parser.add_argument("--tokens-per-second", type=float, default=400.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--bad-reply-rate", type=float, default=0.0, help="Fraction of replies that are incomplete")
+    parser.add_argument("--bad-reply-model", help="Only degrade replies from this model")
+    args = parser.parse_args(argv)
+    settings = StubSettings(args.latency, args.jitter, args.tokens_per_second, args.error_rate,
+                            bad_reply_rate=args.bad_reply_rate, bad_reply_model=args.bad_reply_model)
+    server, base_url = start_server(settings, args.host, args.port)
+    print(f"Stub server listening; set GROQ_BASE_URL={base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,551 @@
+"""Columnar store of parsed resumes, ATS scores and keywords for cross-candidate analytics
+
+    python candidate_store.py skills --top 20
+    python candidate_store.py scores
+    python candidate_store.py query --has python docker --lacks java
+"""
+import argparse
+import contextlib
+import glob
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+from extraction_cache import DEFAULT_CACHE_DIR
+from keyword_matcher import count_skills, tokenize
+from structured_output import parse_json_response
+
+DEFAULT_STORE_DIR = os.environ.get("RESUME_ANA_STORE_DIR", os.path.join(DEFAULT_CACHE_DIR, "candidate_store"))
+# Set to 0 to stop recording analyses; the store can still be queried
+RECORD_ANALYSES = os.environ.get("RESUME_ANA_CANDIDATE_STORE", "1") != "0"
+# Journal rows collected before they are compacted into a columnar segment
+SEGMENT_ROWS = int(os.environ.get("RESUME_ANA_STORE_SEGMENT_ROWS", 5000))
+
+STRING_COLUMNS = ("candidate", "name", "requisition", "requisition_label", "category", "source")
+FLOAT_COLUMNS = {"ats_score": np.float32, "local_score": np.float32, "created": np.float64}
+LIST_COLUMNS = ("skills", "matched", "missing")
+
+
+def normalize_term(term):
+    """Map a skill or keyword to the taxonomy's canonical name, or to its lowercased tokens"""
+    tokens = tokenize(str(term))
+    skills = count_skills(tokens)
+    if len(skills) == 1:
+        return next(iter(skills))
+    return " ".join(tokens)
+
+
+def _terms(values):
+    if isinstance(values, str):
+        values = values.split(",")
+    seen = []
+    for value in values or ():
+        term = normalize_term(value)
+        if term and term not in seen:
+            seen.append(term)
+    return seen
+
+
+def _as_dict(value):
+    if value is None or isinstance(value, dict):
+        return value
+    try:
+        data = parse_json_response(value)
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _score(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def build_record(resume_text, job_description=None, parsed=None, ats=None, keyword_match=None,
+                 source="", requisition_label=None):
+    """Flatten one analysis into a store row
+
+    `parsed` and `ats` may be the model's raw JSON replies or already
+    decoded dicts. Skills combine the parser's list with taxonomy skills
+    found in the resume text, so even unparsed resumes are searchable.
+    """
+    parsed = _as_dict(parsed) or {}
+    ats = _as_dict(ats) or {}
+    keyword_match = keyword_match or {}
+    skills = _terms(parsed.get("skills"))
+    for skill in count_skills(tokenize(resume_text)):
+        if skill not in skills:
+            skills.append(skill)
+    requisition = ""
+    if job_description and job_description.strip():
+        requisition = hashlib.sha256(job_description.encode("utf-8")).hexdigest()[:16]
+        if requisition_label is None:
+            requisition_label = job_description.strip().splitlines()[0][:80]
+    return {
+        "candidate": hashlib.sha256(resume_text.encode("utf-8")).hexdigest()[:16],
+        "name": str(parsed.get("full_name") or ""),
+        "requisition": requisition,
+        "requisition_label": requisition_label or "",
+        "category": str(ats.get("score_category") or ""),
+        "source": source,
+        "ats_score": _score(ats.get("ats_score")),
+        "local_score": _score(keyword_match.get("ats_score")),
+        "created": time.time(),
+        "skills": skills,
+        "matched": _terms(ats.get("matched_keywords") or keyword_match.get("matched_keywords")),
+        "missing": _terms(ats.get("missing_keywords") or keyword_match.get("missing_keywords")),
+    }
+
+
+def _encode_strings(values):
+    vocab, codes = np.unique(np.array(values, dtype=str), return_inverse=True)
+    return codes.astype(np.int32), vocab
+
+
+def _encode_records(records):
+    """Turn row dicts into the flat arrays of one segment"""
+    arrays = {}
+    for column in STRING_COLUMNS:
+        arrays[f"{column}_codes"], arrays[f"{column}_vocab"] = _encode_strings([r[column] for r in records])
+    for column, dtype in FLOAT_COLUMNS.items():
+        arrays[column] = np.array([r[column] for r in records], dtype=dtype)
+    for column in LIST_COLUMNS:
+        lengths = [len(r[column]) for r in records]
+        flat = [term for r in records for term in r[column]]
+        codes, vocab = _encode_strings(flat) if flat else (np.zeros(0, np.int32), np.zeros(0, dtype=str))
+        arrays[f"{column}_offsets"] = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        arrays[f"{column}_codes"], arrays[f"{column}_vocab"] = codes, vocab
+    return arrays
+
+
+def _concatenate(parts, dtype):
+    return np.concatenate(parts).astype(dtype) if parts else np.zeros(0, dtype)
+
+
+class _Vocabulary:
+    """Grows a global string dictionary while remapping per-segment codes into it"""
+
+    def __init__(self):
+        self.terms = []
+        self.index = {}
+
+    def remap(self, vocab, codes):
+        lookup = np.empty(len(vocab), dtype=np.int32)
+        for i, term in enumerate(vocab.tolist()):
+            lookup[i] = self.index.setdefault(term, len(self.terms))
+            if lookup[i] == len(self.terms):
+                self.terms.append(term)
+        return lookup[codes] if len(codes) else codes.astype(np.int32)
+
+
+class CandidateFrame:
+    """In-memory columns of every stored row with vectorized queries
+
+    String columns are dictionary-encoded int32 codes, list columns
+    (skills, matched and missing keywords) are CSR-style offsets into one
+    flat code array, so set-membership and frequency queries are a handful
+    of NumPy passes over contiguous arrays.
+    """
+
+    def __init__(self, segments):
+        self.vocab = {column: _Vocabulary() for column in STRING_COLUMNS + LIST_COLUMNS}
+        parts = {column: [] for column in STRING_COLUMNS + tuple(FLOAT_COLUMNS)}
+        list_parts = {column: ([], []) for column in LIST_COLUMNS}
+        for arrays in segments:
+            for column in STRING_COLUMNS:
+                parts[column].append(self.vocab[column].remap(arrays[f"{column}_vocab"], arrays[f"{column}_codes"]))
+            for column in FLOAT_COLUMNS:
+                parts[column].append(arrays[column])
+            for column in LIST_COLUMNS:
+                offsets = arrays[f"{column}_offsets"]
+                list_parts[column][0].append(np.diff(offsets))
+                list_parts[column][1].append(
+                    self.vocab[column].remap(arrays[f"{column}_vocab"], arrays[f"{column}_codes"]))
+        dtypes = dict.fromkeys(STRING_COLUMNS, np.int32)
+        dtypes.update(FLOAT_COLUMNS)
+        self.columns = {column: _concatenate(parts[column], dtype) for column, dtype in dtypes.items()}
+        self.size = len(self.columns["candidate"])
+        self.lengths, self.values, self.value_rows = {}, {}, {}
+        for column in LIST_COLUMNS:
+            lengths, values = list_parts[column]
+            self.lengths[column] = _concatenate(lengths, np.int64)
+            self.values[column] = _concatenate(values, np.int32)
+            # Row number of every flat value, for scattering per-value tests back onto rows
+            self.value_rows[column] = np.repeat(np.arange(self.size), self.lengths[column])
+
+    def __len__(self):
+        return self.size
+
+    def terms(self, column="skills"):
+        """Sorted distinct values of a list column"""
+        return sorted(self.vocab[column].terms)
+
+    def _code(self, column, term):
+        return self.vocab[column].index.get(term, -1)
+
+    def _latest(self, rows, keys):
+        """Of the given row numbers, keep the most recent one per key"""
+        if not len(rows):
+            return rows
+        order = np.lexsort((self.columns["created"][rows], keys[rows]))
+        sorted_keys = keys[rows][order]
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = sorted_keys[1:] != sorted_keys[:-1]
+        return rows[order[last]]
+
+    def _requisition_rows(self, requisition):
+        if requisition is None:
+            return np.ones(self.size, dtype=bool)
+        return self.columns["requisition"] == self._code("requisition", requisition)
+
+    def candidate_rows(self, requisition=None):
+        """Latest row with skills for each candidate (seen in `requisition`, if given)"""
+        rows = np.flatnonzero(self.lengths["skills"] > 0)
+        rows = self._latest(rows, self.columns["candidate"])
+        if requisition is not None:
+            seen = np.unique(self.columns["candidate"][self._requisition_rows(requisition)])
+            rows = rows[np.isin(self.columns["candidate"][rows], seen)]
+        return rows
+
+    def has_term(self, term, column="skills"):
+        """Boolean mask of rows whose list column contains `term`"""
+        mask = np.zeros(self.size, dtype=bool)
+        code = self._code(column, normalize_term(term))
+        if code >= 0:
+            mask[self.value_rows[column][self.values[column] == code]] = True
+        return mask
+
+    def term_frequency(self, column="skills", requisition=None, top=20):
+        """Return [(term, candidates)] for a list column, most common first
+
+        Skills count each candidate's latest parse once; keyword columns
+        count the latest analysis per candidate and requisition.
+        """
+        if column == "skills":
+            rows = self.candidate_rows(requisition)
+        else:
+            rows = np.flatnonzero((self.lengths[column] > 0) & self._requisition_rows(requisition))
+            rows = self._latest(rows, self._pair_keys())
+        selected = np.zeros(self.size, dtype=bool)
+        selected[rows] = True
+        counts = np.bincount(self.values[column][selected[self.value_rows[column]]],
+                             minlength=len(self.vocab[column].terms))
+        order = np.argsort(-counts, kind="stable")[:top]
+        terms = self.vocab[column].terms
+        return [(terms[i], int(counts[i])) for i in order if counts[i]]
+
+    def score_rows(self, requisition=None):
+        """Latest scored row per (candidate, requisition)"""
+        rows = np.flatnonzero(~np.isnan(self.columns["ats_score"]) & self._requisition_rows(requisition))
+        return self._latest(rows, self._pair_keys())
+
+    def _pair_keys(self):
+        return (self.columns["candidate"].astype(np.int64) * max(1, len(self.vocab["requisition"].terms))
+                + self.columns["requisition"])
+
+    def score_distribution(self, bins=10, requisition=None):
+        """Return per-requisition ATS score summaries with a histogram over 0-100"""
+        rows = self.score_rows(requisition)
+        requisitions = self.columns["requisition"][rows]
+        scores = self.columns["ats_score"][rows]
+        order = np.argsort(requisitions, kind="stable")
+        requisitions, scores = requisitions[order], scores[order]
+        starts = np.flatnonzero(np.r_[True, requisitions[1:] != requisitions[:-1]]) if len(rows) else []
+        bounds = list(starts) + [len(rows)]
+        summaries = []
+        for start, end in zip(bounds, bounds[1:]):
+            group = scores[start:end]
+            code = requisitions[start]
+            label_codes = self.columns["requisition_label"][rows[order[start:end]]]
+            p25, p50, p75 = np.percentile(group, [25, 50, 75])
+            summaries.append({
+                "requisition": self.vocab["requisition"].terms[code],
+                "label": self.vocab["requisition_label"].terms[label_codes[-1]],
+                "candidates": int(len(group)),
+                "mean": round(float(group.mean()), 1),
+                "min": float(group.min()),
+                "p25": float(p25),
+                "median": float(p50),
+                "p75": float(p75),
+                "max": float(group.max()),
+                "histogram": np.histogram(group, bins=bins, range=(0, 100))[0].tolist(),
+            })
+        summaries.sort(key=lambda summary: -summary["candidates"])
+        return summaries
+
+    def candidates_with(self, has=(), lacks=(), requisition=None, min_score=None, limit=100):
+        """Candidates whose latest skills include every term in `has` and none in `lacks`
+
+        With `requisition` set, only candidates scored against it are
+        considered and their score there is included (and filtered by
+        `min_score`). Results are sorted by that score, best first.
+        """
+        rows = self.candidate_rows(requisition)
+        mask = np.ones(self.size, dtype=bool)
+        for term in has:
+            mask &= self.has_term(term)
+        for term in lacks:
+            mask &= ~self.has_term(term)
+        rows = rows[mask[rows]]
+        scores = np.full(self.size, np.nan, dtype=np.float32)
+        if requisition is not None:
+            scored = self.score_rows(requisition)
+            by_candidate = np.full(len(self.vocab["candidate"].terms), np.nan, dtype=np.float32)
+            by_candidate[self.columns["candidate"][scored]] = self.columns["ats_score"][scored]
+            scores[rows] = by_candidate[self.columns["candidate"][rows]]
+            if min_score is not None:
+                rows = rows[scores[rows] >= min_score]
+        rows = rows[np.argsort(-np.nan_to_num(scores[rows], nan=-1), kind="stable")][:limit]
+        names = self.vocab["name"].terms
+        candidates = self.vocab["candidate"].terms
+        return [{
+            "candidate": candidates[self.columns["candidate"][row]],
+            "name": names[self.columns["name"][row]],
+            "ats_score": None if np.isnan(scores[row]) else float(scores[row]),
+        } for row in rows]
+
+    def requisitions(self):
+        """Return [(requisition id, label, rows)] for every job description seen"""
+        counts = np.bincount(self.columns["requisition"], minlength=len(self.vocab["requisition"].terms))
+        labels = {}
+        for code, label in zip(self.columns["requisition"].tolist(), self.columns["requisition_label"].tolist()):
+            labels[code] = self.vocab["requisition_label"].terms[label]
+        return [(term, labels.get(code, ""), int(counts[code]))
+                for code, term in enumerate(self.vocab["requisition"].terms) if term]
+
+
+class CandidateStore:
+    """Append-only analysis records: a JSONL journal compacted into NumPy segments
+
+    Each `add` appends one line to `journal.jsonl`. Once it holds
+    SEGMENT_ROWS rows the journal is renamed aside and rewritten as a
+    columnar `.npz` segment, so reads load a few compressed arrays rather
+    than parsing JSON. Several processes may append: appends and
+    compaction take an exclusive lock on `store.lock`, so no row can be
+    written to a journal after compaction has renamed it, and the rename
+    makes each journal belong to exactly one compaction.
+    """
+
+    def __init__(self, store_dir=None, segment_rows=SEGMENT_ROWS):
+        self.store_dir = store_dir or DEFAULT_STORE_DIR
+        self.segment_rows = segment_rows
+        self._lock = threading.Lock()
+        self._journal_rows = None
+        self._frame = None
+        self._frame_key = None
+        os.makedirs(self.store_dir, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.store_dir, name)
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        """Hold the store's cross-process lock, on top of the in-process one"""
+        with open(self._path("store.lock"), "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def add(self, record):
+        line = json.dumps(record) + "\n"
+        with self._lock, self._file_lock():
+            with open(self._path("journal.jsonl"), "a", encoding="utf-8") as f:
+                f.write(line)
+            if self._journal_rows is None:
+                self._journal_rows = len(self._read_journal(self._path("journal.jsonl")))
+            else:
+                self._journal_rows += 1
+            if self._journal_rows >= self.segment_rows:
+                self._compact()
+
+    def compact(self):
+        """Move every journalled row into a columnar segment"""
+        with self._lock, self._file_lock():
+            self._compact()
+
+    def _compact(self):
+        # Called with both locks held
+        stem = f"{time.time_ns()}-{os.getpid()}"
+        pending = self._path(f"journal-{stem}.compacting")
+        try:
+            os.rename(self._path("journal.jsonl"), pending)
+        except FileNotFoundError:
+            return
+        self._journal_rows = 0
+        self._finish_compaction(pending)
+        # Journals left over from an interrupted compaction
+        for leftover in glob.glob(self._path("journal-*.compacting")):
+            if leftover != pending:
+                self._finish_compaction(leftover)
+
+    def _segment_path(self, pending):
+        stem = os.path.basename(pending)[len("journal-"):-len(".compacting")]
+        return self._path(f"segment-{stem}.npz")
+
+    def _finish_compaction(self, pending):
+        segment = self._segment_path(pending)
+        if not os.path.exists(segment):
+            records = self._read_journal(pending)
+            if records:
+                tmp_path = segment[:-len(".npz")] + ".tmp.npz"
+                np.savez_compressed(tmp_path, **_encode_records(records))
+                os.replace(tmp_path, segment)
+        os.remove(pending)
+
+    @staticmethod
+    def _read_journal(path):
+        records = []
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # A torn final line from a crashed writer
+                        continue
+        except FileNotFoundError:
+            pass
+        return records
+
+    def frame(self):
+        """Return a CandidateFrame of every row, reloaded only when the files change"""
+        with self._lock:
+            segments = sorted(glob.glob(self._path("segment-*[0-9].npz")))
+            journals = [path for path in sorted(glob.glob(self._path("journal-*.compacting")))
+                        if not os.path.exists(self._segment_path(path))]
+            journals.append(self._path("journal.jsonl"))
+            key = tuple((path, os.path.getsize(path)) for path in segments + journals if os.path.exists(path))
+            if key != self._frame_key:
+                arrays = []
+                for path in segments:
+                    with np.load(path) as data:
+                        arrays.append(dict(data))
+                records = [record for path in journals for record in self._read_journal(path)]
+                if records:
+                    arrays.append(_encode_records(records))
+                self._frame = CandidateFrame(arrays)
+                self._frame_key = key
+            return self._frame
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the process-wide store in DEFAULT_STORE_DIR"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CandidateStore()
+        return _store
+
+
+def record_analysis(resume_text, job_description=None, parsed=None, ats=None, keyword_match=None, source=""):
+    """Add an analysis to the shared store unless recording is disabled
+
+    Never raises on disk errors or malformed analyses, so recording cannot
+    break the page or job that produced them.
+    """
+    if not RECORD_ANALYSES or not resume_text:
+        return
+    try:
+        get_store().add(build_record(resume_text, job_description, parsed, ats, keyword_match, source))
+    except (OSError, ValueError, TypeError):
+        pass
+
+
+def _find_requisition(frame, value):
+    if value is None:
+        return None
+    for requisition, label, _ in frame.requisitions():
+        if requisition.startswith(value) or label == value:
+            return requisition
+    raise SystemExit(f"No requisition matches {value!r}; see 'candidate_store.py requisitions'")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store-dir", default=DEFAULT_STORE_DIR, help="Directory holding the store")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    skills = commands.add_parser("skills", help="Most common skills or keywords across candidates")
+    skills.add_argument("--column", choices=LIST_COLUMNS, default="skills")
+    skills.add_argument("--requisition", help="Requisition id prefix or job description label")
+    skills.add_argument("--top", type=int, default=20)
+
+    scores = commands.add_parser("scores", help="ATS score distribution per requisition")
+    scores.add_argument("--requisition")
+    scores.add_argument("--bins", type=int, default=10)
+
+    query = commands.add_parser("query", help="Candidates with some skills and without others")
+    query.add_argument("--has", nargs="+", default=[])
+    query.add_argument("--lacks", nargs="+", default=[])
+    query.add_argument("--requisition")
+    query.add_argument("--min-score", type=float)
+    query.add_argument("--limit", type=int, default=50)
+
+    commands.add_parser("requisitions", help="List the job descriptions seen so far")
+    commands.add_parser("compact", help="Move journalled rows into a columnar segment")
+    args = parser.parse_args(argv)
+
+    store = CandidateStore(args.store_dir)
+    if args.command == "compact":
+        store.compact()
+    start = time.perf_counter()
+    frame = store.frame()
+    loaded = time.perf_counter()
+    if args.command == "skills":
+        result = frame.term_frequency(args.column, _find_requisition(frame, args.requisition), args.top)
+        lines = [f"{count:>7}  {term}" for term, count in result]
+    elif args.command == "scores":
+        result = frame.score_distribution(args.bins, _find_requisition(frame, args.requisition))
+        lines = [f"{s['requisition']}  n={s['candidates']:<6} mean={s['mean']:<5} "
+                 f"p25/50/75={s['p25']:g}/{s['median']:g}/{s['p75']:g}  {s['label']}\n"
+                 f"    histogram: {s['histogram']}" for s in result]
+    elif args.command == "query":
+        result = frame.candidates_with(args.has, args.lacks, _find_requisition(frame, args.requisition),
+                                       args.min_score, args.limit)
+        lines = [f"{c['candidate']}  {'-' if c['ats_score'] is None else c['ats_score']:>5}  {c['name']}"
+                 for c in result]
+    elif args.command == "requisitions":
+        result = frame.requisitions()
+        lines = [f"{requisition}  {rows:>6} rows  {label}" for requisition, label, rows in result]
+    else:
+        result, lines = None, []
+    done = time.perf_counter()
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print("\n".join(lines))
+    print(f"{len(frame)} rows loaded in {(loaded - start) * 1000:.1f} ms, query {(done - loaded) * 1000:.1f} ms",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
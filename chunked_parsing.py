@@ -0,0 +1,279 @@
+"""Map-reduce parsing of long resumes: one concurrent model call per group of sections"""
+import contextvars
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import timed_stage
+from prompt_compaction import PROMPT_TOKEN_BUDGETS, clean_text, count_tokens, split_sections
+from structured_output import parse_json_response
+
+# "auto" chunks resumes that would not fit the parse prompt, "always" chunks every resume, "never" disables it
+CHUNKED_PARSE = os.environ.get("RESUME_ANA_CHUNKED_PARSE", "auto")
+# Largest piece of resume text sent in one chunk prompt
+CHUNK_TOKENS = int(os.environ.get("RESUME_ANA_PARSE_CHUNK_TOKENS", 1500))
+# Upper bound on model calls per resume; chunks grow instead once it is reached
+MAX_CHUNKS = int(os.environ.get("RESUME_ANA_PARSE_MAX_CHUNKS", 12))
+# Contact details sit at the top, so only this much of the header and summary is sent
+CONTACT_CHARS = 1600
+# Header lines taken as the contact block; anything below them is also read by the general prompt
+CONTACT_LINES = 6
+
+# Resume section -> the part of the parser schema it fills; unlisted sections are not sent.
+# Text under a heading split_sections does not know goes to the "general" field instead,
+# whose prompt asks for every kind of entry, so it is never read by a narrower prompt.
+SECTION_FIELDS = {
+    "header": "contact",
+    "summary": "contact",
+    "experience": "work_experience",
+    "education": "education",
+    "skills": "skills",
+    "projects": "skills",
+    "certifications": "certifications",
+}
+
+# Field -> (what to extract, example JSON for that part of the schema)
+SUB_SCHEMAS = {
+    "contact": ("the candidate's full name, email and phone number",
+                {"full_name": "John Doe", "email": "john.doe@email.com", "phone": "+1-234-567-8900"}),
+    "work_experience": ("every job or position, with its responsibilities", {"work_experience": [{
+        "job_title": "Software Engineer",
+        "company": "Company Name",
+        "duration": "2020-2023",
+        "responsibilities": ["Task 1", "Task 2"],
+    }]}),
+    "education": ("every degree or qualification",
+                  {"education": [{"degree": "Bachelor of Science in Computer Science",
+                                  "institution": "University Name", "year": "2020"}]}),
+    "skills": ("every skill, tool and technology mentioned", {"skills": ["Python", "JavaScript", "React"]}),
+    "certifications": ("every certification or license", {"certifications": ["AWS Certified", "Google Cloud"]}),
+    "general": ("every job, position or appointment (with its responsibilities), degree, skill and certification", {
+        "work_experience": [{"job_title": "Software Engineer", "company": "Company Name",
+                             "duration": "2020-2023", "responsibilities": ["Task 1", "Task 2"]}],
+        "education": [{"degree": "Bachelor of Science in Computer Science",
+                       "institution": "University Name", "year": "2020"}],
+        "skills": ["Python", "JavaScript", "React"],
+        "certifications": ["AWS Certified"],
+    }),
+}
+
+_BULLET_RE = re.compile(r"^\s*[-•*·▪●◦–]")
+# Fields whose lines are often Title Case (names, job titles, degrees, certificates); only
+# ALL CAPS or "Heading:" lines count as unknown headings in them
+_STRICT_HEADING_FIELDS = ("contact", "work_experience", "education", "certifications")
+
+
+def should_chunk(resume_text, mode=CHUNKED_PARSE):
+    if mode == "always":
+        return True
+    if mode == "never":
+        return False
+    return count_tokens(clean_text(resume_text)) > PROMPT_TOKEN_BUDGETS["parse"]
+
+
+def _entry_start(lines):
+    """Index of the last line that starts a new entry (a job or degree line), in the second half of lines"""
+    for i in range(len(lines) - 1, len(lines) // 2, -1):
+        if lines[i].strip() and not _BULLET_RE.match(lines[i]):
+            return i
+    return None
+
+
+def split_text(text, max_tokens):
+    """Split text into pieces of at most about max_tokens, starting pieces at entry lines where possible"""
+    pieces, current, size = [], [], 0
+    for line in text.splitlines():
+        line_tokens = count_tokens(line)
+        if current and size + line_tokens > max_tokens:
+            cut = _entry_start(current)
+            carry = current[cut:] if cut else []
+            pieces.append("\n".join(current[:cut] if cut else current))
+            current, size = carry, sum(count_tokens(l) for l in carry)
+        current.append(line)
+        size += line_tokens
+    if current:
+        pieces.append("\n".join(current))
+    return [piece for piece in pieces if piece.strip()]
+
+
+def _is_unknown_heading(line, strict):
+    """Whether a line looks like a section heading split_sections did not recognize"""
+    text = line.strip()
+    words = text.rstrip(":").split()
+    if not words or len(words) > 5 or _BULLET_RE.match(line) or any(c.isdigit() or c in ",;|@" for c in text):
+        return False
+    if text.endswith(":") or (text.isupper() and len(text) > 3):
+        return True
+    # Single Title Case words are too often list items ("Python") to count
+    return not strict and len(words) > 1 and all(
+        word[0].isupper() or word.lower() in ("and", "of", "in", "&") for word in words)
+
+
+def _unknown_heading_at(field, body):
+    """Character offset of the first unknown heading in a section body, or len(body)
+
+    The first line is the section's own heading (or, for the header, the
+    candidate's name) and is never treated as an unknown heading.
+    """
+    offset = body.find("\n") + 1
+    if not offset:
+        return len(body)
+    for line in body[offset:].splitlines(keepends=True):
+        if _is_unknown_heading(line, strict=field in _STRICT_HEADING_FIELDS):
+            return offset
+        offset += len(line)
+    return len(body)
+
+
+def plan_chunks(resume_text, max_tokens=CHUNK_TOKENS, max_chunks=MAX_CHUNKS):
+    """Return [(field, text)] chunks for a resume, or None if it has no recognizable sections"""
+    sections = split_sections(clean_text(resume_text))
+    if all(name == "header" for name, _ in sections):
+        return None
+    by_field = {}
+    for name, body in sections:
+        field = SECTION_FIELDS.get(name)
+        if not field:
+            continue
+        cut = _unknown_heading_at(field, body)
+        own = body[:cut]
+        if field == "contact":
+            # The contact prompt always sees the top of the header but reads nothing else from it,
+            # so text below the contact block, or past CONTACT_CHARS, is read generally too
+            own = body
+            if name == "header":
+                lines = body.splitlines(keepends=True)
+                cut = min(cut, sum(len(line) for line in lines[:CONTACT_LINES]))
+            if len(body) > CONTACT_CHARS:
+                line_end = body.rfind("\n", 0, CONTACT_CHARS)
+                cut = min(cut, line_end if line_end > 0 else CONTACT_CHARS)
+        by_field.setdefault(field, []).append(own)
+        if body[cut:].strip():
+            by_field.setdefault("general", []).append(body[cut:])
+    if "contact" in by_field:
+        by_field["contact"] = ["\n".join(by_field["contact"])[:CONTACT_CHARS]]
+
+    total = sum(count_tokens(body) for bodies in by_field.values() for body in bodies)
+    # With too many chunks, grow them so the number of calls stays bounded
+    max_tokens = max(max_tokens, total // max_chunks + 1)
+    chunks = []
+    for field, bodies in by_field.items():
+        for piece in split_text("\n".join(bodies), max_tokens):
+            chunks.append((field, piece))
+    return chunks
+
+
+def build_chunk_prompt(field, text):
+    task, example = SUB_SCHEMAS[field]
+    return f"""
+You are a smart AI resume parser. The text below is one section of a longer resume.
+Extract {task} from it.
+
+IMPORTANT: Return ONLY a valid JSON object with the following structure, using empty values for anything not in this section:
+{json.dumps(example, indent=4)}
+
+Resume section:
+\"\"\"{text}\"\"\"
+"""
+
+
+# Runs of whitespace and punctuation other than the symbols that tell "C++", "C#" and "C" apart
+_KEY_SEPARATOR_RE = re.compile(r"[^\w+#.]+")
+
+
+def _key(*values):
+    return tuple(_KEY_SEPARATOR_RE.sub(" ", str(value or "").casefold()).strip(" .") for value in values)
+
+
+def _as_list(value):
+    if not value:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _merge_entries(entries, key_fields, list_field=None):
+    """Deduplicate dict entries by key_fields, filling blanks and pooling list_field from duplicates"""
+    merged = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            entry = {key_fields[0]: str(entry)}
+        key = _key(*(entry.get(field) for field in key_fields))
+        if key not in merged:
+            merged[key] = dict(entry)
+            continue
+        existing = merged[key]
+        for field, value in entry.items():
+            if field == list_field:
+                existing[field] = _merge_strings(_as_list(existing.get(field)) + _as_list(value))
+            elif not existing.get(field):
+                existing[field] = value
+    return list(merged.values())
+
+
+def _merge_strings(values):
+    seen = {}
+    for value in values:
+        value = str(value).strip()
+        if value and _key(value) not in seen:
+            seen[_key(value)] = value
+    return list(seen.values())
+
+
+def merge_parsed(parts):
+    """Combine partial parser replies into the full resume JSON structure"""
+    merged = {"full_name": "", "email": "", "phone": "", "education": [], "work_experience": [],
+              "skills": [], "certifications": []}
+    lists = {"education": [], "work_experience": [], "skills": [], "certifications": []}
+    for part in parts:
+        for field in ("full_name", "email", "phone"):
+            if not merged[field] and part.get(field):
+                merged[field] = str(part[field]).strip()
+        for field in lists:
+            lists[field] += _as_list(part.get(field))
+    merged["education"] = _merge_entries(lists["education"], ("degree", "institution"))
+    merged["work_experience"] = _merge_entries(lists["work_experience"], ("job_title", "company"), "responsibilities")
+    merged["skills"] = _merge_strings(lists["skills"])
+    merged["certifications"] = _merge_strings(lists["certifications"])
+    return merged
+
+
+def parse_in_chunks(resume_text, complete, max_workers=None):
+    """Parse a resume chunk by chunk and return the merged JSON text, or None to use a single prompt
+
+    `complete(prompt, field)` sends one chunk prompt and returns the model's
+    reply. Chunks run concurrently, so latency follows the largest chunk
+    rather than the whole document. Replies that are not valid JSON are
+    left out of the merge. If a chunk call fails, or no reply is usable,
+    None is returned so the caller falls back to the single prompt.
+    """
+    chunks = plan_chunks(resume_text)
+    if not chunks:
+        return None
+    with timed_stage("parse_chunked", chunks=len(chunks),
+                     largest_chunk_tokens=max(count_tokens(text) for _, text in chunks)) as info:
+        with ThreadPoolExecutor(max_workers=max_workers or len(chunks)) as executor:
+            # Each call runs in a copy of the caller's context so per-session instrumentation follows
+            futures = [executor.submit(contextvars.copy_context().run, complete, build_chunk_prompt(field, text), field)
+                       for field, text in chunks]
+            replies = []
+            for future in futures:
+                try:
+                    replies.append(future.result())
+                except Exception as e:
+                    # A missing section would go unnoticed in the merge, so parse the whole resume instead
+                    info.update(fallback="chunk_error", error=f"{type(e).__name__}: {e}")
+                    return None
+        parts = []
+        for reply in replies:
+            try:
+                data = parse_json_response(reply)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(data, dict):
+                parts.append(data)
+        info["invalid_chunks"] = len(replies) - len(parts)
+        if not parts:
+            info["fallback"] = "no_valid_chunks"
+            return None
+    return json.dumps(merge_parsed(parts), indent=2)
@@ -0,0 +1,120 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "RESUME_ANA_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "resume_ana"),
+)
+DEFAULT_MAX_BYTES = int(os.environ.get("RESUME_ANA_EXTRACTION_CACHE_BYTES", 64 * 1024 * 1024))
+
+
+class ExtractionCache:
+    """Content-addressed on-disk cache of extracted PDF text with LRU eviction.
+
+    Entries are keyed by the SHA-256 of the file bytes plus the extractor
+    version, so the same resume always maps to the same entry and a change in
+    extraction logic invalidates old entries. File mtimes track recency.
+    If the cache directory cannot be created the cache stays empty and
+    every lookup misses.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = os.path.join(cache_dir or DEFAULT_CACHE_DIR, "extraction")
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.enabled = True
+        except OSError:
+            self.enabled = False
+
+    @staticmethod
+    def make_key(file_bytes, extractor_version):
+        """Build the cache key for a document and extractor version"""
+        digest = hashlib.sha256()
+        digest.update(extractor_version.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(file_bytes)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.txt")
+
+    def get(self, key):
+        """Return cached text for key, or None on a miss"""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except (FileNotFoundError, OSError):
+            return None
+        try:
+            # Touch the entry so eviction sees it as recently used
+            os.utime(path, None)
+        except OSError:
+            pass
+        return text
+
+    def put(self, key, text):
+        """Store text under key and evict old entries if over the size limit"""
+        if not self.enabled:
+            return
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_bytes"""
+        if not self.enabled:
+            return
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.cache_dir):
+                if not entry.name.endswith(".txt"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+            if total <= self.max_bytes:
+                return
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+    def clear(self):
+        """Delete every cached entry"""
+        if not self.enabled:
+            return
+        with self._lock:
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(".txt"):
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
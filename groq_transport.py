@@ -0,0 +1,154 @@
+import asyncio
+import os
+import random
+import time
+
+# openai and httpx are imported on first use: openai alone takes about half a
+# second to import, which would otherwise be paid before the first page renders.
+
+# Point at any OpenAI-compatible server, e.g. the benchmark stand-in
+GROQ_BASE_URL = os.environ.get("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+
+
+def _env_float(name, default):
+    return float(os.environ.get(name, default))
+
+
+# Deadlines in seconds. Read covers the gap between bytes, so a streamed reply
+# may take longer overall as long as tokens keep arriving.
+CONNECT_TIMEOUT = _env_float("GROQ_CONNECT_TIMEOUT", 5)
+READ_TIMEOUT = _env_float("GROQ_READ_TIMEOUT", 60)
+WRITE_TIMEOUT = _env_float("GROQ_WRITE_TIMEOUT", 10)
+POOL_TIMEOUT = _env_float("GROQ_POOL_TIMEOUT", 10)
+
+# One pool is shared by every Streamlit session in the process
+MAX_CONNECTIONS = int(os.environ.get("GROQ_MAX_CONNECTIONS", 100))
+MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("GROQ_MAX_KEEPALIVE_CONNECTIONS", 20))
+KEEPALIVE_EXPIRY = _env_float("GROQ_KEEPALIVE_EXPIRY", 30)
+
+MAX_RETRIES = int(os.environ.get("GROQ_MAX_RETRIES", 4))
+BACKOFF_BASE = _env_float("GROQ_BACKOFF_BASE", 0.5)
+BACKOFF_CAP = _env_float("GROQ_BACKOFF_CAP", 20)
+
+
+def retryable_errors():
+    """429, 5xx, connection errors and timeouts"""
+    from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+    return (RateLimitError, InternalServerError, APIConnectionError, APITimeoutError)
+
+
+def default_timeout():
+    import httpx
+    return httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT, write=WRITE_TIMEOUT, pool=POOL_TIMEOUT)
+
+
+def default_limits():
+    import httpx
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+
+
+def create_client(api_key, base_url=GROQ_BASE_URL):
+    """Build a Groq client on a pooled keep-alive connection pool with explicit deadlines
+
+    The SDK's own retries are disabled; callers retry through RetryPolicy so
+    the backoff is tuned for Groq and retry counts can be observed.
+    """
+    import httpx
+    from openai import OpenAI
+    return OpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        timeout=default_timeout(),
+        max_retries=0,
+        http_client=httpx.Client(limits=default_limits(), timeout=default_timeout()),
+    )
+
+
+def create_async_client(api_key, base_url=GROQ_BASE_URL):
+    """Async counterpart of create_client for asyncio callers"""
+    import httpx
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        timeout=default_timeout(),
+        max_retries=0,
+        http_client=httpx.AsyncClient(limits=default_limits(), timeout=default_timeout()),
+    )
+
+
+def retry_after_seconds(error):
+    """Return the server-requested wait from Retry-After style headers, if any"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value) * scale)
+        except ValueError:
+            # HTTP-date form is not used by Groq; fall back to computed backoff
+            continue
+    return None
+
+
+class RetryPolicy:
+    """Jittered exponential backoff for 429, 5xx, connection errors and timeouts
+
+    Waits honour Retry-After when the server sends it; otherwise they use
+    "full jitter" so concurrent sessions that failed together do not retry
+    in lockstep.
+    """
+
+    def __init__(self, max_retries=MAX_RETRIES, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+        self.max_retries = max_retries
+        self.base = base
+        self.cap = cap
+
+    def delay(self, attempt, error):
+        """Seconds to wait before retry number `attempt` (starting at 1)"""
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            # Small jitter on top so clients told the same time spread out
+            return min(retry_after, self.cap) + random.uniform(0, self.base)
+        return random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+
+    def call(self, func, *args, on_retry=None, **kwargs):
+        """Call func, retrying retryable API errors; on_retry(attempt, error, delay) is optional"""
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except retryable_errors() as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                wait = self.delay(attempt, e)
+                if on_retry:
+                    on_retry(attempt, e, wait)
+                time.sleep(wait)
+
+    async def acall(self, func, *args, on_retry=None, **kwargs):
+        """Async version of call for coroutine functions such as AsyncOpenAI methods"""
+        attempt = 0
+        while True:
+            try:
+                return await func(*args, **kwargs)
+            except retryable_errors() as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                wait = self.delay(attempt, e)
+                if on_retry:
+                    on_retry(attempt, e, wait)
+                await asyncio.sleep(wait)
+
+
+retry_policy = RetryPolicy()
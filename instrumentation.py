@@ -0,0 +1,208 @@
+import contextlib
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import tempfile
+import threading
+import time
+
+from extraction_cache import DEFAULT_CACHE_DIR
+
+METRICS_LOG_PATH = os.environ.get(
+    "RESUME_ANA_METRICS_LOG", os.path.join(DEFAULT_CACHE_DIR, "metrics", "stages.jsonl")
+)
+METRICS_LOG_MAX_BYTES = int(os.environ.get("RESUME_ANA_METRICS_LOG_BYTES", 10 * 1024 * 1024))
+METRICS_LOG_BACKUPS = int(os.environ.get("RESUME_ANA_METRICS_LOG_BACKUPS", 5))
+# Optional path for a Prometheus textfile-collector export, rewritten after every stage
+PROMETHEUS_TEXTFILE = os.environ.get("RESUME_ANA_PROMETHEUS_FILE")
+
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+
+# Records for the current Streamlit session (or any other caller that sets one)
+_session_sink = contextvars.ContextVar("resume_ana_stage_sink", default=None)
+# Innermost stage being timed, recorded as the parent of stages that start inside it
+_current_stage = contextvars.ContextVar("resume_ana_current_stage", default=None)
+
+
+def _build_logger():
+    logger = logging.getLogger("resume_ana.metrics")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if not logger.handlers:
+        try:
+            os.makedirs(os.path.dirname(METRICS_LOG_PATH), exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                METRICS_LOG_PATH, maxBytes=METRICS_LOG_MAX_BYTES,
+                backupCount=METRICS_LOG_BACKUPS, encoding="utf-8",
+            )
+        except OSError:
+            handler = logging.NullHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    return logger
+
+
+_logger = _build_logger()
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=None):
+    items = list(key) + (list(extra.items()) if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in items) + "}"
+
+
+class MetricsRegistry:
+    """Minimal Prometheus-style counters and histograms kept in process memory"""
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, help_text="", **labels):
+        with self._lock:
+            self._help.setdefault(name, ("counter", help_text))
+            series = self._counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, value, help_text="", **labels):
+        with self._lock:
+            self._help.setdefault(name, ("histogram", help_text))
+            series = self._histograms.setdefault(name, {})
+            key = _label_key(labels)
+            state = series.setdefault(key, {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["buckets"][i] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, series in self._counters.items():
+                kind, help_text = self._help[name]
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+            for name, series in self._histograms.items():
+                kind, help_text = self._help[name]
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                for key, state in series.items():
+                    for bound, count in zip(self.buckets, state["buckets"]):
+                        lines.append(f"{name}_bucket{_format_labels(key, {'le': bound})} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(key, {'le': '+Inf'})} {state['count']}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {state['sum']}")
+                    lines.append(f"{name}_count{_format_labels(key)} {state['count']}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+def set_session_sink(records):
+    """Collect records from the current context (e.g. a Streamlit session) into `records`"""
+    _session_sink.set(records)
+
+
+def record_stage(stage, duration, model=None, prompt_tokens=None, completion_tokens=None,
+                 retries=0, cache=None, error=None, **extra):
+    """Record one timed stage to the JSONL log, the metrics registry and the session sink"""
+    record = {
+        "ts": time.time(),
+        "stage": stage,
+        "duration": round(duration, 4),
+        "model": model,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "retries": retries,
+        "cache": cache,
+        "error": error,
+    }
+    record.update(extra)
+    _logger.info(json.dumps(record))
+
+    labels = {"stage": stage}
+    metrics.inc("resume_ana_stage_calls_total", help_text="Stage executions",
+                cache=cache or "none", status="error" if error else "ok", **labels)
+    metrics.observe("resume_ana_stage_duration_seconds", duration,
+                    help_text="Stage wall-clock duration in seconds", **labels)
+    if retries:
+        metrics.inc("resume_ana_stage_retries_total", retries, help_text="Retried API calls", **labels)
+    if prompt_tokens:
+        metrics.inc("resume_ana_tokens_total", prompt_tokens, help_text="LLM tokens used",
+                    kind="prompt", model=model or "", **labels)
+    if completion_tokens:
+        metrics.inc("resume_ana_tokens_total", completion_tokens, help_text="LLM tokens used",
+                    kind="completion", model=model or "", **labels)
+
+    sink = _session_sink.get()
+    if sink is not None:
+        sink.append(record)
+    if PROMETHEUS_TEXTFILE:
+        _write_textfile()
+    return record
+
+
+def _write_textfile():
+    # Each writer renders into its own temp file, so concurrent stages cannot interleave their output
+    directory, name = os.path.split(os.path.abspath(PROMETHEUS_TEXTFILE))
+    tmp_path = None
+    try:
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory, prefix=f".{name}.",
+                                         suffix=".tmp", delete=False) as f:
+            tmp_path = f.name
+            f.write(metrics.render())
+        os.replace(tmp_path, PROMETHEUS_TEXTFILE)
+    except OSError:
+        if tmp_path is not None:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+
+
+@contextlib.contextmanager
+def timed_stage(stage, **fields):
+    """Time the enclosed block and record it; the yielded dict can be filled with extra fields
+
+    Exceptions are recorded with the stage and then re-raised. A stage that
+    starts inside another is recorded with that stage as its `parent`, so
+    totals can skip time already counted by the outer stage.
+    """
+    info = dict(fields)
+    parent = _current_stage.get()
+    token = _current_stage.set(stage)
+    start = time.perf_counter()
+    try:
+        yield info
+    except Exception as e:
+        info["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        try:
+            _current_stage.reset(token)
+        except ValueError:
+            # A streaming generator finished in a different context than it started in
+            pass
+        if parent is not None:
+            info.setdefault("parent", parent)
+        record_stage(stage, time.perf_counter() - start, **info)
+
+
+def usage_tokens(usage):
+    """Return (prompt_tokens, completion_tokens) from an OpenAI usage object or dict"""
+    if usage is None:
+        return None, None
+    if isinstance(usage, dict):
+        return usage.get("prompt_tokens"), usage.get("completion_tokens")
+    return getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None)
@@ -0,0 +1,211 @@
+"""Compile a job description once into a compact profile reused for every resume scored against it
+
+    python jd_profile.py job.txt          # print the profile as it is embedded in prompts
+    python jd_profile.py job.txt --json   # print the profile fields as JSON
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from instrumentation import metrics, timed_stage
+from keyword_matcher import count_skills, extract_jd_keywords, tokenize
+from prompt_compaction import clean_text, count_tokens
+
+# Set RESUME_ANA_JD_PROFILE=0 to embed the (compacted) job description in prompts instead of its profile
+USE_JD_PROFILE = os.environ.get("RESUME_ANA_JD_PROFILE", "1") != "0"
+# Token allowance for the profile text embedded in prompts
+PROFILE_TOKENS = int(os.environ.get("RESUME_ANA_JD_PROFILE_TOKENS", 400))
+# Compiled profiles kept in memory, least recently used evicted first
+PROFILE_CACHE_SIZE = int(os.environ.get("RESUME_ANA_JD_PROFILE_CACHE", 256))
+PROMPT_KEYWORDS = 15
+
+# Checked in order, so a "Senior Engineering Manager" is a manager rather than a senior engineer
+SENIORITY_LEVELS = [
+    ("director", r"director|vp|vice president|head of"),
+    ("manager", r"manager|engineering manager"),
+    ("principal", r"principal|distinguished"),
+    ("staff", r"staff"),
+    ("lead", r"lead|tech lead|team lead"),
+    ("senior", r"senior|sr"),
+    ("mid", r"mid|mid-level|intermediate"),
+    ("junior", r"junior|jr|entry level|entry-level|graduate|associate"),
+    ("intern", r"intern|internship|trainee"),
+]
+# Abbreviations only count before "degree", "in ..." or another degree ("BS/MS in"), so "100 ms" and
+# "MS Excel" are not read as degrees; they are case-sensitive, the spelled-out names are not
+_DEGREE_CONTEXT = r"\.?(?=(?:\s*(?:/|,|or|and)\s*[A-Z][\w.']*)*\s*(?i:degree|in)\b)"
+DEGREES = [
+    ("PhD", r"\b(?i:ph\.?\s?d\b|doctorate|doctoral degree)"),
+    ("Master's", r"\b(?i:master's|masters?\s+(?:degree|in)\b|master of)|\bMBA\b|"
+                 rf"\b(?:M\.?Sc?|M\.?Eng|M\.?Tech){_DEGREE_CONTEXT}"),
+    ("Bachelor's", r"\b(?i:bachelor'?s?\b|bachelor of|undergraduate degree)|"
+                   rf"\b(?:B\.?Sc?|B\.?A|B\.?Eng|B\.?Tech){_DEGREE_CONTEXT}"),
+]
+
+_PREFERRED_RE = re.compile(r"nice[ -]to[ -]have|preferred|bonus|a plus|desirable|good to have|would be great",
+                           re.IGNORECASE)
+# Headings of job-ad sections that say nothing about the candidate; their lines are left out
+_SKIP_RE = re.compile(r"about (us|the company|the team)|who we are|benefits|perks|what we offer|compensation|"
+                      r"salary|equal opportunity|diversity|how to apply|our values|why join", re.IGNORECASE)
+_HEADING_RE = re.compile(r"^[A-Za-z][A-Za-z /&'-]{2,40}:?$")
+_CLAUSE_RE = re.compile(r"[;.](?:\s|$)")
+_YEARS_RE = re.compile(r"(\d{1,2})\s*\+?\s*(?:-|to)?\s*(?:\d{1,2}\s*)?\+?\s*years?", re.IGNORECASE)
+_BULLET_RE = re.compile(r"^\s*[-•*·▪●◦–]\s*")
+_SENIORITY_RES = [(label, re.compile(rf"\b(?:{pattern})\b", re.IGNORECASE)) for label, pattern in SENIORITY_LEVELS]
+_DEGREE_RES = [(label, re.compile(pattern)) for label, pattern in DEGREES]
+
+
+def jd_key(job_description):
+    return hashlib.sha256(job_description.encode("utf-8")).hexdigest()
+
+
+def _seniority(heading):
+    """Level named in the title; the body is not used, since it mentions other roles ("report to the manager")"""
+    for label, pattern in _SENIORITY_RES:
+        if pattern.search(heading):
+            return label
+    return ""
+
+
+def _split_requirements(lines):
+    """Return (required_lines, preferred_lines), following "Nice to have:" style headings"""
+    required, preferred = [], []
+    in_preferred = skipping = False
+    for line in lines:
+        if _HEADING_RE.match(line) and len(line.split()) <= 6:
+            in_preferred = bool(_PREFERRED_RE.search(line))
+            skipping = bool(_SKIP_RE.search(line))
+            continue
+        if skipping:
+            continue
+        if in_preferred:
+            preferred.append(line)
+            continue
+        # "Expert Python; Scala is a plus" requires Python and prefers Scala
+        for clause in _CLAUSE_RE.split(line):
+            if clause.strip():
+                (preferred if _PREFERRED_RE.search(clause) else required).append(clause.strip())
+    return required, preferred
+
+
+def _skills(lines):
+    counts = count_skills(tokenize("\n".join(lines)))
+    return [skill for skill, _ in counts.most_common()]
+
+
+class JDProfile:
+    """The parts of a job description that scoring and advice prompts need"""
+
+    def __init__(self, job_description):
+        text = clean_text(job_description)
+        lines = [line for line in text.splitlines() if line.strip()]
+        first = lines[0] if lines else ""
+        self.key = jd_key(job_description)
+        self.title = first.rstrip(":") if len(first.split()) <= 8 and not _BULLET_RE.match(first) else ""
+        self.original_tokens = count_tokens(job_description)
+
+        required_lines, preferred_lines = _split_requirements(lines[1:] if self.title else lines)
+        self.required_skills = _skills(required_lines + [self.title])
+        self.preferred_skills = [s for s in _skills(preferred_lines) if s not in self.required_skills]
+        # Weighted over the requirements only, so company blurbs and benefits carry no weight
+        self.keywords = extract_jd_keywords("\n".join([self.title] + required_lines + preferred_lines))
+        self.seniority = _seniority(self.title or next((line for line in lines if _HEADING_RE.match(line)), ""))
+        years = [int(match) for line in required_lines for match in _YEARS_RE.findall(line)]
+        self.min_years = min(years) if years else None
+        self.education = [label for label, pattern in _DEGREE_RES if pattern.search(text)]
+        self.requirements = [_BULLET_RE.sub("", line) for line in required_lines]
+        self.prompt_text = self._render()
+        # A job description shorter than its profile is embedded as it is
+        if count_tokens(self.prompt_text) >= count_tokens(text):
+            self.prompt_text = text
+        self.tokens = count_tokens(self.prompt_text)
+
+    def _render(self):
+        """Format the profile for prompts, keeping requirement lines only while within PROFILE_TOKENS"""
+        lines = []
+        if self.title:
+            lines.append(f"Role: {self.title}")
+        level = [part for part in (self.seniority, self.min_years and f"{self.min_years}+ years of experience") if part]
+        if level:
+            lines.append(f"Level: {', '.join(level)}")
+        if self.education:
+            lines.append(f"Education: {' or '.join(self.education)} degree")
+        if self.required_skills:
+            lines.append(f"Required skills: {', '.join(self.required_skills)}")
+        if self.preferred_skills:
+            lines.append(f"Preferred skills: {', '.join(self.preferred_skills)}")
+        terms = [term for term in self.keywords if term not in self.required_skills + self.preferred_skills]
+        if terms:
+            lines.append(f"Other keywords: {', '.join(terms[:PROMPT_KEYWORDS])}")
+        if self.requirements:
+            lines.append("Key requirements:")
+            used = count_tokens("\n".join(lines))
+            for requirement in self.requirements:
+                line = f"- {requirement}"
+                used += count_tokens(line)
+                if used > PROFILE_TOKENS:
+                    break
+                lines.append(line)
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            "title": self.title,
+            "seniority": self.seniority,
+            "min_years": self.min_years,
+            "education": self.education,
+            "required_skills": self.required_skills,
+            "preferred_skills": self.preferred_skills,
+            "keywords": {term: round(weight, 3) for term, weight in self.keywords.items()},
+            "requirements": self.requirements,
+            "tokens": self.tokens,
+            "original_tokens": self.original_tokens,
+        }
+
+
+_profiles = OrderedDict()
+_profiles_lock = threading.Lock()
+
+
+def get_jd_profile(job_description):
+    """Return the compiled profile of a job description, compiling it on first use"""
+    key = jd_key(job_description)
+    with _profiles_lock:
+        profile = _profiles.get(key)
+        if profile is not None:
+            _profiles.move_to_end(key)
+    metrics.inc("resume_ana_jd_profile_total", help_text="Job description profile lookups",
+                cache="hit" if profile is not None else "miss")
+    if profile is not None:
+        return profile
+    with timed_stage("jd_profile", cache="miss") as info:
+        profile = JDProfile(job_description)
+        info.update(original_tokens=profile.original_tokens, tokens=profile.tokens)
+    with _profiles_lock:
+        _profiles[key] = profile
+        while len(_profiles) > PROFILE_CACHE_SIZE:
+            _profiles.popitem(last=False)
+    return profile
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("job_description", help="Text file with the job description")
+    parser.add_argument("--json", action="store_true", help="Print the profile fields as JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.job_description, encoding="utf-8") as f:
+        profile = get_jd_profile(f.read())
+    if args.json:
+        print(json.dumps(profile.to_dict(), indent=2))
+    else:
+        print(profile.prompt_text)
+        print(f"\n{profile.original_tokens} -> {profile.tokens} tokens")
+
+
+if __name__ == "__main__":
+    main()
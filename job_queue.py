@@ -0,0 +1,448 @@
+"""Durable SQLite job queue for bulk, resumable resume processing
+
+    python job_queue.py enqueue job_description.txt resumes/*.pdf --operation report
+    python job_queue.py work --workers 4
+    python job_queue.py status
+    python job_queue.py export results.jsonl
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import socket
+import sqlite3
+import sys
+import time
+import uuid
+
+from candidate_store import record_analysis
+from extraction_cache import DEFAULT_CACHE_DIR
+from jd_profile import get_jd_profile
+from keyword_matcher import match_keywords
+from report_pipeline import REPORT_STAGES, Stage, run_dag
+from resume_core import configure_client, extract_text_from_pdf
+
+DEFAULT_JOB_DB = os.environ.get("RESUME_ANA_JOB_DB", os.path.join(DEFAULT_CACHE_DIR, "jobs.sqlite3"))
+MAX_ATTEMPTS = int(os.environ.get("RESUME_ANA_JOB_MAX_ATTEMPTS", 5))
+RETRY_BASE = float(os.environ.get("RESUME_ANA_JOB_RETRY_BASE", 5))
+RETRY_CAP = float(os.environ.get("RESUME_ANA_JOB_RETRY_CAP", 300))
+# A running job whose worker has not checkpointed for this long is assumed dead and reclaimed
+LEASE_SECONDS = float(os.environ.get("RESUME_ANA_JOB_LEASE", 300))
+POLL_INTERVAL = 1.0
+
+# Report stages each operation runs; a job checkpoints after every one of them
+OPERATIONS = {
+    "parse": ("parse",),
+    "ats": ("ats",),
+    "report": tuple(stage.name for stage in REPORT_STAGES),
+}
+
+
+def content_hash(content):
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha256(content).hexdigest()
+
+
+class LeaseLost(Exception):
+    """The worker's lease on a job expired and another worker claimed it"""
+
+
+class JobQueue:
+    """Jobs, their stage checkpoints and input documents in one SQLite file
+
+    A job is identified by (resume hash, job description hash, operation),
+    so enqueueing the same work twice is a no-op. Workers claim jobs with a
+    lease that each checkpoint renews; a job whose lease runs out is picked
+    up again by another worker and continues from its last checkpoint. Each
+    claim gets a fresh lease token, and a worker that has lost its lease can
+    no longer complete, fail or release the job.
+    """
+
+    def __init__(self, db_path=DEFAULT_JOB_DB):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS documents (hash TEXT PRIMARY KEY, content BLOB NOT NULL)")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    key TEXT PRIMARY KEY,
+                    operation TEXT NOT NULL,
+                    label TEXT,
+                    resume_hash TEXT NOT NULL,
+                    resume_is_pdf INTEGER NOT NULL,
+                    jd_hash TEXT NOT NULL,
+                    use_cache INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    worker TEXT,
+                    lease_token TEXT,
+                    lease_until REAL,
+                    error TEXT,
+                    result TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+                """
+            )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "lease_token" not in columns:
+                # Queues created before lease tokens existed
+                conn.execute("ALTER TABLE jobs ADD COLUMN lease_token TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_runnable ON jobs (status, next_attempt_at)")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    job_key TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    output TEXT NOT NULL,
+                    worker TEXT,
+                    duration REAL,
+                    completed_at REAL NOT NULL,
+                    PRIMARY KEY (job_key, stage)
+                )
+                """
+            )
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # Short-lived connections; worker processes and DAG threads each open their own
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_job_key(resume_hash, jd_hash, operation):
+        return hashlib.sha256(f"{resume_hash}:{jd_hash}:{operation}".encode("utf-8")).hexdigest()
+
+    def enqueue(self, resume, job_description, operation="report", label=None, use_cache=True):
+        """Queue one resume (PDF bytes or text); returns (job key, whether it was new)"""
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation {operation!r}, expected one of {sorted(OPERATIONS)}")
+        resume_is_pdf = isinstance(resume, (bytes, bytearray))
+        resume_content = bytes(resume) if resume_is_pdf else resume.encode("utf-8")
+        resume_hash = content_hash(resume_content)
+        jd_hash = content_hash(job_description)
+        key = self.make_job_key(resume_hash, jd_hash, operation)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT OR IGNORE INTO documents (hash, content) VALUES (?, ?)", (resume_hash, resume_content))
+            conn.execute("INSERT OR IGNORE INTO documents (hash, content) VALUES (?, ?)",
+                         (jd_hash, job_description.encode("utf-8")))
+            cursor = conn.execute(
+                """
+                INSERT OR IGNORE INTO jobs (key, operation, label, resume_hash, resume_is_pdf, jd_hash, use_cache,
+                                            status, next_attempt_at, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 'queued', ?, ?)
+                """,
+                (key, operation, label, resume_hash, int(resume_is_pdf), jd_hash, int(use_cache), now, now),
+            )
+        return key, cursor.rowcount == 1
+
+    def claim(self, worker):
+        """Take the oldest runnable job (queued and due, or with an expired lease), or None
+
+        The returned row carries the new `worker` and `lease_token`, which
+        the other job updates must be given.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            # IMMEDIATE takes the write lock up front so two workers cannot claim the same row
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                """
+                SELECT * FROM jobs
+                WHERE (status = 'queued' AND next_attempt_at <= ?) OR (status = 'running' AND lease_until < ?)
+                ORDER BY next_attempt_at LIMIT 1
+                """,
+                (now, now),
+            ).fetchone()
+            if row is None:
+                return None
+            lease_token = uuid.uuid4().hex
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, lease_token = ?, lease_until = ?, started_at = ? "
+                "WHERE key = ?",
+                (worker, lease_token, now + LEASE_SECONDS, now, row["key"]),
+            )
+        return dict(row, worker=worker, lease_token=lease_token)
+
+    def document(self, content_hash):
+        with self._connect() as conn:
+            return conn.execute("SELECT content FROM documents WHERE hash = ?", (content_hash,)).fetchone()[0]
+
+    def checkpoints(self, key):
+        """Outputs of the stages this job has already completed"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT stage, output FROM checkpoints WHERE job_key = ?", (key,)).fetchall()
+        return {row["stage"]: row["output"] for row in rows}
+
+    def save_checkpoint(self, key, worker, lease_token, stage, output, duration):
+        """Record a finished stage and renew the job's lease, if this worker still holds it"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (job_key, stage, output, worker, duration, completed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, stage, output, worker, duration, now),
+            )
+            conn.execute("UPDATE jobs SET lease_until = ? WHERE key = ? AND worker = ? AND lease_token = ?",
+                         (now + LEASE_SECONDS, key, worker, lease_token))
+
+    @staticmethod
+    def _update_leased(conn, sql, params, key, worker, lease_token):
+        """Run an UPDATE on a job still leased to this worker, raising LeaseLost if it is not"""
+        cursor = conn.execute(f"{sql} WHERE key = ? AND status = 'running' AND worker = ? AND lease_token = ?",
+                              (*params, key, worker, lease_token))
+        if cursor.rowcount == 0:
+            raise LeaseLost(f"Job {key[:12]} is no longer leased to {worker}")
+
+    def complete(self, key, worker, lease_token, result):
+        with self._connect() as conn:
+            self._update_leased(
+                conn,
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_until = NULL, finished_at = ?",
+                (json.dumps(result), time.time()), key, worker, lease_token,
+            )
+
+    def fail(self, key, worker, lease_token, error, max_attempts=MAX_ATTEMPTS):
+        """Schedule a retry with jittered exponential backoff, or mark the job failed"""
+        with self._connect() as conn:
+            attempts = conn.execute("SELECT attempts FROM jobs WHERE key = ?", (key,)).fetchone()[0] + 1
+            if attempts >= max_attempts:
+                self._update_leased(
+                    conn,
+                    "UPDATE jobs SET status = 'failed', attempts = ?, error = ?, lease_until = NULL, finished_at = ?",
+                    (attempts, error, time.time()), key, worker, lease_token,
+                )
+                return None
+            delay = min(RETRY_CAP, RETRY_BASE * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+            self._update_leased(
+                conn,
+                "UPDATE jobs SET status = 'queued', attempts = ?, error = ?, lease_until = NULL, next_attempt_at = ?",
+                (attempts, error, time.time() + delay), key, worker, lease_token,
+            )
+            return delay
+
+    def release(self, key, worker, lease_token):
+        """Hand a job back without counting an attempt, e.g. when a worker is interrupted"""
+        with self._connect() as conn:
+            self._update_leased(conn, "UPDATE jobs SET status = 'queued', lease_until = NULL", (),
+                                key, worker, lease_token)
+
+    def requeue(self, statuses=("failed",)):
+        """Put jobs in the given states back in the queue; returns how many were requeued
+
+        Requeueing 'running' jobs is only safe when no worker is alive.
+        """
+        placeholders = ",".join("?" * len(statuses))
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET status = 'queued', attempts = 0, lease_until = NULL, next_attempt_at = ? "
+                f"WHERE status IN ({placeholders})",
+                (time.time(), *statuses),
+            )
+        return cursor.rowcount
+
+    def has_pending(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM jobs WHERE status IN ('queued', 'running') LIMIT 1").fetchone() is not None
+
+    def stats(self):
+        """Job counts by status and completed jobs per minute for each worker"""
+        with self._connect() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            rows = conn.execute(
+                "SELECT worker, COUNT(*), MIN(started_at), MAX(finished_at) FROM jobs "
+                "WHERE status = 'done' AND worker IS NOT NULL GROUP BY worker ORDER BY worker"
+            ).fetchall()
+        workers = []
+        for worker, done, first_start, last_finish in rows:
+            minutes = max((last_finish - first_start) / 60, 1e-9)
+            workers.append({"worker": worker, "done": done, "jobs_per_minute": round(done / minutes, 2)})
+        return {"counts": counts, "workers": workers}
+
+    def results(self):
+        """Yield (label, operation, result) for every finished job"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT label, operation, result FROM jobs WHERE status = 'done' ORDER BY created_at"
+            ).fetchall()
+        for row in rows:
+            yield row["label"], row["operation"], json.loads(row["result"])
+
+
+def process_job(queue, job):
+    """Run a job's stages, skipping those checkpointed by earlier attempts"""
+    key, worker, lease_token = job["key"], job["worker"], job["lease_token"]
+    done = queue.checkpoints(key)
+    job_description = queue.document(job["jd_hash"]).decode("utf-8")
+    if "extract" in done:
+        resume_text = done["extract"]
+    elif job["resume_is_pdf"]:
+        start = time.perf_counter()
+        resume_text = extract_text_from_pdf(queue.document(job["resume_hash"]))
+        queue.save_checkpoint(key, worker, lease_token, "extract", resume_text, time.perf_counter() - start)
+    else:
+        resume_text = queue.document(job["resume_hash"]).decode("utf-8")
+
+    def checkpointed(stage):
+        def run(inputs, deps):
+            start = time.perf_counter()
+            output = stage.func(inputs, deps)
+            queue.save_checkpoint(key, worker, lease_token, stage.name, output, time.perf_counter() - start)
+            return output
+        return run
+
+    wanted = OPERATIONS[job["operation"]]
+    stages = []
+    for stage in REPORT_STAGES:
+        if stage.name not in wanted:
+            continue
+        if stage.name in done:
+            stages.append(Stage(stage.name, lambda inputs, deps, output=done[stage.name]: output, stage.depends_on))
+        else:
+            stages.append(Stage(stage.name, checkpointed(stage), stage.depends_on))
+    inputs = {"resume_text": resume_text, "job_description": job_description, "use_cache": bool(job["use_cache"])}
+    run = run_dag(stages, inputs)
+    if run.errors:
+        raise RuntimeError("; ".join(f"{name}: {error}" for name, error in run.errors.items()))
+    result = dict(run.results)
+    if job["operation"] != "parse":
+        result["keyword_match"] = match_keywords(resume_text, job_description, get_jd_profile(job_description).keywords)
+    record_analysis(resume_text, job_description if job["operation"] != "parse" else None,
+                    parsed=result.get("parse"), ats=result.get("ats"), keyword_match=result.get("keyword_match"),
+                    source="job_queue")
+    return result
+
+
+def work(db_path=DEFAULT_JOB_DB, drain=True, max_jobs=None):
+    """Process jobs until the queue is empty (or forever if drain is False)"""
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    queue = JobQueue(db_path)
+    configure_client()
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        job = queue.claim(worker)
+        if job is None:
+            if drain and not queue.has_pending():
+                break
+            time.sleep(POLL_INTERVAL)
+            continue
+        start = time.perf_counter()
+        lease = (job["key"], worker, job["lease_token"])
+        name = job["label"] or job["key"][:12]
+        try:
+            try:
+                result = process_job(queue, job)
+            except KeyboardInterrupt:
+                with contextlib.suppress(LeaseLost):
+                    queue.release(*lease)
+                raise
+            except Exception as e:
+                delay = queue.fail(*lease, f"{type(e).__name__}: {e}")
+                retry = f"retry in {delay:.1f}s" if delay is not None else "giving up"
+                print(f"❌ [{worker}] {name}: {e} ({retry})", file=sys.stderr)
+            else:
+                queue.complete(*lease, result)
+                print(f"✅ [{worker}] {name} {job['operation']} "
+                      f"in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        except LeaseLost:
+            # Another worker took the job over after this lease ran out; its outcome stands
+            print(f"⚠️ [{worker}] {name}: lease expired, result discarded", file=sys.stderr)
+        processed += 1
+    return processed
+
+
+def run_workers(db_path=DEFAULT_JOB_DB, workers=2, drain=True):
+    """Start worker processes and wait for them to finish"""
+    if workers <= 1:
+        work(db_path, drain)
+        return
+    # Not daemonic: workers may start their own PDF extraction pool
+    processes = [multiprocessing.Process(target=work, args=(db_path, drain)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
+        raise
+
+
+def print_stats(queue):
+    stats = queue.stats()
+    counts = stats["counts"]
+    print("Jobs: " + ", ".join(f"{counts.get(status, 0)} {status}" for status in ("queued", "running", "done", "failed")))
+    for row in stats["workers"]:
+        print(f"  {row['worker']}: {row['done']} done, {row['jobs_per_minute']} jobs/min")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DEFAULT_JOB_DB, help="Path of the job database")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="Queue resumes against a job description")
+    enqueue.add_argument("job_description", help="Path to a text file with the job description")
+    enqueue.add_argument("resumes", nargs="+", help="Resume PDF (or .txt) files")
+    enqueue.add_argument("--operation", choices=sorted(OPERATIONS), default="report")
+    enqueue.add_argument("--no-cache", action="store_true", help="Bypass the LLM response cache")
+
+    worker = commands.add_parser("work", help="Process queued jobs")
+    worker.add_argument("--workers", type=int, default=2, help="Worker processes")
+    worker.add_argument("--follow", action="store_true", help="Keep polling for new jobs instead of exiting")
+
+    commands.add_parser("status", help="Show job counts and per-worker throughput")
+    export = commands.add_parser("export", help="Write finished results as JSON lines")
+    export.add_argument("output")
+    requeue = commands.add_parser("requeue", help="Put failed jobs back in the queue")
+    requeue.add_argument("--running", action="store_true",
+                         help="Also requeue jobs marked running (only when no worker is alive)")
+    args = parser.parse_args(argv)
+
+    queue = JobQueue(args.db)
+    if args.command == "enqueue":
+        with open(args.job_description, encoding="utf-8") as f:
+            job_description = f.read()
+        added = 0
+        for path in args.resumes:
+            if path.lower().endswith(".pdf"):
+                with open(path, "rb") as f:
+                    resume = f.read()
+            else:
+                with open(path, encoding="utf-8") as f:
+                    resume = f.read()
+            _, new = queue.enqueue(resume, job_description, args.operation, label=os.path.basename(path),
+                                   use_cache=not args.no_cache)
+            added += new
+        print(f"Queued {added} new jobs ({len(args.resumes) - added} already in the queue)")
+    elif args.command == "work":
+        run_workers(args.db, args.workers, drain=not args.follow)
+        print_stats(queue)
+    elif args.command == "status":
+        print_stats(queue)
+    elif args.command == "export":
+        with open(args.output, "w", encoding="utf-8") as f:
+            for label, operation, result in queue.results():
+                f.write(json.dumps({"label": label, "operation": operation, "result": result}) + "\n")
+    elif args.command == "requeue":
+        statuses = ("failed", "running") if args.running else ("failed",)
+        print(f"Requeued {queue.requeue(statuses)} jobs")
+
+
+if __name__ == "__main__":
+    main()
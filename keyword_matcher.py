@@ -0,0 +1,292 @@
+import re
+from collections import Counter
+
+# Canonical skill name -> alternative spellings found in resumes and job ads
+SKILL_TAXONOMY = {
+    "Python": ["python", "python3"],
+    "Java": ["java"],
+    "JavaScript": ["javascript", "js", "ecmascript"],
+    "TypeScript": ["typescript", "ts"],
+    "C++": ["c++", "cpp"],
+    "C#": ["c#", "csharp"],
+    "Go": ["golang"],
+    "Rust": ["rust"],
+    "Ruby": ["ruby"],
+    "PHP": ["php"],
+    "Kotlin": ["kotlin"],
+    "Swift": ["swift"],
+    "Scala": ["scala"],
+    "R": ["r programming"],
+    "SQL": ["sql"],
+    "NoSQL": ["nosql"],
+    "PostgreSQL": ["postgresql", "postgres"],
+    "MySQL": ["mysql"],
+    "MongoDB": ["mongodb", "mongo"],
+    "Redis": ["redis"],
+    "Elasticsearch": ["elasticsearch", "elastic search"],
+    "HTML": ["html", "html5"],
+    "CSS": ["css", "css3"],
+    "React": ["react", "react.js", "reactjs"],
+    "Angular": ["angular", "angularjs"],
+    "Vue.js": ["vue", "vue.js", "vuejs"],
+    "Node.js": ["node", "node.js", "nodejs"],
+    "Django": ["django"],
+    "Flask": ["flask"],
+    "FastAPI": ["fastapi"],
+    "Spring Boot": ["spring boot", "springboot"],
+    ".NET": [".net", "dotnet", "asp.net"],
+    "REST APIs": ["rest api", "rest apis", "restful"],
+    "GraphQL": ["graphql"],
+    "Microservices": ["microservices", "microservice"],
+    "AWS": ["aws", "amazon web services"],
+    "Azure": ["azure", "microsoft azure"],
+    "GCP": ["gcp", "google cloud", "google cloud platform"],
+    "Docker": ["docker"],
+    "Kubernetes": ["kubernetes", "k8s"],
+    "Terraform": ["terraform"],
+    "Ansible": ["ansible"],
+    "Jenkins": ["jenkins"],
+    "CI/CD": ["ci/cd", "cicd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "Git": ["git", "github", "gitlab"],
+    "Linux": ["linux", "unix"],
+    "Bash": ["bash", "shell scripting"],
+    "Kafka": ["kafka", "apache kafka"],
+    "Spark": ["spark", "apache spark", "pyspark"],
+    "Hadoop": ["hadoop"],
+    "Airflow": ["airflow", "apache airflow"],
+    "ETL": ["etl", "elt"],
+    "Data Warehousing": ["data warehouse", "data warehousing", "snowflake", "redshift", "bigquery"],
+    "Tableau": ["tableau"],
+    "Power BI": ["power bi", "powerbi"],
+    "Excel": ["excel", "microsoft excel"],
+    "Pandas": ["pandas"],
+    "NumPy": ["numpy"],
+    "scikit-learn": ["scikit-learn", "sklearn"],
+    "TensorFlow": ["tensorflow"],
+    "PyTorch": ["pytorch"],
+    "Machine Learning": ["machine learning", "ml"],
+    "Deep Learning": ["deep learning"],
+    "NLP": ["nlp", "natural language processing"],
+    "Computer Vision": ["computer vision"],
+    "LLMs": ["llm", "llms", "large language models", "generative ai", "genai"],
+    "Statistics": ["statistics", "statistical analysis"],
+    "Data Analysis": ["data analysis", "data analytics"],
+    "Data Visualization": ["data visualization"],
+    "Unit Testing": ["unit testing", "unit tests", "pytest", "junit"],
+    "Test Automation": ["test automation", "selenium", "cypress"],
+    "Agile": ["agile", "scrum", "kanban"],
+    "JIRA": ["jira"],
+    "System Design": ["system design", "distributed systems"],
+    "Security": ["security", "cybersecurity", "owasp"],
+    "Networking": ["networking", "tcp/ip"],
+    "Project Management": ["project management", "pmp"],
+    "Product Management": ["product management"],
+    "Communication": ["communication", "communication skills"],
+    "Leadership": ["leadership", "team lead", "mentoring"],
+    "Problem Solving": ["problem solving", "problem-solving"],
+    "Collaboration": ["collaboration", "cross-functional", "teamwork"],
+    "Stakeholder Management": ["stakeholder management", "stakeholders"],
+    "Figma": ["figma"],
+    "UI/UX": ["ui/ux", "ux", "user experience", "ui design"],
+}
+
+STOPWORDS = frozenset("""
+a about above across after all also an and any are as at be been being both but by can could do does
+for from has have having how if in into is it its may more most must not of on or other our out over
+per such than that the their them then there these they this those through to under up upon us use
+using via was we were what when where which while who will with within without would you your
+""".split())
+
+# Words that appear in almost every job ad carry little signal. Treat them as
+# if they had a high document frequency when weighting.
+COMMON_JOB_TERMS = frozenset("""
+ability able candidate candidates company role roles job work working team teams strong excellent good
+experience experienced years year skills skill knowledge requirements required preferred plus
+responsibilities responsible including include includes ensure environment opportunity position
+looking join new well related degree bachelor bachelors master masters field understanding etc
+build building develop developing design designing help set support day based across make
+""".split())
+
+BM25_K1 = 1.2
+TAXONOMY_IDF = 1.5
+DEFAULT_IDF = 1.0
+COMMON_TERM_IDF = 0.2
+MAX_JD_NGRAMS = 25
+
+# "/" splits tokens, so "Docker/Kubernetes" is two skills; slashed aliases such as
+# "ci/cd" are indexed with the same tokenizer and match as two-token phrases
+_TOKEN_RE = re.compile(r"[a-z0-9+#.][a-z0-9+#.-]*")
+
+
+def tokenize(text):
+    """Lowercase text and split it into tokens, keeping symbols used in skill names (c++, c#, node.js)
+
+    >>> tokenize("Docker/Kubernetes, CI/CD")
+    ['docker', 'kubernetes', 'ci', 'cd']
+    """
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        token = token.strip(".-")
+        if token:
+            tokens.append(token)
+    return tokens
+
+
+class PhraseTrie:
+    """Token-level trie that finds every occurrence of a set of multi-word phrases"""
+
+    def __init__(self):
+        self.root = {}
+        self.max_depth = 0
+
+    def add(self, phrase, label):
+        node = self.root
+        tokens = tokenize(phrase)
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node[None] = label
+        self.max_depth = max(self.max_depth, len(tokens))
+
+    def find(self, tokens):
+        """Yield (start, end, label) for leftmost-longest, non-overlapping matches"""
+        start = 0
+        while start < len(tokens):
+            node = self.root
+            match = None
+            for offset, token in enumerate(tokens[start:start + self.max_depth]):
+                node = node.get(token)
+                if node is None:
+                    break
+                if None in node:
+                    match = (start, start + offset + 1, node[None])
+            if match:
+                yield match
+                start = match[1]
+            else:
+                start += 1
+
+    def count_matches(self, tokens):
+        """Return a Counter of label -> number of occurrences in the token list"""
+        return Counter(label for _, _, label in self.find(tokens))
+
+
+def _build_taxonomy_trie():
+    trie = PhraseTrie()
+    # Only aliases are indexed so ambiguous canonical names ("Go", "R") never match plain words
+    for skill, aliases in SKILL_TAXONOMY.items():
+        for alias in aliases:
+            trie.add(alias, skill)
+    return trie
+
+
+_taxonomy_trie = _build_taxonomy_trie()
+
+
+def count_skills(tokens):
+    """Return a Counter of taxonomy skill -> mentions in a token list
+
+    >>> sorted(count_skills(tokenize("Docker/Kubernetes and AWS/GCP, CI/CD, TCP/IP")))
+    ['AWS', 'CI/CD', 'Docker', 'GCP', 'Kubernetes', 'Networking']
+    """
+    return _taxonomy_trie.count_matches(tokens)
+
+
+def _is_content_token(token):
+    return (token is not None and token not in STOPWORDS
+            and len(token) > 1 and any(c.isalpha() for c in token))
+
+
+def jd_ngrams(tokens, limit=MAX_JD_NGRAMS):
+    """Return the most frequent non-stopword unigrams and bigrams in a job description
+
+    Tokens set to None (e.g. already matched by the taxonomy) break n-grams.
+    """
+    counts = Counter()
+    for i, token in enumerate(tokens):
+        if not _is_content_token(token):
+            continue
+        if token not in COMMON_JOB_TERMS:
+            counts[token] += 1
+        if i + 1 < len(tokens) and _is_content_token(tokens[i + 1]):
+            if not (token in COMMON_JOB_TERMS and tokens[i + 1] in COMMON_JOB_TERMS):
+                counts[f"{token} {tokens[i + 1]}"] += 1
+    # Bigrams seen once are mostly noise; keep them only when repeated
+    bigrams = {term: n for term, n in counts.items() if " " in term and n > 1}
+    covered = {word for bigram in bigrams for word in bigram.split()}
+    candidates = list(bigrams.items()) + [
+        (term, n) for term, n in counts.items() if " " not in term and term not in covered
+    ]
+    candidates.sort(key=lambda item: (-item[1], item[0]))
+    return dict(candidates[:limit])
+
+
+def _bm25_tf(tf):
+    return tf * (BM25_K1 + 1) / (tf + BM25_K1)
+
+
+def _prior_idf(term):
+    words = term.split()
+    if all(word in COMMON_JOB_TERMS for word in words):
+        return COMMON_TERM_IDF
+    return DEFAULT_IDF
+
+
+def extract_jd_keywords(job_description):
+    """Return {keyword: weight} for a job description, strongest first
+
+    Weights follow BM25's saturated term frequency scaled by a prior IDF:
+    taxonomy skills count most, boilerplate job-ad vocabulary least.
+    """
+    tokens = tokenize(job_description)
+    weights = {}
+    skill_counts = Counter()
+    for start, end, skill in _taxonomy_trie.find(tokens):
+        skill_counts[skill] += 1
+        # Mask matched spans so n-grams do not repeat a taxonomy skill
+        tokens[start:end] = [None] * (end - start)
+    for skill, tf in skill_counts.items():
+        weights[skill] = _bm25_tf(tf) * TAXONOMY_IDF
+
+    for term, tf in jd_ngrams(tokens).items():
+        weights[term] = _bm25_tf(tf) * _prior_idf(term)
+
+    return dict(sorted(weights.items(), key=lambda item: (-item[1], item[0])))
+
+
+def match_keywords(resume_text, job_description, jd_keywords=None):
+    """Match a resume against job description keywords without calling an LLM
+
+    Returns a dict using the same keys as the LLM ATS analysis for the
+    overlapping fields: ats_score, matched_keywords and missing_keywords.
+    Pass precomputed `jd_keywords` when scoring many resumes against one JD.
+    """
+    if jd_keywords is None:
+        jd_keywords = extract_jd_keywords(job_description)
+
+    resume_tokens = tokenize(resume_text)
+    resume_skills = count_skills(resume_tokens)
+
+    ngram_trie = PhraseTrie()
+    for keyword in jd_keywords:
+        if keyword not in SKILL_TAXONOMY:
+            ngram_trie.add(keyword, keyword)
+    resume_ngrams = ngram_trie.count_matches(resume_tokens)
+
+    matched, missing = [], []
+    matched_weight = 0.0
+    for keyword, weight in jd_keywords.items():
+        if resume_skills.get(keyword) or resume_ngrams.get(keyword):
+            matched.append(keyword)
+            matched_weight += weight
+        else:
+            missing.append(keyword)
+
+    total_weight = sum(jd_keywords.values())
+    score = round(100 * matched_weight / total_weight) if total_weight else 0
+    return {
+        "ats_score": score,
+        "matched_keywords": matched,
+        "missing_keywords": missing,
+        "keyword_weights": {k: round(w, 3) for k, w in jd_keywords.items()},
+    }
+
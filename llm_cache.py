@@ -0,0 +1,143 @@
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from extraction_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_TTL_SECONDS = int(os.environ.get("RESUME_ANA_LLM_CACHE_TTL", 7 * 24 * 3600))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("RESUME_ANA_LLM_CACHE_MAX_ENTRIES", 5000))
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace so formatting-only differences share a cache entry"""
+    return " ".join(prompt.split())
+
+
+class ResponseCache:
+    """SQLite-backed cache of LLM completions with TTL and LRU eviction.
+
+    Entries are keyed by (model, normalized prompt, temperature). Hit and miss
+    counters are kept per process for display in the UI. If the database
+    cannot be created every lookup misses and nothing is stored.
+    """
+
+    def __init__(self, db_path=None, ttl=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path or os.path.join(DEFAULT_CACHE_DIR, "llm_responses.sqlite3")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        try:
+            if db_path is None:
+                os.makedirs(DEFAULT_CACHE_DIR, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS responses (
+                        key TEXT PRIMARY KEY,
+                        model TEXT NOT NULL,
+                        temperature REAL NOT NULL,
+                        response TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        accessed_at REAL NOT NULL
+                    )
+                    """
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+            self.enabled = True
+        except (OSError, sqlite3.Error):
+            # An unwritable cache location means running uncached, not failing at import
+            self.enabled = False
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # One short-lived connection per operation keeps this safe to share
+        # across Streamlit session threads.
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(model, prompt, temperature):
+        """Build the cache key for a completion request"""
+        payload = json.dumps([model, normalize_prompt(prompt), round(float(temperature), 4)])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, model, prompt, temperature):
+        """Return the cached response, or None on a miss or expired entry"""
+        if not self.enabled:
+            self._count(False)
+            return None
+        key = self.make_key(model, prompt, temperature)
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._count(False)
+                return None
+            response, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._count(False)
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        self._count(True)
+        return response
+
+    def put(self, model, prompt, temperature, response):
+        """Store a response and evict the least recently used entries if needed"""
+        if not self.enabled:
+            return
+        key = self.make_key(model, prompt, temperature)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, float(temperature), response, now, now),
+            )
+            if self.max_entries:
+                conn.execute(
+                    """
+                    DELETE FROM responses WHERE key IN (
+                        SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (self.max_entries,),
+                )
+
+    def clear(self):
+        """Delete every cached response"""
+        if not self.enabled:
+            return
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        """Return hit/miss counters and the number of stored entries"""
+        entries = 0
+        if self.enabled:
+            with self._connect() as conn:
+                (entries,) = conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries,
+        }
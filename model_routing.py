@@ -0,0 +1,225 @@
+"""Per-task model routing with an optional fast-model-first cascade
+
+    python model_routing.py routes    # the model and temperature each task uses
+    python model_routing.py stats     # calls, latency, tokens and escalation rate per task
+"""
+import argparse
+import json
+import os
+import statistics
+from collections import defaultdict
+
+from structured_output import parse_json_response
+
+DEFAULT_MODEL = "llama3-8b-8192"
+# First model tried for every task in cascade mode
+FAST_MODEL = os.environ.get("RESUME_ANA_FAST_MODEL", DEFAULT_MODEL)
+# Where cascade answers that fail validation go when a task's own model is the fast model
+LARGE_MODEL = os.environ.get("RESUME_ANA_LARGE_MODEL", "llama3-70b-8192")
+# "fixed" answers each task with its own model; "cascade" tries FAST_MODEL first
+ROUTING_MODE = os.environ.get("RESUME_ANA_ROUTING", "fixed")
+# A model ATS score this far from the local keyword score counts as low confidence
+ATS_DISAGREEMENT = float(os.environ.get("RESUME_ANA_ATS_DISAGREEMENT", 60))
+MIN_TEXT_CHARS = 200
+
+# task -> (default temperature, JSON mode)
+TASKS = {
+    "parse": (0.2, True),
+    "parse_section": (0.2, True),
+    "ats": (0.3, True),
+    "improvements": (0.4, False),
+    "skills": (0.3, False),
+    "roadmap": (0.3, False),
+}
+
+
+def _json_object(text):
+    try:
+        data = parse_json_response(text)
+    except json.JSONDecodeError as e:
+        return None, f"invalid JSON: {e.msg}"
+    if not isinstance(data, dict):
+        return None, "reply is not a JSON object"
+    return data, None
+
+
+def validate_parse(text, context=None):
+    """Return why a parser reply is unusable, or None if it looks complete"""
+    data, problem = _json_object(text)
+    if problem:
+        return problem
+    missing = [key for key in ("full_name", "skills", "work_experience", "education") if key not in data]
+    if missing:
+        return f"missing {', '.join(missing)}"
+    if not (data.get("skills") or data.get("work_experience") or data.get("education")):
+        return "no skills, experience or education extracted"
+    return None
+
+
+def validate_section(text, context=None):
+    """Return why a chunked-parse reply is unusable, or None
+
+    `context["field"]` names the part of the parser schema the chunk fills.
+    """
+    data, problem = _json_object(text)
+    if problem:
+        return problem
+    field = (context or {}).get("field")
+    key = {"contact": "full_name", "general": "work_experience"}.get(field, field)
+    if key and key not in data:
+        return f"missing {key}"
+    return None
+
+
+def validate_ats(text, context=None):
+    """Return why an ATS reply is unusable or low confidence, or None
+
+    With the resume and job description in `context`, a score far from the
+    deterministic keyword score is treated as low confidence.
+    """
+    data, problem = _json_object(text)
+    if problem:
+        return problem
+    score = data.get("ats_score")
+    if isinstance(score, bool) or not isinstance(score, (int, float)) or not 0 <= score <= 100:
+        return f"ats_score missing or out of range: {score!r}"
+    if not data.get("matched_keywords") and not data.get("missing_keywords"):
+        return "no matched or missing keywords"
+    if context and context.get("resume_text") and context.get("job_description"):
+        from jd_profile import get_jd_profile
+        from keyword_matcher import match_keywords
+        job_description = context["job_description"]
+        local_score = match_keywords(context["resume_text"], job_description,
+                                     get_jd_profile(job_description).keywords)["ats_score"]
+        if abs(score - local_score) > ATS_DISAGREEMENT:
+            return f"score {score} is far from keyword score {local_score}"
+    return None
+
+
+def validate_text(text, context=None):
+    """Return why a free-text answer is unusable, or None"""
+    if len(text.strip()) < MIN_TEXT_CHARS:
+        return f"answer shorter than {MIN_TEXT_CHARS} characters"
+    return None
+
+
+VALIDATORS = {
+    "parse": validate_parse,
+    "parse_section": validate_section,
+    "ats": validate_ats,
+    "improvements": validate_text,
+    "skills": validate_text,
+    "roadmap": validate_text,
+}
+
+
+class Route:
+    """The model and parameters for one task, and where to escalate failed answers"""
+
+    def __init__(self, task, model, temperature, json_mode=False, validator=None, escalate_to=None):
+        self.task = task
+        self.model = model
+        self.temperature = temperature
+        self.json_mode = json_mode
+        self.validator = validator
+        self.escalate_to = escalate_to
+
+    def check(self, text, context=None):
+        """Return the reason to escalate `text`, or None to accept it"""
+        if self.escalate_to is None or self.validator is None:
+            return None
+        return self.validator(text, context)
+
+
+def task_model(task):
+    return os.environ.get(f"RESUME_ANA_MODEL_{task.upper()}", DEFAULT_MODEL)
+
+
+def task_temperature(task):
+    return float(os.environ.get(f"RESUME_ANA_TEMPERATURE_{task.upper()}", TASKS[task][0]))
+
+
+def build_routes(mode=ROUTING_MODE):
+    """Return {task: Route} for "fixed" or "cascade" routing
+
+    In cascade mode every task starts on FAST_MODEL and escalates to its
+    own model, or to LARGE_MODEL when its own model is the fast one.
+    """
+    if mode not in ("fixed", "cascade"):
+        raise ValueError(f"Unknown routing mode {mode!r}, expected 'fixed' or 'cascade'")
+    routes = {}
+    for task, (_, json_mode) in TASKS.items():
+        model = task_model(task)
+        if mode == "cascade":
+            escalate_to = model if model != FAST_MODEL else LARGE_MODEL
+            routes[task] = Route(task, FAST_MODEL, task_temperature(task), json_mode, VALIDATORS[task], escalate_to)
+        else:
+            routes[task] = Route(task, model, task_temperature(task), json_mode, VALIDATORS[task])
+    return routes
+
+
+routes = build_routes()
+
+
+def set_routing_mode(mode):
+    """Switch every task between "fixed" and "cascade" routing"""
+    routes.clear()
+    routes.update(build_routes(mode))
+
+
+def get_route(task):
+    return routes[task]
+
+
+def summarize_routes(records):
+    """Aggregate "route" stage records into per-task latency, token and escalation stats"""
+    by_task = defaultdict(list)
+    for record in records:
+        if record.get("stage") == "route":
+            by_task[record.get("task")].append(record)
+    summary = {}
+    for task, rows in sorted(by_task.items()):
+        durations = sorted(row["duration"] for row in rows)
+        escalated = sum(1 for row in rows if row.get("escalated"))
+        models = defaultdict(int)
+        for row in rows:
+            models[row.get("model")] += 1
+        summary[task] = {
+            "calls": len(rows),
+            "escalations": escalated,
+            "escalation_rate": round(escalated / len(rows), 3),
+            "p50": durations[len(durations) // 2],
+            "p95": durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+            "mean_tokens": round(statistics.fmean(row.get("tokens") or 0 for row in rows), 1),
+            "models": dict(models),
+        }
+    return summary
+
+
+def main(argv=None):
+    from instrumentation import METRICS_LOG_PATH
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("routes", help="Show the routing table for the current environment")
+    stats = commands.add_parser("stats", help="Summarize routed calls from the metrics log")
+    stats.add_argument("--log", default=METRICS_LOG_PATH, help="Stage log written by instrumentation")
+    args = parser.parse_args(argv)
+
+    if args.command == "routes":
+        print(f"Mode: {ROUTING_MODE}")
+        for route in routes.values():
+            escalation = f" -> {route.escalate_to}" if route.escalate_to else ""
+            print(f"  {route.task:<13} {route.model}{escalation}  temperature={route.temperature}")
+        return
+    with open(args.log, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    print(f"{'task':<13} {'calls':>6} {'escalated':>10} {'p50 s':>7} {'p95 s':>7} {'tokens':>8}  models")
+    for task, row in summarize_routes(records).items():
+        models = ", ".join(f"{model} x{count}" for model, count in row["models"].items())
+        print(f"{task:<13} {row['calls']:>6} {row['escalation_rate']:>9.1%} {row['p50']:>7.2f} "
+              f"{row['p95']:>7.2f} {row['mean_tokens']:>8}  {models}")
+
+
+if __name__ == "__main__":
+    main()
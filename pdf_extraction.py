@@ -0,0 +1,248 @@
+import importlib.util
+import io
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Documents with fewer pages than this are extracted on the calling thread,
+# since starting work in the pool costs more than it saves on short resumes.
+PARALLEL_PAGE_THRESHOLD = int(os.environ.get("RESUME_ANA_PARALLEL_PAGE_THRESHOLD", 8))
+# Number of worker processes; 0 disables parallel extraction entirely
+EXTRACTION_WORKERS = int(os.environ.get("RESUME_ANA_EXTRACTION_WORKERS", min(4, os.cpu_count() or 1)))
+# Pages handed to a worker per task. Small batches keep the stream responsive.
+PAGES_PER_TASK = 2
+# "auto" tries the fast backend and falls back to pdfplumber when its text looks wrong;
+# "pdfium" or "pdfplumber" always use that backend
+EXTRACTION_BACKEND = os.environ.get("RESUME_ANA_PDF_BACKEND", "auto")
+# Fast-path pages scoring below this on text_quality are extracted again with pdfplumber
+QUALITY_THRESHOLD = float(os.environ.get("RESUME_ANA_PDF_QUALITY_THRESHOLD", 0.8))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the shared extraction process pool, creating it on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=EXTRACTION_WORKERS)
+        return _executor
+
+
+class PdfplumberBackend:
+    """pdfplumber's full layout analysis: slow, but the most faithful text"""
+
+    name = "pdfplumber"
+
+    def available(self):
+        return True
+
+    def _open(self, file_bytes):
+        # pdfplumber pulls in pdfminer; import it on first use rather than at app start
+        import pdfplumber
+        return pdfplumber.open(io.BytesIO(file_bytes))
+
+    def count_pages(self, file_bytes):
+        with self._open(file_bytes) as pdf:
+            return len(pdf.pages)
+
+    def iter_pages(self, file_bytes, start, stop):
+        with self._open(file_bytes) as pdf:
+            for page in pdf.pages[start:stop]:
+                text = page.extract_text() or ""
+                # Drop the page's cached layout objects now that its text is read
+                page.close()
+                yield text
+
+
+class PdfiumBackend:
+    """PDFium's text layer in content order: tens of times faster, no layout analysis"""
+
+    name = "pdfium"
+    # PDFium is not thread-safe, so documents are read one page at a time under this lock
+    lock = threading.Lock()
+
+    def available(self):
+        return importlib.util.find_spec("pypdfium2") is not None
+
+    def _open(self, file_bytes):
+        import pypdfium2
+        return pypdfium2.PdfDocument(file_bytes)
+
+    def count_pages(self, file_bytes):
+        with self.lock:
+            pdf = self._open(file_bytes)
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
+
+    def iter_pages(self, file_bytes, start, stop):
+        with self.lock:
+            pdf = self._open(file_bytes)
+        try:
+            for index in range(start, min(stop, len(pdf))):
+                with self.lock:
+                    page = pdf[index]
+                    text_page = page.get_textpage()
+                    # get_text_range keeps text that runs past the page box, unlike get_text_bounded
+                    text = text_page.get_text_range()
+                    text_page.close()
+                    page.close()
+                yield text.replace("\r\n", "\n").replace("\r", "\n").strip("\n")
+        finally:
+            with self.lock:
+                pdf.close()
+
+
+class PdfExtractionError(ValueError):
+    """The PDF could not be read by any backend"""
+
+
+BACKENDS = {backend.name: backend for backend in (PdfiumBackend(), PdfplumberBackend())}
+
+_CID_RE = re.compile(r"\(cid:\d+\)")
+
+
+def text_quality(text):
+    """Score extracted page text from 0 (unusable) to 1 (looks like prose)
+
+    Penalizes empty pages, undecodable glyphs ("(cid:12)", U+FFFD), few
+    letters, words run together and letter-by-letter spacing, the usual
+    failure modes of a text layer read without layout analysis.
+    """
+    words = text.split()
+    if not words:
+        return 0.0
+    chars = "".join(words)
+    bad = len(_CID_RE.findall(text)) * 6 + text.count("�") + sum(
+        1 for c in chars if ord(c) < 32 or 0xE000 <= ord(c) <= 0xF8FF)
+    letters = sum(c.isalpha() for c in chars)
+    score = 1.0 - min(1.0, 4 * bad / len(chars))
+    score *= min(1.0, letters / len(chars) / 0.5)
+    mean_length = len(chars) / len(words)
+    if mean_length > 12:
+        score *= 12 / mean_length
+    single = sum(1 for word in words if len(word) == 1 and word.isalpha())
+    if len(words) >= 10 and single / len(words) > 0.3:
+        score *= 1 - (single / len(words) - 0.3)
+    return round(max(0.0, score), 3)
+
+
+def resolve_backend(name=None):
+    """Return the configured backend name, with "auto" kept and missing fast backends replaced"""
+    name = name or EXTRACTION_BACKEND
+    if name not in ("auto", *BACKENDS):
+        raise ValueError(f"Unknown PDF backend {name!r} (RESUME_ANA_PDF_BACKEND), "
+                         f"expected auto, {', '.join(BACKENDS)}")
+    if name != "pdfplumber" and not BACKENDS["pdfium"].available():
+        return "pdfplumber"
+    return name
+
+
+def count_pages(file_bytes, backend="pdfplumber"):
+    """Return the number of pages in a PDF without extracting any text"""
+    return BACKENDS[backend].count_pages(file_bytes)
+
+
+def extract_page_range(file_bytes, start, stop, backend="pdfplumber"):
+    """Extract the text of pages [start, stop) from a PDF given as bytes"""
+    return list(BACKENDS[backend].iter_pages(file_bytes, start, stop))
+
+
+def _checked_pages(file_bytes, pages, start, info):
+    """Yield fast-path pages, re-extracting any that fail the quality check with pdfplumber"""
+    for offset, text in enumerate(pages):
+        if text_quality(text) < QUALITY_THRESHOLD:
+            text = extract_page_range(file_bytes, start + offset, start + offset + 1)[0]
+            info["fallback_pages"] = info.get("fallback_pages", 0) + 1
+        yield text
+
+
+def iter_page_texts(file_bytes, workers=None, backend=None, info=None):
+    """Yield the text of each page, in page order, as soon as it is available
+
+    In "auto" mode the first page is read with the fast backend. If it
+    passes text_quality the document stays on the fast path, and any later
+    page that fails the check is re-read with pdfplumber; otherwise, or if
+    the fast backend cannot open the file, the whole document goes to
+    pdfplumber. `info`, if given, receives the backend used and the number
+    of fallback pages.
+
+    Long documents on pdfplumber are split into small page batches that
+    run across the process pool. pdfium pages, and short documents, are
+    read one by one on the calling thread: pdfium is fast enough that
+    sending the document to each worker costs more than it saves. Either
+    way only a handful of pages are held in memory at once.
+
+    Raises PdfExtractionError, a ValueError, when the file cannot be read.
+    """
+    backend = resolve_backend(backend)
+    try:
+        yield from _iter_page_texts(file_bytes, workers, backend, info)
+    except PdfExtractionError:
+        raise
+    except Exception as e:
+        raise PdfExtractionError(f"not a readable PDF ({type(e).__name__}: {e})") from e
+
+
+def _iter_page_texts(file_bytes, workers, backend, info):
+    workers = EXTRACTION_WORKERS if workers is None else workers
+    info = {} if info is None else info
+    checked = backend == "auto"
+    first_page = []
+    page_count = None
+    if checked:
+        try:
+            page_count = count_pages(file_bytes, "pdfium")
+            first_page = extract_page_range(file_bytes, 0, 1, "pdfium")
+        except Exception:
+            # Files PDFium rejects may still open in pdfplumber's more lenient parser
+            first_page = []
+        backend = "pdfium" if first_page and text_quality(first_page[0]) >= QUALITY_THRESHOLD else "pdfplumber"
+        if backend == "pdfplumber":
+            first_page = []
+    if page_count is None:
+        page_count = count_pages(file_bytes, backend)
+    info["backend"] = backend
+    checked = checked and backend == "pdfium"
+
+    def pages(start, texts):
+        return _checked_pages(file_bytes, texts, start, info) if checked else texts
+
+    yield from first_page
+    done = len(first_page)
+
+    if workers <= 1 or backend != "pdfplumber" or page_count < PARALLEL_PAGE_THRESHOLD:
+        yield from pages(done, BACKENDS[backend].iter_pages(file_bytes, done, page_count))
+        return
+
+    executor = get_executor()
+    starts = range(done, page_count, PAGES_PER_TASK)
+    # Keep a bounded window of batches in flight so results waiting to be
+    # yielded in order cannot pile up for large documents.
+    window = workers * 2
+    pending = {}
+    next_start = iter(starts)
+
+    def submit_next():
+        start = next(next_start, None)
+        if start is not None:
+            stop = min(start + PAGES_PER_TASK, page_count)
+            pending[start] = executor.submit(extract_page_range, file_bytes, start, stop, backend)
+
+    for _ in range(window):
+        submit_next()
+
+    for start in starts:
+        future = pending.pop(start)
+        page_texts = future.result()
+        submit_next()
+        yield from pages(start, page_texts)
+
+
+def extract_text(file_bytes, workers=None, backend=None):
+    """Return the full text of a PDF, one line break after each page"""
+    return "".join(text + "\n" for text in iter_page_texts(file_bytes, workers, backend))
@@ -0,0 +1,193 @@
+import os
+import re
+
+# Token budget for the resume (or job description) text embedded in each
+# prompt type. llama3-8b-8192 has an 8192 token window shared by the prompt
+# template, the embedded documents and the reply.
+PROMPT_TOKEN_BUDGETS = {
+    "parse": int(os.environ.get("RESUME_ANA_BUDGET_PARSE", 3500)),
+    "ats": int(os.environ.get("RESUME_ANA_BUDGET_ATS", 2500)),
+    "improvements": int(os.environ.get("RESUME_ANA_BUDGET_IMPROVEMENTS", 2500)),
+    "job_description": int(os.environ.get("RESUME_ANA_BUDGET_JD", 1500)),
+}
+
+# Section name -> header spellings, matched against whole, normalized lines
+SECTION_HEADERS = {
+    "summary": ["summary", "professional summary", "profile", "about me", "objective", "career objective"],
+    "experience": ["experience", "work experience", "professional experience", "employment history",
+                   "work history", "employment", "career history", "relevant experience",
+                   "research experience", "teaching experience", "teaching", "appointments",
+                   "academic appointments", "professional appointments", "positions", "academic positions",
+                   "positions held", "research positions", "postdoctoral experience", "industry experience"],
+    "education": ["education", "academic background", "education and training", "qualifications",
+                  "academic qualifications", "degrees", "education and qualifications"],
+    "skills": ["skills", "technical skills", "core competencies", "key skills", "competencies",
+               "technologies", "tools and technologies"],
+    "projects": ["projects", "key projects", "personal projects", "academic projects"],
+    "certifications": ["certifications", "certificates", "licenses and certifications", "licenses"],
+    "awards": ["awards", "honors", "honours", "achievements", "honors and awards", "awards and honors",
+               "grants", "grants and funding", "funding", "fellowships"],
+    "publications": ["publications", "research", "papers", "presentations", "selected publications",
+                     "conference presentations", "invited talks", "talks"],
+    "volunteer": ["volunteer", "volunteering", "volunteer experience", "community involvement",
+                  "service", "professional service", "academic service"],
+    "languages": ["languages"],
+    "interests": ["interests", "hobbies", "hobbies and interests", "personal interests", "activities"],
+    "references": ["references", "referees"],
+}
+
+# Sections dropped first when a prompt type is over budget, least useful first.
+# Sections not listed are only ever shortened, never dropped.
+DROP_ORDER = {
+    "parse": ["references", "interests", "volunteer", "awards", "publications", "projects"],
+    "ats": ["references", "interests", "languages", "volunteer", "publications", "awards", "education"],
+    "improvements": ["references", "interests", "languages", "volunteer", "publications"],
+    "job_description": [],
+}
+
+_BOILERPLATE_RE = re.compile(
+    r"^(page \d+( of \d+)?|curriculum vitae|resume|r[ée]sum[ée]|"
+    r"references (are )?available (up)?on request\.?)$",
+    re.IGNORECASE,
+)
+# "3 of 5" or "3 / 5"; only a page number when the first is at most the second, unlike "2016/2020"
+_PAGE_OF_RE = re.compile(r"^(\d{1,3}) ?(?:of|/) ?(\d{1,3})$", re.IGNORECASE)
+# Most pages a resume or job description is assumed to have
+MAX_PAGE_NUMBER = 50
+_HEADER_INDEX = {
+    header: section for section, headers in SECTION_HEADERS.items() for header in headers
+}
+
+
+def count_tokens(text):
+    """Estimate tokens in text (about four characters per token for English)"""
+    return len(text) // 4 + 1
+
+
+def _normalize_header(line):
+    return re.sub(r"[^a-z ]", "", line.lower().replace("&", "and")).strip()
+
+
+def split_sections(text):
+    """Split resume text into [(section, text)] using common section headers
+
+    Text before the first recognized header (name, contact details) is
+    returned as the "header" section.
+    """
+    sections = [["header", []]]
+    for line in text.splitlines():
+        if len(line.split()) <= 5:
+            section = _HEADER_INDEX.get(_normalize_header(line))
+            if section:
+                sections.append([section, [line]])
+                continue
+        sections[-1][1].append(line)
+    return [(name, "\n".join(lines)) for name, lines in sections if any(l.strip() for l in lines)]
+
+
+def clean_text(text):
+    """Collapse whitespace, drop boilerplate lines and repeated lines
+
+    Repeated lines are usually page headers and footers from multi-page PDFs.
+    """
+    seen = set()
+    lines = []
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if not line:
+            if lines and lines[-1]:
+                lines.append("")
+            continue
+        if _BOILERPLATE_RE.match(line) or _is_page_number(line):
+            continue
+        key = line.lower()
+        # Short lines such as dates or bullet labels legitimately repeat
+        if key in seen and len(line) > 25:
+            continue
+        seen.add(key)
+        lines.append(line)
+    return "\n".join(lines).strip()
+
+
+def _is_page_number(line):
+    match = _PAGE_OF_RE.match(line)
+    return bool(match) and 1 <= int(match.group(1)) <= int(match.group(2)) <= MAX_PAGE_NUMBER
+
+
+def _truncate_to_tokens(text, tokens):
+    """Keep whole lines from the start of text until the token allowance is used
+
+    If even the first line is over the allowance (a job description pasted
+    as one paragraph), it is cut at the last word boundary that fits.
+    """
+    if count_tokens(text) <= tokens:
+        return text
+    kept = []
+    length = -1
+    for line in text.splitlines():
+        # Running length of "\n".join(kept), measured the same way as count_tokens
+        length += len(line) + 1
+        if length // 4 + 1 > tokens:
+            break
+        kept.append(line)
+    if not any(line.strip() for line in kept) and tokens > 0:
+        line = text.lstrip().splitlines()[0]
+        cut = line[:max(0, (tokens - 1) * 4)]
+        return cut.rsplit(" ", 1)[0] if " " in cut else cut
+    return "\n".join(kept)
+
+
+def _share_budget(sizes, budget):
+    """Split a budget so small sections stay whole and only the largest are cut"""
+    allowances = [0] * len(sizes)
+    remaining = budget
+    order = sorted(range(len(sizes)), key=lambda i: sizes[i])
+    for position, i in enumerate(order):
+        fair_share = remaining // (len(order) - position)
+        allowances[i] = min(sizes[i], fair_share)
+        remaining -= allowances[i]
+    return allowances
+
+
+class CompactionResult:
+    """Compacted text plus the token accounting for one prompt"""
+
+    def __init__(self, text, original_tokens, dropped_sections):
+        self.text = text
+        self.original_tokens = original_tokens
+        self.tokens = count_tokens(text)
+        self.dropped_sections = dropped_sections
+
+    @property
+    def saved_tokens(self):
+        return max(0, self.original_tokens - self.tokens)
+
+
+def compact_text(text, prompt_type, budget=None):
+    """Fit text into the token budget for a prompt type
+
+    Cleaning always runs. If the text is still over budget, low-value
+    sections are dropped in DROP_ORDER and the largest remaining sections
+    are then shortened, keeping the start of each.
+    """
+    budget = budget or PROMPT_TOKEN_BUDGETS[prompt_type]
+    original_tokens = count_tokens(text)
+    text = clean_text(text)
+    dropped = []
+    if count_tokens(text) <= budget:
+        return CompactionResult(text, original_tokens, dropped)
+
+    sections = split_sections(text)
+    for section in DROP_ORDER.get(prompt_type, []):
+        if sum(count_tokens(body) for _, body in sections) <= budget:
+            break
+        if any(name == section for name, _ in sections):
+            sections = [(name, body) for name, body in sections if name != section]
+            dropped.append(section)
+
+    if sum(count_tokens(body) for _, body in sections) > budget:
+        allowances = _share_budget([count_tokens(body) for _, body in sections], budget)
+        sections = [(name, _truncate_to_tokens(body, allowance))
+                    for (name, body), allowance in zip(sections, allowances)]
+    text = "\n\n".join(body for _, body in sections if body)
+    return CompactionResult(text, original_tokens, dropped)
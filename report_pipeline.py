@@ -0,0 +1,117 @@
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from resume_core import (
+    calculate_ats_score,
+    get_job_role_roadmap,
+    get_resume_details,
+    get_resume_improvement_suggestions,
+    get_skill_upgrade_suggestions,
+)
+
+
+class Stage:
+    """One node of the report DAG: a function of the pipeline inputs and its dependencies' outputs"""
+
+    def __init__(self, name, func, depends_on=()):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+
+
+# parse, ats, skills and roadmap only need the inputs and start together;
+# improvements waits for the ATS analysis and reuses it instead of re-scoring.
+REPORT_STAGES = [
+    Stage("parse", lambda inputs, deps: get_resume_details(inputs["resume_text"], use_cache=inputs["use_cache"])),
+    Stage("ats", lambda inputs, deps: calculate_ats_score(
+        inputs["resume_text"], inputs["job_description"], use_cache=inputs["use_cache"])),
+    Stage("skills", lambda inputs, deps: get_skill_upgrade_suggestions(
+        inputs["job_description"], use_cache=inputs["use_cache"])),
+    Stage("roadmap", lambda inputs, deps: get_job_role_roadmap(
+        inputs["job_description"], use_cache=inputs["use_cache"])),
+    Stage("improvements", lambda inputs, deps: get_resume_improvement_suggestions(
+        inputs["resume_text"], deps["ats"], use_cache=inputs["use_cache"]), depends_on=["ats"]),
+]
+
+
+class PipelineRun:
+    """Outputs, errors and timings of one DAG execution"""
+
+    def __init__(self):
+        self.results = {}
+        self.errors = {}
+        self.timings = {}
+        self.wall_time = 0.0
+
+    @property
+    def total_stage_time(self):
+        """Time the stages would have taken back to back"""
+        return sum(end - start for start, end in self.timings.values())
+
+
+def run_dag(stages, inputs, max_workers=None, on_stage_complete=None):
+    """Run stages as soon as their dependencies finish, in parallel where possible
+
+    `on_stage_complete(name, run)` is called on the calling thread after each
+    stage, so it is safe to update Streamlit elements from it. A failed stage
+    skips everything that depends on it.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        missing = [dep for dep in stage.depends_on if dep not in by_name]
+        if missing:
+            raise ValueError(f"Stage {stage.name!r} depends on unknown stages {missing}")
+
+    run = PipelineRun()
+    pending = dict(by_name)
+    running = {}
+    start = time.perf_counter()
+
+    def timed(stage, deps):
+        stage_start = time.perf_counter()
+        try:
+            return stage.func(inputs, deps)
+        finally:
+            run.timings[stage.name] = (stage_start - start, time.perf_counter() - start)
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(stages)) as executor:
+        while pending or running:
+            skipped = False
+            for name, stage in list(pending.items()):
+                if any(dep in run.errors for dep in stage.depends_on):
+                    run.errors[name] = "Skipped because a dependency failed"
+                    del pending[name]
+                    skipped = True
+                    if on_stage_complete:
+                        on_stage_complete(name, run)
+                elif all(dep in run.results for dep in stage.depends_on):
+                    deps = {dep: run.results[dep] for dep in stage.depends_on}
+                    # Run in a copy of the caller's context so per-session instrumentation follows
+                    context = contextvars.copy_context()
+                    running[executor.submit(context.run, timed, stage, deps)] = name
+                    del pending[name]
+            if not running:
+                if skipped:
+                    continue
+                if pending:
+                    raise ValueError(f"Dependency cycle between stages {sorted(pending)}")
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    run.results[name] = future.result()
+                except Exception as e:
+                    run.errors[name] = str(e)
+                if on_stage_complete:
+                    on_stage_complete(name, run)
+
+    run.wall_time = time.perf_counter() - start
+    return run
+
+
+def build_report(resume_text, job_description, use_cache=True, on_stage_complete=None):
+    """Run the full report (parse, ATS, improvements, skills, roadmap) as a DAG"""
+    inputs = {"resume_text": resume_text, "job_description": job_description, "use_cache": use_cache}
+    return run_dag(REPORT_STAGES, inputs, on_stage_complete=on_stage_complete)
@@ -1,13 +1,33 @@
+from startup_profile import StartupProfiler
+startup_profiler = StartupProfiler()
+
 import streamlit as st
-import pdfplumber
-from openai import OpenAI
 import os
 import json
-import pyttsx3
-import threading
 import time
 import tempfile
 import base64
+import asyncio
+import hashlib
+import collections
+from structured_output import IncrementalJSONParser, parse_json_response
+from instrumentation import set_session_sink
+from groq_transport import create_async_client, create_client
+from speech_synthesis import SpeechSynthesizer, audio_duration, clean_text_for_speech
+from speculation import SPECULATE, estimate_tokens, speculator
+from resume_core import (
+    configure_client,
+    compaction_log,
+    response_cache,
+    stream_text_from_pdf,
+    extract_text_from_pdf,
+    get_resume_details,
+    calculate_ats_score,
+    get_resume_improvement_suggestions,
+    get_skill_upgrade_suggestions,
+    get_job_role_roadmap,
+)
+startup_profiler.mark("imports")
 
 st.set_page_config(
     page_title="AI Resume Parser & ATS Analyzer", 
@@ -44,282 +64,235 @@ except KeyError:
     st.error("❌ GROQ_API_KEY not found in Streamlit secrets. Please check your .streamlit/secrets.toml file.")
     st.stop()
 
-client = OpenAI(
-    api_key=GROQ_API_KEY,
-    base_url="https://api.groq.com/openai/v1",
-)
+@st.cache_resource(show_spinner=False)
+def load_groq_clients(api_key):
+    """Groq clients and their connection pool, shared by every session and kept across reruns"""
+    return create_client(api_key), create_async_client(api_key)
+
+@st.cache_resource(show_spinner=False)
+def load_synthesizer():
+    """The TTS engine and its worker queue, shared by every session"""
+    return SpeechSynthesizer()
+
+startup_profiler.mark("page config and styles")
+
+# The clients (and the openai import) are only built when a page first calls the model
+configure_client(GROQ_API_KEY, factory=lambda: load_groq_clients(GROQ_API_KEY))
+
+# Collect stage timings for this session's performance panel
+# Stage records kept per session for the Performance panel; older ones are dropped
+PERF_RECORDS_MAX = 500
+if 'perf_records' not in st.session_state:
+    st.session_state.perf_records = collections.deque(maxlen=PERF_RECORDS_MAX)
+set_session_sink(st.session_state.perf_records)
+
+# "browser" renders speech to cached audio files played with st.audio;
+# "speakers" plays it on the server's own audio device
+TTS_MODE = os.environ.get("RESUME_ANA_TTS_MODE", "browser")
+# Split speech into sentence chunks that play while later ones are synthesized
+TTS_CHUNKED = os.environ.get("RESUME_ANA_TTS_CHUNKED", "1") != "0"
 
 # Voice Assistant Class
 class VoiceAssistant:
     def __init__(self):
-        self.engine = None
-        self.is_speaking = False
-        self.init_engine()
+        # One synthesizer and engine are shared by every session in the process
+        self.synthesizer = load_synthesizer()
     
-    def init_engine(self):
-        """Initialize the TTS engine"""
-        try:
-            self.engine = pyttsx3.init()
-            # Set properties
-            self.engine.setProperty('rate', 150)  # Speed of speech
-            self.engine.setProperty('volume', 0.8)  # Volume level (0.0 to 1.0)
-            
-            # Try to set a nice voice
-            voices = self.engine.getProperty('voices')
-            if voices:
-                # Try to find a female voice or use the first available
-                for voice in voices:
-                    if 'female' in voice.name.lower() or 'zira' in voice.name.lower():
-                        self.engine.setProperty('voice', voice.id)
-                        break
-                else:
-                    self.engine.setProperty('voice', voices[0].id)
-        except Exception as e:
-            st.error(f"Voice engine initialization failed: {str(e)}")
-            self.engine = None
+    @property
+    def is_speaking(self):
+        return self.synthesizer.speaking
+    
+    def synthesize(self, text):
+        """Queue the text for rendering to cached audio files; returns one Future per file"""
+        if TTS_CHUNKED:
+            return self.synthesizer.synthesize_chunks(text)
+        return [self.synthesizer.synthesize(self.clean_text_for_speech(text))]
     
     def speak(self, text):
-        """Speak the given text"""
-        if not self.engine:
-            st.error("Voice engine not available")
-            return
-        
-        # Clean the text for better speech
-        clean_text = self.clean_text_for_speech(text)
-        
-        def speak_thread():
-            try:
-                self.is_speaking = True
-                self.engine.say(clean_text)
-                self.engine.runAndWait()
-                self.is_speaking = False
-            except Exception as e:
-                st.error(f"Speech error: {str(e)}")
-                self.is_speaking = False
-        
-        # Run in separate thread to avoid blocking
-        thread = threading.Thread(target=speak_thread)
-        thread.daemon = True
-        thread.start()
+        """Speak the given text on the server's speakers"""
+        if TTS_CHUNKED:
+            self.synthesizer.speak_chunks(text)
+        else:
+            self.synthesizer.speak(self.clean_text_for_speech(text))
     
     def clean_text_for_speech(self, text):
         """Clean text for better speech synthesis"""
-        # Remove markdown formatting
-        text = text.replace('**', '').replace('*', '')
-        text = text.replace('#', '').replace('```', '')
-        text = text.replace('•', '').replace('✓', 'check')
-        text = text.replace('✗', 'cross').replace('🟢', 'green')
-        text = text.replace('🟡', 'yellow').replace('🟠', 'orange')
-        text = text.replace('🔴', 'red').replace('📊', '').replace('📋', '')
-        text = text.replace('👤', '').replace('🎓', '').replace('💼', '')
-        text = text.replace('🛠️', '').replace('🏆', '').replace('🔍', '')
-        text = text.replace('✅', 'yes').replace('❌', 'no')
-        text = text.replace('🎯', '').replace('💡', '')
-        text = text.replace('📈', '').replace('🎉', '')
-        text = text.replace('⚠️', 'warning').replace('🔄', '')
-        text = text.replace('📚', '').replace('📍', '').replace('📅', '')
-        
-        # Remove extra whitespace
-        text = ' '.join(text.split())
-        
-        return text
+        return clean_text_for_speech(text)
     
-    def stop_speaking(self):
-        """Stop current speech"""
-        if self.engine and self.is_speaking:
-            try:
-                self.engine.stop()
-                self.is_speaking = False
-            except Exception as e:
-                st.error(f"Error stopping speech: {str(e)}")
+    def stop_speaking(self, files=()):
+        """Stop current speech and cancel the given audio files that are still queued"""
+        try:
+            self.synthesizer.stop(files)
+        except Exception as e:
+            st.error(f"Error stopping speech: {str(e)}")
 
 # Initialize voice assistant
 if 'voice_assistant' not in st.session_state:
     st.session_state.voice_assistant = VoiceAssistant()
+startup_profiler.mark("session setup")
+
+def input_key(*inputs):
+    """Hash a page's inputs (uploaded files, text) into the key its stored results are filed under"""
+    digest = hashlib.sha256()
+    for value in inputs:
+        if hasattr(value, "getvalue"):
+            value = value.getvalue()
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        digest.update(value)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def remembered(slot, key):
+    """Return the result stored in a session slot for these inputs, or None"""
+    stored = st.session_state.get(f"memo_{slot}")
+    if stored is not None and stored["key"] == key:
+        return stored["value"]
+    return None
+
+def remember(slot, key, value):
+    """Store a page result so reruns render it again without extraction or model calls
+
+    Each slot keeps only the result for its latest inputs.
+    """
+    st.session_state[f"memo_{slot}"] = {"key": key, "value": value}
+    return value
+
+def extract_resume_text(uploaded_file):
+    """Extract an uploaded resume once per session; reruns reuse the stored text"""
+    file_key = input_key(uploaded_file)
+    resume_text = remembered("resume_text", file_key)
+    if resume_text is None:
+        with st.spinner("Extracting text from resume..."):
+            resume_text = claim_speculation("extract", file_key)
+            if resume_text is None:
+                try:
+                    resume_text = extract_text_from_pdf(uploaded_file)
+                except ValueError as e:
+                    st.error(f"❌ Could not extract text from the resume: {e}")
+                    st.stop()
+            remember("resume_text", file_key, resume_text)
+    return resume_text
+
+def speculate_extraction(uploaded_file):
+    """Start extracting an upload in the background while the rest of the form is filled in"""
+    file_key = input_key(uploaded_file)
+    if speculate and remembered("resume_text", file_key) is None:
+        speculator.submit("extract", file_key, extract_text_from_pdf, uploaded_file.getvalue())
 
+def speculate_jd_answers(job_description):
+    """Start the answers that need only the job description as soon as one is entered"""
+    if not speculate:
+        return
+    key = input_key(job_description, str(bypass_cache))
+    tokens = estimate_tokens(job_description)
+    for slot, func in (("skills", get_skill_upgrade_suggestions), ("roadmap", get_job_role_roadmap)):
+        if remembered(slot, input_key(job_description)) is None:
+            speculator.submit(slot, key, func, job_description, use_cache=not bypass_cache, tokens=tokens)
+
+def claim_speculation(kind, key):
+    """Return a speculative result for these inputs, waiting if it is still running, or None"""
+    if not speculate:
+        return None
+    future = speculator.claim(kind, key)
+    if future is None:
+        return None
+    try:
+        return future.result()
+    except Exception:
+        # A failed speculation is simply recomputed in the foreground
+        return None
+
+@st.fragment
 def add_voice_controls(text_content, section_name="content"):
-    """Add voice control buttons to any section"""
+    """Add voice control buttons to any section
+
+    A fragment, so its buttons rerun only these controls and not the page.
+    """
     st.markdown("---")
     st.markdown("### 🎤 Voice Assistant")
     
     col1, col2, col3 = st.columns(3)
     
+    audio_key = f"voice_audio_{section_name}"
+    
+    def read_aloud(text, message):
+        if TTS_MODE == "speakers":
+            st.session_state.voice_assistant.speak(text)
+            st.success(message)
+            return
+        st.session_state[audio_key] = {
+            "chunks": st.session_state.voice_assistant.synthesize(text),
+            "index": -1,
+            "ends_at": 0.0,
+        }
+    
     with col1:
         speak_key = f"speak_{section_name}"
         if st.button("🔊 Read Aloud", key=speak_key, type="primary"):
-            st.session_state.voice_assistant.speak(text_content)
-            st.success("🎤 Reading aloud...")
+            read_aloud(text_content, "🎤 Reading aloud...")
     
     with col2:
         stop_key = f"stop_{section_name}"
         if st.button("🔇 Stop Speech", key=stop_key):
-            st.session_state.voice_assistant.stop_speaking()
+            playlist = st.session_state.pop(audio_key, None)
+            st.session_state.voice_assistant.stop_speaking(playlist["chunks"] if playlist else ())
             st.info("🔇 Speech stopped")
     
     with col3:
         test_key = f"test_{section_name}"
         if st.button("🎵 Test Voice", key=test_key):
-            st.session_state.voice_assistant.speak("Voice test successful! Your AI assistant is ready.")
-            st.success("🎵 Testing voice...")
+            read_aloud("Voice test successful! Your AI assistant is ready.", "🎵 Testing voice...")
+    
+    # Poll for the next chunk only while this section has audio to play
+    st.fragment(voice_player, run_every=0.5 if st.session_state.get(audio_key) else None)(audio_key)
     
     st.markdown("---")
 
-def extract_text_from_pdf(uploaded_file):
-    text = ""
-    with pdfplumber.open(uploaded_file) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text() + "\n"
-    return text
-
-def get_resume_details(resume_text):
-    prompt = f"""
-You are a smart AI resume parser. Extract the following from the resume:
-
-- Full Name
-- Email
-- Phone Number
-- Education
-- Work Experience
-- Skills
-- Certifications
-
-IMPORTANT: Return ONLY a valid JSON object with the following structure:
-{{
-    "full_name": "John Doe",
-    "email": "john.doe@email.com",
-    "phone": "+1-234-567-8900",
-    "education": [
-        {{
-            "degree": "Bachelor of Science in Computer Science",
-            "institution": "University Name",
-            "year": "2020"
-        }}
-    ],
-    "work_experience": [
-        {{
-            "job_title": "Software Engineer",
-            "company": "Company Name",
-            "duration": "2020-2023",
-            "responsibilities": ["Task 1", "Task 2"]
-        }}
-    ],
-    "skills": ["Python", "JavaScript", "React"],
-    "certifications": ["AWS Certified", "Google Cloud"]
-}}
-
-Resume:
-\"\"\"{resume_text}\"\"\"
-"""
-    response = client.chat.completions.create(
-        model="llama3-8b-8192",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.2
-    )
-    return response.choices[0].message.content.strip()
-
-def calculate_ats_score(resume_text, job_description):
-    prompt = f"""
-You are an expert ATS (Applicant Tracking System) analyzer. Compare the resume with the job description and provide:
-
-1. ATS Score (0-100): Based on keyword matching, skills alignment, and experience relevance
-2. Matched Keywords: List keywords from job description found in resume
-3. Missing Keywords: Critical keywords from job description missing in resume
-4. Skills Gap Analysis: What skills are required but missing
-5. Experience Alignment: How well the experience matches job requirements
-6. Overall Assessment: Brief summary of candidacy strength
-
-Provide scoring criteria:
-- 90-100: Excellent match, highly likely to pass ATS
-- 80-89: Good match, likely to pass ATS with minor gaps
-- 70-79: Fair match, moderate chance with some improvements needed
-- 60-69: Below average, significant improvements required
-- Below 60: Poor match, major changes needed
-
-IMPORTANT: Return ONLY a valid JSON object with the following structure (no additional text or formatting):
-{{
-    "ats_score": 75,
-    "score_category": "Fair",
-    "matched_keywords": ["keyword1", "keyword2"],
-    "missing_keywords": ["keyword3", "keyword4"],
-    "skills_gap": ["skill1", "skill2"],
-    "experience_alignment": "Brief assessment text",
-    "overall_assessment": "Summary text",
-    "recommendations": ["suggestion1", "suggestion2"]
-}}
-
-Job Description:
-\"\"\"{job_description}\"\"\"
-
-Resume:
-\"\"\"{resume_text}\"\"\"
-"""
-    response = client.chat.completions.create(
-        model="llama3-8b-8192",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.3
-    )
-    return response.choices[0].message.content.strip()
-
-def get_resume_improvement_suggestions(resume_text, ats_analysis):
-    prompt = f"""
-Based on the ATS analysis provided, give specific, actionable recommendations to improve the resume:
-
-1. Keyword Optimization: Specific keywords to add and where
-2. Skills Enhancement: What skills to highlight or add
-3. Experience Formatting: How to better present work experience
-4. Content Structure: Improvements to resume layout and sections
-5. Industry-Specific Tips: Tailored advice for the target role
-
-Make recommendations practical and specific. Focus on:
-- Adding missing keywords naturally
-- Improving existing content rather than fabricating experience
-- ATS-friendly formatting suggestions
-- Quantifying achievements where possible
-
-ATS Analysis:
-\"\"\"{ats_analysis}\"\"\"
-
-Resume:
-\"\"\"{resume_text}\"\"\"
-
-Return actionable recommendations in a clear, numbered format.
-"""
-    response = client.chat.completions.create(
-        model="llama3-8b-8192",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.4
-    )
-    return response.choices[0].message.content.strip()
-
-def get_skill_upgrade_suggestions(job_description):
-    prompt = f"""
-You are a career coach and skill development expert. Based on the following job description, suggest a list of technical and soft skills that a candidate should consider upgrading or learning to be a strong fit for this role. For each skill, briefly explain why it is important for the job.
-
-Job Description:
-\"\"\"{job_description}\"\"\"
+def voice_player(audio_key):
+    """Play a section's speech chunks in order, each as soon as it is synthesized"""
+    playlist = st.session_state.get(audio_key)
+    if not playlist:
+        return
+    chunks = playlist["chunks"]
+    index = playlist["index"]
+    now = time.time()
+    if now >= playlist["ends_at"] and index + 1 == len(chunks):
+        # The last chunk has played; rerun the controls so polling stops
+        st.session_state.pop(audio_key, None)
+        st.rerun()
+    if now >= playlist["ends_at"] and index + 1 < len(chunks) and chunks[index + 1].done():
+        index = playlist["index"] = index + 1
+        if chunks[index].cancelled():
+            st.session_state.pop(audio_key, None)
+            return
+        error = chunks[index].exception()
+        if error is not None:
+            st.session_state.pop(audio_key, None)
+            st.error(f"Speech error: {str(error)}")
+            return
+        playlist["ends_at"] = now + audio_duration(chunks[index].result())
+    if index < 0:
+        st.caption("🎤 Preparing audio...")
+        return
+    st.audio(chunks[index].result(), format="audio/wav", autoplay=True)
+    if len(chunks) > 1:
+        st.caption(f"🎤 Part {index + 1} of {len(chunks)}")
 
-Return your suggestions as a numbered list, each with a skill and a short explanation.
-"""
-    response = client.chat.completions.create(
-        model="llama3-8b-8192",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.3
-    )
-    return response.choices[0].message.content.strip()
-
-def get_job_role_roadmap(job_description):
-    prompt = f"""
-You are a career advisor. Based on the following job description, provide a step-by-step career pathway (roadmap) for someone aspiring to excel in this role. Include recommended education, certifications, skill development, experience milestones, and networking or portfolio tips. Present the roadmap as a clear, numbered or bulleted list.
-
-Job Description:
-\"\"\"{job_description}\"\"\"
-"""
-    response = client.chat.completions.create(
-        model="llama3-8b-8192",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.3
-    )
-    return response.choices[0].message.content.strip()
+def render_completion_stream(completion):
+    """Render a streamed completion token by token and return the full text"""
+    st.write_stream(completion)
+    if completion.escalated:
+        st.info("⬆️ The fast model's answer did not pass validation, so a larger model answered instead:")
+        st.markdown(completion.text)
+    if completion.cached:
+        st.caption("⚡ Served from the response cache")
+    elif completion.time_to_first_token is not None:
+        st.caption(
+            f"⏱️ First token after {completion.time_to_first_token:.2f}s · "
+            f"complete in {completion.total_time:.2f}s"
+        )
+    return completion.text
 
 def get_score_color_and_icon(score):
     if score >= 90:
@@ -337,121 +310,133 @@ def page_resume_parser():
     st.title("Resume Parser")
     uploaded_file = st.file_uploader("Upload your Resume (PDF)", type=["pdf"])
     if uploaded_file:
-        with st.spinner("Extracting text from resume..."):
-            resume_text = extract_text_from_pdf(uploaded_file)
         st.subheader("Extracted Resume Text (Preview)")
         with st.expander("View Resume Text", expanded=False):
-            st.text_area("Resume Text", resume_text[:2000] + "...", height=300)
+            preview = st.empty()
+            file_key = input_key(uploaded_file)
+            resume_text = remembered("resume_text", file_key)
+            if resume_text is None:
+                pages = []
+                preview_text = ""
+                with st.spinner("Extracting text from resume..."):
+                    # Fill the preview in as pages arrive instead of waiting for the whole document
+                    try:
+                        for page_text in stream_text_from_pdf(uploaded_file):
+                            pages.append(page_text)
+                            if len(preview_text) < 2000:
+                                preview_text = (preview_text + page_text)[:2000]
+                                preview.code(preview_text, language=None)
+                    except ValueError as e:
+                        st.error(f"❌ Could not extract text from the resume: {e}")
+                        st.stop()
+                resume_text = remember("resume_text", file_key, "".join(pages))
+            preview.text_area("Resume Text", resume_text[:2000] + "...", height=300)
+        parse_key = input_key(resume_text)
         if st.button("Parse Resume"):
             with st.spinner("Parsing resume with Groq..."):
-                parsed_output = get_resume_details(resume_text)
-            
-            # Try to parse JSON and display nicely
-            try:
-                # Clean up the response
-                clean_output = parsed_output.strip()
-                if "```json" in clean_output:
-                    start = clean_output.find("```json") + 7
-                    end = clean_output.find("```", start)
-                    if end != -1:
-                        clean_output = clean_output[start:end].strip()
-                elif "```" in clean_output:
-                    start = clean_output.find("```") + 3
-                    end = clean_output.find("```", start)
-                    if end != -1:
-                        clean_output = clean_output[start:end].strip()
-                
-                resume_data = json.loads(clean_output)
-                
-                # Display parsed information in a nice format
-                st.subheader("📋 Parsed Resume Information")
-                
-                # Personal Information
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.markdown("### 👤 Personal Information")
-                    if resume_data.get('full_name'):
-                        st.write(f"**Name:** {resume_data['full_name']}")
-                    if resume_data.get('email'):
-                        st.write(f"**Email:** {resume_data['email']}")
-                    if resume_data.get('phone'):
-                        st.write(f"**Phone:** {resume_data['phone']}")
-                
-                with col2:
-                    st.markdown("### 🎓 Education")
-                    education = resume_data.get('education', [])
-                    if education:
-                        for edu in education:
-                            if isinstance(edu, dict):
-                                st.write(f"**{edu.get('degree', 'N/A')}**")
-                                st.write(f"📍 {edu.get('institution', 'N/A')}")
-                                st.write(f"📅 {edu.get('year', 'N/A')}")
-                            else:
-                                st.write(f"• {edu}")
+                parsed_output = get_resume_details(resume_text, use_cache=not bypass_cache)
+            remember("parsed", parse_key, parsed_output)
+            from candidate_store import record_analysis
+            record_analysis(resume_text, parsed=parsed_output, source="app")
+        # Reruns (voice buttons, other widgets) show the stored result instead of parsing again
+        parsed_output = remembered("parsed", parse_key)
+        if parsed_output is not None:
+            render_parsed_resume(parsed_output)
+
+def render_parsed_resume(parsed_output):
+    # Try to parse JSON and display nicely
+    try:
+        resume_data = parse_json_response(parsed_output)
+        
+        # Display parsed information in a nice format
+        st.subheader("📋 Parsed Resume Information")
+        
+        # Personal Information
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("### 👤 Personal Information")
+            if resume_data.get('full_name'):
+                st.write(f"**Name:** {resume_data['full_name']}")
+            if resume_data.get('email'):
+                st.write(f"**Email:** {resume_data['email']}")
+            if resume_data.get('phone'):
+                st.write(f"**Phone:** {resume_data['phone']}")
+        
+        with col2:
+            st.markdown("### 🎓 Education")
+            education = resume_data.get('education', [])
+            if education:
+                for edu in education:
+                    if isinstance(edu, dict):
+                        st.write(f"**{edu.get('degree', 'N/A')}**")
+                        st.write(f"📍 {edu.get('institution', 'N/A')}")
+                        st.write(f"📅 {edu.get('year', 'N/A')}")
                     else:
-                        st.write("No education information found")
-                
-                # Work Experience
-                st.markdown("### 💼 Work Experience")
-                work_exp = resume_data.get('work_experience', [])
-                if work_exp:
-                    for job in work_exp:
-                        if isinstance(job, dict):
-                            st.markdown(f"**{job.get('job_title', 'N/A')}** at {job.get('company', 'N/A')}")
-                            st.write(f"📅 {job.get('duration', 'N/A')}")
-                            responsibilities = job.get('responsibilities', [])
-                            if responsibilities:
-                                st.write("**Key Responsibilities:**")
-                                for resp in responsibilities:
-                                    st.write(f"• {resp}")
-                            st.write("---")
-                        else:
-                            st.write(f"• {job}")
+                        st.write(f"• {edu}")
+            else:
+                st.write("No education information found")
+        
+        # Work Experience
+        st.markdown("### 💼 Work Experience")
+        work_exp = resume_data.get('work_experience', [])
+        if work_exp:
+            for job in work_exp:
+                if isinstance(job, dict):
+                    st.markdown(f"**{job.get('job_title', 'N/A')}** at {job.get('company', 'N/A')}")
+                    st.write(f"📅 {job.get('duration', 'N/A')}")
+                    responsibilities = job.get('responsibilities', [])
+                    if responsibilities:
+                        st.write("**Key Responsibilities:**")
+                        for resp in responsibilities:
+                            st.write(f"• {resp}")
+                    st.write("---")
                 else:
-                    st.write("No work experience found")
-                
-                # Skills and Certifications
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.markdown("### 🛠️ Skills")
-                    skills = resume_data.get('skills', [])
-                    if skills:
-                        skills_text = ", ".join(skills)
-                        st.write(skills_text)
-                    else:
-                        st.write("No skills found")
-                
-                with col2:
-                    st.markdown("### 🏆 Certifications")
-                    certifications = resume_data.get('certifications', [])
-                    if certifications:
-                        for cert in certifications:
-                            st.write(f"• {cert}")
-                    else:
-                        st.write("No certifications found")
-                
-                # Show raw JSON in expandable section
-                with st.expander("View Raw JSON Data", expanded=False):
-                    st.code(json.dumps(resume_data, indent=2), language='json')
-                
-                # Add voice controls for the entire resume at the end
-                resume_summary = f"""
-                Resume Summary for {resume_data.get('full_name', 'Unknown')}:
-                Email: {resume_data.get('email', 'Not provided')}
-                Phone: {resume_data.get('phone', 'Not provided')}
-                
-                Education: {', '.join([edu.get('degree', 'N/A') if isinstance(edu, dict) else str(edu) for edu in resume_data.get('education', [])])}
-                
-                Skills: {', '.join(resume_data.get('skills', []))}
-                
-                Work Experience: {len(resume_data.get('work_experience', []))} positions listed
-                """
-                
-                add_voice_controls(resume_summary, "resume_summary")
-                
-            except json.JSONDecodeError:
-                st.error("⚠️ Unable to parse the resume data. Showing raw output:")
-                st.code(parsed_output, language='text')
+                    st.write(f"• {job}")
+        else:
+            st.write("No work experience found")
+        
+        # Skills and Certifications
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("### 🛠️ Skills")
+            skills = resume_data.get('skills', [])
+            if skills:
+                skills_text = ", ".join(skills)
+                st.write(skills_text)
+            else:
+                st.write("No skills found")
+        
+        with col2:
+            st.markdown("### 🏆 Certifications")
+            certifications = resume_data.get('certifications', [])
+            if certifications:
+                for cert in certifications:
+                    st.write(f"• {cert}")
+            else:
+                st.write("No certifications found")
+        
+        # Show raw JSON in expandable section
+        with st.expander("View Raw JSON Data", expanded=False):
+            st.code(json.dumps(resume_data, indent=2), language='json')
+        
+        # Add voice controls for the entire resume at the end
+        resume_summary = f"""
+        Resume Summary for {resume_data.get('full_name', 'Unknown')}:
+        Email: {resume_data.get('email', 'Not provided')}
+        Phone: {resume_data.get('phone', 'Not provided')}
+        
+        Education: {', '.join([edu.get('degree', 'N/A') if isinstance(edu, dict) else str(edu) for edu in resume_data.get('education', [])])}
+        
+        Skills: {', '.join(resume_data.get('skills', []))}
+        
+        Work Experience: {len(resume_data.get('work_experience', []))} positions listed
+        """
+        
+        add_voice_controls(resume_summary, "resume_summary")
+        
+    except json.JSONDecodeError:
+        st.error("⚠️ Unable to parse the resume data. Showing raw output:")
+        st.code(parsed_output, language='text')
 
 def page_ats_score():
     st.title("ATS Score Analyzer")
@@ -462,184 +447,275 @@ def page_ats_score():
         placeholder="Paste the job description you want to match your resume against..."
     )
     if uploaded_file and job_description.strip():
-        with st.spinner("Extracting text from resume..."):
-            resume_text = extract_text_from_pdf(uploaded_file)
+        resume_text = extract_resume_text(uploaded_file)
+        
+        # Instant local keyword match, shown before any LLM call
+        from jd_profile import get_jd_profile
+        from keyword_matcher import match_keywords
+        local_match = match_keywords(resume_text, job_description, get_jd_profile(job_description).keywords)
+        st.subheader("⚡ Instant Keyword Match")
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            st.metric("Keyword Score", f"{local_match['ats_score']}/100")
+        with col2:
+            st.write(f"**Matched:** {', '.join(local_match['matched_keywords']) or 'None'}")
+            st.write(f"**Missing:** {', '.join(local_match['missing_keywords']) or 'None'}")
+        st.caption("Deterministic keyword match against the job description. Click below for the full AI analysis.")
+        
+        speculate_jd_answers(job_description)
+        ats_key = input_key(resume_text, job_description)
         if st.button("Calculate ATS Score"):
-            with st.spinner("Analyzing ATS compatibility..."):
-                ats_analysis = calculate_ats_score(resume_text, job_description)
-            try:
-                # Try to extract JSON from the response if it's wrapped in text
-                ats_response = ats_analysis.strip()
-                
-                # Look for JSON content between ```json and ``` or just try direct parsing
-                if "```json" in ats_response:
-                    start = ats_response.find("```json") + 7
-                    end = ats_response.find("```", start)
-                    if end != -1:
-                        ats_response = ats_response[start:end].strip()
-                elif "```" in ats_response:
-                    start = ats_response.find("```") + 3
-                    end = ats_response.find("```", start)
-                    if end != -1:
-                        ats_response = ats_response[start:end].strip()
-                
-                # Try parsing JSON
-                ats_data = json.loads(ats_response)
-                score = ats_data.get('ats_score', 0)
-                
-                # Display ATS Score with visual indicators
-                st.subheader("📊 ATS Analysis Results")
-                
-                # Progress bar for score
-                st.subheader("� Score Breakdown")
-                st.progress(score / 100)
-                st.write(f"Your resume scored **{score} out of 100** points")
-                
-                # Add voice controls for ATS results at the end
-                ats_summary = f"""
-                ATS Analysis Results:
-                Your resume scored {score} out of 100 points.
-                Category: {ats_data.get('score_category', 'Unknown')}
-                
-                Matched Keywords: {', '.join(ats_data.get('matched_keywords', []))}
-                
-                Missing Keywords: {', '.join(ats_data.get('missing_keywords', []))}
-                
-                Overall Assessment: {ats_data.get('overall_assessment', 'No assessment provided')}
-                """
-                
-                add_voice_controls(ats_summary, "ats_results")
-                
-                # Score display with color coding
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    if score >= 90:
-                        st.success(f"🟢 **{score}/100**")
-                    elif score >= 80:
-                        st.info(f"🟡 **{score}/100**")
-                    elif score >= 70:
-                        st.warning(f"🟠 **{score}/100**")
-                    else:
-                        st.error(f"🔴 **{score}/100**")
-                    st.write("**ATS Score**")
-                
-                with col2:
-                    score_category = ats_data.get('score_category', 'Unknown')
-                    st.metric("Category", score_category)
-                
-                with col3:
-                    match_level = "Strong" if score >= 80 else "Moderate" if score >= 70 else "Weak"
-                    st.metric("Match Level", match_level)
-                
-                # Overall feedback
-                if score >= 90:
-                    st.success("🎉 **Excellent!** Your resume is highly likely to pass ATS screening.")
-                elif score >= 80:
-                    st.success("✅ **Good match!** Minor improvements could make it even better.")
-                elif score >= 70:
-                    st.warning("⚠️ **Fair match.** Some improvements needed to increase chances.")
-                elif score >= 60:
-                    st.warning("🔄 **Below average.** Significant improvements recommended.")
-                else:
-                    st.error("❌ **Poor match.** Major changes needed to improve ATS compatibility.")
-                
-                # Detailed Analysis in organized sections
-                st.subheader("🔍 Detailed Analysis")
-                
-                # Keywords Analysis
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.markdown("### ✅ **Matched Keywords**")
-                    matched_keywords = ats_data.get('matched_keywords', [])
-                    if matched_keywords:
-                        for keyword in matched_keywords:
-                            st.success(f"✓ {keyword}")
-                    else:
-                        st.info("No keywords matched")
-                
-                with col2:
-                    st.markdown("### ❌ **Missing Keywords**")
-                    missing_keywords = ats_data.get('missing_keywords', [])
-                    if missing_keywords:
-                        for keyword in missing_keywords:
-                            st.error(f"✗ {keyword}")
-                    else:
-                        st.success("No missing keywords identified")
-                
-                # Skills Gap Analysis
-                if ats_data.get('skills_gap'):
-                    st.markdown("### 🎯 **Skills Gap Analysis**")
-                    st.write("Consider developing these skills:")
-                    for skill in ats_data.get('skills_gap', []):
-                        st.write(f"📚 {skill}")
-                
-                # Experience and Assessment
-                col1, col2 = st.columns(2)
-                with col1:
-                    if ats_data.get('experience_alignment'):
-                        st.markdown("### 💼 **Experience Alignment**")
-                        st.write(ats_data.get('experience_alignment', ''))
-                
-                with col2:
-                    if ats_data.get('overall_assessment'):
-                        st.markdown("### 📝 **Overall Assessment**")
-                        st.write(ats_data.get('overall_assessment', ''))
-                
-                # Recommendations
-                if ats_data.get('recommendations'):
-                    st.markdown("### 💡 **Recommendations**")
-                    recommendations = ats_data.get('recommendations', [])
-                    for i, rec in enumerate(recommendations, 1):
-                        st.write(f"{i}. {rec}")
-                
-                # Progress bar for score
-                st.subheader("📈 Score Breakdown")
-                progress_color = "green" if score >= 80 else "orange" if score >= 70 else "red"
-                st.progress(score / 100)
-                st.write(f"Your resume scored **{score} out of 100** points")
-            except json.JSONDecodeError as e:
-                st.error("⚠️ Error parsing ATS analysis. The AI response was not in valid JSON format.")
-                st.write("**Debug Information:**")
-                st.write(f"JSON Error: {str(e)}")
-                
-                # Show the raw response for debugging
-                with st.expander("View Raw AI Response", expanded=False):
-                    st.code(ats_analysis, language='text')
-                
-                # Try to extract useful information from the raw text
-                st.subheader("Extracted Information")
-                
-                # Look for score patterns
-                import re
-                score_patterns = [
-                    r"score[:\s]*(\d+)",
-                    r"(\d+)/100",
-                    r"(\d+)%",
-                    r"ATS[:\s]*(\d+)"
-                ]
-                
-                score_found = None
-                for pattern in score_patterns:
-                    matches = re.findall(pattern, ats_analysis, re.IGNORECASE)
-                    if matches:
-                        score_found = int(matches[0])
-                        break
-                
-                if score_found:
-                    st.metric("Estimated ATS Score", f"{score_found}/100")
-                    if score_found >= 80:
-                        st.success("Good match detected!")
-                    elif score_found >= 70:
-                        st.warning("Fair match detected.")
-                    else:
-                        st.error("Low match detected.")
-                
-                # Display the raw analysis text
-                st.subheader("Analysis Summary")
-                st.write(ats_analysis)
+            if stream_responses:
+                # Show the score as soon as it appears in the streamed JSON
+                early_score = st.empty()
+                completion = calculate_ats_score(resume_text, job_description, use_cache=not bypass_cache, stream=True)
+                partial_parser = IncrementalJSONParser()
+                score_shown = False
+                with st.spinner("Analyzing ATS compatibility..."):
+                    for chunk in completion:
+                        if score_shown:
+                            continue
+                        partial_parser.feed(chunk)
+                        partial_score = partial_parser.partial().get("ats_score")
+                        if isinstance(partial_score, (int, float)):
+                            early_score.metric("ATS Score", f"{partial_score}/100")
+                            score_shown = True
+                early_score.empty()
+                ats_analysis = completion.text
+            else:
+                with st.spinner("Analyzing ATS compatibility..."):
+                    ats_analysis = calculate_ats_score(resume_text, job_description, use_cache=not bypass_cache)
+            remember("ats", ats_key, ats_analysis)
+            from candidate_store import record_analysis
+            record_analysis(resume_text, job_description, ats=ats_analysis, keyword_match=local_match, source="app")
+        ats_analysis = remembered("ats", ats_key)
+        if ats_analysis is not None:
+            render_ats_analysis(ats_analysis)
     else:
+        if uploaded_file:
+            speculate_extraction(uploaded_file)
+        if job_description.strip():
+            speculate_jd_answers(job_description)
         st.info("Please upload a resume and enter a job description to calculate ATS score")
 
+def render_ats_analysis(ats_analysis):
+    try:
+        ats_data = parse_json_response(ats_analysis)
+        score = ats_data.get('ats_score', 0)
+        
+        # Display ATS Score with visual indicators
+        st.subheader("📊 ATS Analysis Results")
+        
+        # Score display with color coding
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            if score >= 90:
+                st.success(f"🟢 **{score}/100**")
+            elif score >= 80:
+                st.info(f"🟡 **{score}/100**")
+            elif score >= 70:
+                st.warning(f"🟠 **{score}/100**")
+            else:
+                st.error(f"🔴 **{score}/100**")
+            st.write("**ATS Score**")
+        
+        with col2:
+            score_category = ats_data.get('score_category', 'Unknown')
+            st.metric("Category", score_category)
+        
+        with col3:
+            match_level = "Strong" if score >= 80 else "Moderate" if score >= 70 else "Weak"
+            st.metric("Match Level", match_level)
+        
+        # Overall feedback
+        if score >= 90:
+            st.success("🎉 **Excellent!** Your resume is highly likely to pass ATS screening.")
+        elif score >= 80:
+            st.success("✅ **Good match!** Minor improvements could make it even better.")
+        elif score >= 70:
+            st.warning("⚠️ **Fair match.** Some improvements needed to increase chances.")
+        elif score >= 60:
+            st.warning("🔄 **Below average.** Significant improvements recommended.")
+        else:
+            st.error("❌ **Poor match.** Major changes needed to improve ATS compatibility.")
+        
+        # Detailed Analysis in organized sections
+        st.subheader("🔍 Detailed Analysis")
+        
+        # Keywords Analysis
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("### ✅ **Matched Keywords**")
+            matched_keywords = ats_data.get('matched_keywords', [])
+            if matched_keywords:
+                st.success("  \n".join(f"✓ {keyword}" for keyword in matched_keywords))
+            else:
+                st.info("No keywords matched")
+        
+        with col2:
+            st.markdown("### ❌ **Missing Keywords**")
+            missing_keywords = ats_data.get('missing_keywords', [])
+            if missing_keywords:
+                st.error("  \n".join(f"✗ {keyword}" for keyword in missing_keywords))
+            else:
+                st.success("No missing keywords identified")
+        
+        # Skills Gap Analysis
+        if ats_data.get('skills_gap'):
+            st.markdown("### 🎯 **Skills Gap Analysis**")
+            st.write("Consider developing these skills:")
+            for skill in ats_data.get('skills_gap', []):
+                st.write(f"📚 {skill}")
+        
+        # Experience and Assessment
+        col1, col2 = st.columns(2)
+        with col1:
+            if ats_data.get('experience_alignment'):
+                st.markdown("### 💼 **Experience Alignment**")
+                st.write(ats_data.get('experience_alignment', ''))
+        
+        with col2:
+            if ats_data.get('overall_assessment'):
+                st.markdown("### 📝 **Overall Assessment**")
+                st.write(ats_data.get('overall_assessment', ''))
+        
+        # Recommendations
+        if ats_data.get('recommendations'):
+            st.markdown("### 💡 **Recommendations**")
+            recommendations = ats_data.get('recommendations', [])
+            for i, rec in enumerate(recommendations, 1):
+                st.write(f"{i}. {rec}")
+        
+        # Progress bar for score
+        st.subheader("📈 Score Breakdown")
+        st.progress(min(max(score, 0), 100) / 100)
+        st.write(f"Your resume scored **{score} out of 100** points")
+        
+        # Add voice controls for ATS results at the end
+        ats_summary = f"""
+        ATS Analysis Results:
+        Your resume scored {score} out of 100 points.
+        Category: {ats_data.get('score_category', 'Unknown')}
+        
+        Matched Keywords: {', '.join(ats_data.get('matched_keywords', []))}
+        
+        Missing Keywords: {', '.join(ats_data.get('missing_keywords', []))}
+        
+        Overall Assessment: {ats_data.get('overall_assessment', 'No assessment provided')}
+        """
+        
+        add_voice_controls(ats_summary, "ats_results")
+    except json.JSONDecodeError as e:
+        st.error("⚠️ Error parsing ATS analysis. The AI response was not in valid JSON format.")
+        st.write("**Debug Information:**")
+        st.write(f"JSON Error: {str(e)}")
+        
+        # Show the raw response for debugging
+        with st.expander("View Raw AI Response", expanded=False):
+            st.code(ats_analysis, language='text')
+        
+        # Try to extract useful information from the raw text
+        st.subheader("Extracted Information")
+        
+        # Look for score patterns
+        import re
+        score_patterns = [
+            r"score[:\s]*(\d+)",
+            r"(\d+)/100",
+            r"(\d+)%",
+            r"ATS[:\s]*(\d+)"
+        ]
+        
+        score_found = None
+        for pattern in score_patterns:
+            matches = re.findall(pattern, ats_analysis, re.IGNORECASE)
+            if matches:
+                score_found = int(matches[0])
+                break
+        
+        if score_found:
+            st.metric("Estimated ATS Score", f"{score_found}/100")
+            if score_found >= 80:
+                st.success("Good match detected!")
+            elif score_found >= 70:
+                st.warning("Fair match detected.")
+            else:
+                st.error("Low match detected.")
+        
+        # Display the raw analysis text
+        st.subheader("Analysis Summary")
+        st.write(ats_analysis)
+
+def page_batch_ats_score():
+    from batch_ats import RateLimiter, score_resumes, rank_results
+    st.title("Batch ATS Scoring")
+    uploaded_files = st.file_uploader("Upload Resumes (PDF)", type=["pdf"], accept_multiple_files=True)
+    job_description = st.text_area(
+        "Paste the Job Description here:", 
+        height=200,
+        placeholder="Paste the job description to rank all resumes against..."
+    )
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        concurrency = st.number_input("Concurrent requests", min_value=1, max_value=16, value=4)
+    with col2:
+        rpm = st.number_input("Requests per minute", min_value=1, value=30)
+    with col3:
+        tpm = st.number_input("Tokens per minute", min_value=1000, value=30000, step=1000)
+    with col4:
+        shortlist = st.number_input(
+            "AI-score top N (0 = all)", min_value=0, value=0,
+            help="Rank all resumes by local keyword match and only send the best N to the LLM"
+        )
+    
+    if uploaded_files and job_description.strip():
+        batch_key = input_key(*uploaded_files, job_description, str(int(shortlist)))
+        if st.button("Score All Resumes"):
+            progress = st.progress(0.0)
+            table = st.empty()
+            resumes = [(f.name, f) for f in uploaded_files]
+            
+            async def collect():
+                results = []
+                limiter = RateLimiter(int(rpm), int(tpm))
+                async for result in score_resumes(resumes, job_description, int(concurrency), limiter,
+                                                  use_cache=not bypass_cache, shortlist=int(shortlist) or None):
+                    results.append(result)
+                    progress.progress(len(results) / len(resumes))
+                    # Re-rank on every arrival so the table is always ordered
+                    render_batch_table(table, rank_results(results))
+                return results
+            
+            with st.spinner(f"Scoring {len(resumes)} resumes..."):
+                results = remember("batch", batch_key, asyncio.run(collect()))
+            st.success(f"✅ Scored {len(results)} resumes")
+        else:
+            results = remembered("batch", batch_key)
+            if results is not None:
+                render_batch_table(st.empty(), rank_results(results))
+    else:
+        st.info("Please upload one or more resumes and enter a job description to rank them")
+
+def render_batch_table(table, ranked):
+    table.dataframe(
+        [
+            {
+                "Rank": r["rank"],
+                "Resume": r["resume"],
+                "ATS Score": r["ats_score"],
+                "Keyword Score": r["local_score"],
+                "Category": r["score_category"],
+                "Matched": len(r["matched_keywords"]),
+                "Missing": len(r["missing_keywords"]),
+                "Seconds": r["seconds"],
+                "Error": r["error"],
+            }
+            for r in ranked
+        ],
+        use_container_width=True,
+        hide_index=True,
+    )
+
 def page_improvement_tips():
     st.title("Resume Improvement Tips")
     uploaded_file = st.file_uploader("Upload your Resume (PDF)", type=["pdf"])
@@ -649,19 +725,40 @@ def page_improvement_tips():
         placeholder="Paste the job description you want to match your resume against..."
     )
     if uploaded_file and job_description.strip():
-        with st.spinner("Extracting text from resume..."):
-            resume_text = extract_text_from_pdf(uploaded_file)
+        resume_text = extract_resume_text(uploaded_file)
+        speculate_jd_answers(job_description)
+        tips_key = input_key(resume_text, job_description)
+        improvement_suggestions = None
         if st.button("Get Improvement Suggestions"):
-            with st.spinner("Generating improvement suggestions..."):
-                ats_analysis = calculate_ats_score(resume_text, job_description)
-                improvement_suggestions = get_resume_improvement_suggestions(resume_text, ats_analysis)
-            
-            st.subheader("Resume Improvement Recommendations")
-            st.markdown(improvement_suggestions)
-            
+            if stream_responses:
+                with st.spinner("Analyzing ATS compatibility..."):
+                    ats_analysis = calculate_ats_score(resume_text, job_description, use_cache=not bypass_cache)
+                st.subheader("Resume Improvement Recommendations")
+                improvement_suggestions = render_completion_stream(
+                    get_resume_improvement_suggestions(resume_text, ats_analysis, use_cache=not bypass_cache, stream=True)
+                )
+            else:
+                with st.spinner("Generating improvement suggestions..."):
+                    ats_analysis = calculate_ats_score(resume_text, job_description, use_cache=not bypass_cache)
+                    improvement_suggestions = get_resume_improvement_suggestions(resume_text, ats_analysis, use_cache=not bypass_cache)
+                
+                st.subheader("Resume Improvement Recommendations")
+                st.markdown(improvement_suggestions)
+            remember("improvements", tips_key, improvement_suggestions)
+        else:
+            improvement_suggestions = remembered("improvements", tips_key)
+            if improvement_suggestions is not None:
+                st.subheader("Resume Improvement Recommendations")
+                st.markdown(improvement_suggestions)
+        
+        if improvement_suggestions is not None:
             # Add voice controls for improvement suggestions at the end
             add_voice_controls(improvement_suggestions, "improvement_tips")
     else:
+        if uploaded_file:
+            speculate_extraction(uploaded_file)
+        if job_description.strip():
+            speculate_jd_answers(job_description)
         st.info("Please upload a resume and enter a job description to get improvement suggestions")
 
 def page_skill_upgrade():
@@ -672,13 +769,33 @@ def page_skill_upgrade():
         placeholder="Paste the job description for skill upgrade suggestions..."
     )
     if job_description.strip():
+        skills_key = input_key(job_description)
+        skill_suggestions = None
+        speculate_jd_answers(job_description)
         if st.button("Get Skill Upgrade Suggestions"):
-            with st.spinner("Analyzing job description for skill upgrade suggestions..."):
-                skill_suggestions = get_skill_upgrade_suggestions(job_description)
-            
-            st.subheader("🎯 Skill Upgrade Recommendations")
-            st.markdown(skill_suggestions)
-            
+            skill_suggestions = claim_speculation("skills", input_key(job_description, str(bypass_cache)))
+            if skill_suggestions is not None:
+                st.subheader("🎯 Skill Upgrade Recommendations")
+                st.markdown(skill_suggestions)
+            elif stream_responses:
+                st.subheader("🎯 Skill Upgrade Recommendations")
+                skill_suggestions = render_completion_stream(
+                    get_skill_upgrade_suggestions(job_description, use_cache=not bypass_cache, stream=True)
+                )
+            else:
+                with st.spinner("Analyzing job description for skill upgrade suggestions..."):
+                    skill_suggestions = get_skill_upgrade_suggestions(job_description, use_cache=not bypass_cache)
+                
+                st.subheader("🎯 Skill Upgrade Recommendations")
+                st.markdown(skill_suggestions)
+            remember("skills", skills_key, skill_suggestions)
+        else:
+            skill_suggestions = remembered("skills", skills_key)
+            if skill_suggestions is not None:
+                st.subheader("🎯 Skill Upgrade Recommendations")
+                st.markdown(skill_suggestions)
+        
+        if skill_suggestions is not None:
             # Add voice controls for skill suggestions at the end
             add_voice_controls(skill_suggestions, "skill_suggestions")
     else:
@@ -692,37 +809,262 @@ def page_job_roadmap():
         placeholder="Paste the job description for roadmap suggestions..."
     )
     if job_description.strip():
+        roadmap_key = input_key(job_description)
+        roadmap = None
+        speculate_jd_answers(job_description)
         if st.button("Get Job Role Roadmap"):
-            with st.spinner("Generating career pathway for this job role..."):
-                roadmap = get_job_role_roadmap(job_description)
-            
-            st.subheader("🗺️ Career Pathway Roadmap")
-            st.markdown(roadmap)
-            
+            roadmap = claim_speculation("roadmap", input_key(job_description, str(bypass_cache)))
+            if roadmap is not None:
+                st.subheader("🗺️ Career Pathway Roadmap")
+                st.markdown(roadmap)
+            elif stream_responses:
+                st.subheader("🗺️ Career Pathway Roadmap")
+                roadmap = render_completion_stream(
+                    get_job_role_roadmap(job_description, use_cache=not bypass_cache, stream=True)
+                )
+            else:
+                with st.spinner("Generating career pathway for this job role..."):
+                    roadmap = get_job_role_roadmap(job_description, use_cache=not bypass_cache)
+                
+                st.subheader("🗺️ Career Pathway Roadmap")
+                st.markdown(roadmap)
+            remember("roadmap", roadmap_key, roadmap)
+        else:
+            roadmap = remembered("roadmap", roadmap_key)
+            if roadmap is not None:
+                st.subheader("🗺️ Career Pathway Roadmap")
+                st.markdown(roadmap)
+        
+        if roadmap is not None:
             # Add voice controls for roadmap at the end
             add_voice_controls(roadmap, "job_roadmap")
     else:
         st.info("Please enter a job description to get a roadmap for this role")
 
+def page_full_report():
+    from report_pipeline import REPORT_STAGES, build_report
+    st.title("Full Report")
+    uploaded_file = st.file_uploader("Upload your Resume (PDF)", type=["pdf"])
+    job_description = st.text_area(
+        "Paste the Job Description here:", 
+        height=200,
+        placeholder="Paste the job description you want the full report for..."
+    )
+    if uploaded_file and job_description.strip():
+        resume_text = extract_resume_text(uploaded_file)
+        report_key = input_key(resume_text, job_description)
+        if st.button("Generate Full Report"):
+            stage_labels = {
+                "parse": "Parsing resume",
+                "ats": "Scoring ATS match",
+                "improvements": "Writing improvement tips",
+                "skills": "Suggesting skill upgrades",
+                "roadmap": "Building career roadmap",
+            }
+            with st.status("Generating report...", expanded=True) as status:
+                def on_stage_complete(name, run):
+                    if name in run.errors:
+                        st.write(f"❌ {stage_labels[name]}: {run.errors[name]}")
+                    else:
+                        start, end = run.timings[name]
+                        st.write(f"✅ {stage_labels[name]} ({end - start:.1f}s)")
+                
+                run = build_report(resume_text, job_description, use_cache=not bypass_cache,
+                                   on_stage_complete=on_stage_complete)
+                status.update(
+                    label=f"Report ready in {run.wall_time:.1f}s "
+                          f"({run.total_stage_time:.1f}s of work across {len(REPORT_STAGES)} stages)",
+                    state="error" if run.errors else "complete",
+                    expanded=False
+                )
+            from candidate_store import record_analysis
+            record_analysis(resume_text, job_description, parsed=run.results.get("parse"),
+                            ats=run.results.get("ats"), source="app")
+            remember("report", report_key, run)
+        else:
+            run = remembered("report", report_key)
+            if run is not None:
+                st.caption(f"✅ Report generated in {run.wall_time:.1f}s")
+        
+        if run is not None:
+            tabs = st.tabs(["📋 Resume", "📊 ATS Score", "💡 Improvements", "🎯 Skills", "🗺️ Roadmap"])
+            with tabs[0]:
+                if "parse" in run.results:
+                    try:
+                        st.json(parse_json_response(run.results["parse"]))
+                    except json.JSONDecodeError:
+                        st.code(run.results["parse"], language='text')
+            with tabs[1]:
+                if "ats" in run.results:
+                    try:
+                        ats_data = parse_json_response(run.results["ats"])
+                        score = ats_data.get('ats_score', 0)
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            st.metric("ATS Score", f"{score}/100")
+                        with col2:
+                            st.metric("Category", ats_data.get('score_category', 'Unknown'))
+                        st.progress(min(max(score, 0), 100) / 100)
+                        st.write(f"**Matched Keywords:** {', '.join(ats_data.get('matched_keywords', [])) or 'None'}")
+                        st.write(f"**Missing Keywords:** {', '.join(ats_data.get('missing_keywords', [])) or 'None'}")
+                        if ats_data.get('overall_assessment'):
+                            st.write(ats_data['overall_assessment'])
+                    except json.JSONDecodeError:
+                        st.write(run.results["ats"])
+            with tabs[2]:
+                st.markdown(run.results.get("improvements", ""))
+            with tabs[3]:
+                st.markdown(run.results.get("skills", ""))
+            with tabs[4]:
+                st.markdown(run.results.get("roadmap", ""))
+    else:
+        st.info("Please upload a resume and enter a job description to generate the full report")
+
+def page_candidate_analytics():
+    from candidate_store import get_store
+    st.title("Candidate Analytics")
+    start = time.perf_counter()
+    frame = get_store().frame()
+    if not len(frame):
+        st.info("No analyses recorded yet. Parsed resumes and ATS scores from every page will appear here.")
+        return
+    
+    requisitions = {"All job descriptions": None}
+    for requisition, label, rows in frame.requisitions():
+        requisitions[f"{label or 'Untitled'} ({requisition[:8]}, {rows} analyses)"] = requisition
+    requisition = requisitions[st.selectbox("Job description", list(requisitions))]
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("🛠️ Most Common Skills")
+        st.dataframe([{"Skill": term, "Candidates": count}
+                      for term, count in frame.term_frequency("skills", requisition, top=25)],
+                     use_container_width=True, hide_index=True)
+    with col2:
+        st.subheader("❌ Most Often Missing")
+        st.dataframe([{"Keyword": term, "Candidates": count}
+                      for term, count in frame.term_frequency("missing", requisition, top=25)],
+                     use_container_width=True, hide_index=True)
+    
+    st.subheader("📊 ATS Score Distribution")
+    distribution = frame.score_distribution(bins=10, requisition=requisition)
+    if distribution:
+        st.dataframe([{key: value for key, value in summary.items() if key != "histogram"}
+                      for summary in distribution], use_container_width=True, hide_index=True)
+        if requisition is not None:
+            st.bar_chart({"Candidates": {f"{i * 10:02d}-{i * 10 + 9}": count
+                                         for i, count in enumerate(distribution[0]["histogram"])}})
+    else:
+        st.info("No ATS scores recorded for this selection yet")
+    
+    st.subheader("🔎 Find Candidates")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        has = st.multiselect("Has all of", frame.terms("skills"))
+    with col2:
+        lacks = st.multiselect("But none of", frame.terms("skills"))
+    with col3:
+        min_score = st.slider("Minimum ATS score", 0, 100, 0, disabled=requisition is None)
+    if has or lacks:
+        matches = frame.candidates_with(has, lacks, requisition, min_score or None)
+        st.write(f"**{len(matches)}** matching candidates")
+        st.dataframe(matches, use_container_width=True, hide_index=True)
+    st.caption(f"⏱️ {len(frame)} analyses queried in {(time.perf_counter() - start) * 1000:.0f} ms")
+
 with st.sidebar:
     page = st.radio(
         "Navigate",
         [
             "Resume Parser",
             "ATS Score",
+            "Batch ATS Score",
             "Improvement Tips",
             "Skill Upgrade Suggestions",
-            "Job Role Roadmap"
+            "Job Role Roadmap",
+            "Full Report",
+            "Candidate Analytics"
         ]
     )
+    st.markdown("---")
+    stream_responses = st.checkbox("Stream responses", value=True, help="Show long answers as they are generated")
+    bypass_cache = st.checkbox("Bypass response cache", help="Always request a fresh answer from the model")
+    cache_stats = response_cache.stats()
+    st.caption(f"Response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['entries']} stored")
+    speculate = st.checkbox(
+        "Precompute in background", value=SPECULATE,
+        help="Start extraction and job-description-only answers as soon as their inputs are entered"
+    )
+    if speculate and speculator.hit_rate() is not None:
+        counts = speculator.counts
+        st.caption(f"Precompute: {speculator.hit_rate():.0%} of clicks found results ready "
+                   f"({counts['hit']} ready, {counts['pending']} still running, {counts['miss']} missed)")
+startup_profiler.mark("sidebar")
 
 if page == "Resume Parser":
     page_resume_parser()
 elif page == "ATS Score":
     page_ats_score()
+elif page == "Batch ATS Score":
+    page_batch_ats_score()
 elif page == "Improvement Tips":
     page_improvement_tips()
 elif page == "Skill Upgrade Suggestions":
     page_skill_upgrade()
 elif page == "Job Role Roadmap":
-    page_job_roadmap()
\ No newline at end of file
+    page_job_roadmap()
+elif page == "Full Report":
+    page_full_report()
+elif page == "Candidate Analytics":
+    page_candidate_analytics()
+startup_profiler.mark(f"page: {page}")
+
+with st.sidebar:
+    if compaction_log:
+        with st.expander("🗜️ Prompt compaction", expanded=False):
+            for entry in list(compaction_log)[-5:]:
+                st.caption(
+                    f"{entry['label']}: {entry['original_tokens']} → {entry['tokens']} tokens "
+                    f"(saved {entry['saved_tokens']})"
+                )
+    
+    perf_records = st.session_state.perf_records
+    if perf_records:
+        with st.expander("⏱️ Performance", expanded=False):
+            breakdown = {}
+            for record in perf_records:
+                row = breakdown.setdefault(record["stage"], {
+                    "Stage": record["stage"], "Calls": 0, "Total s": 0.0, "Nested s": 0.0,
+                    "Prompt tokens": 0, "Completion tokens": 0, "Cache hits": 0, "Retries": 0,
+                })
+                row["Calls"] += 1
+                # Time inside another stage (an LLM call inside its route) is already in that stage's total
+                row["Nested s" if record.get("parent") else "Total s"] += record["duration"]
+                row["Prompt tokens"] += record["prompt_tokens"] or 0
+                row["Completion tokens"] += record["completion_tokens"] or 0
+                row["Cache hits"] += record["cache"] == "hit"
+                row["Retries"] += record["retries"] or 0
+            for row in breakdown.values():
+                row["Total s"] = round(row["Total s"], 2)
+                row["Nested s"] = round(row["Nested s"], 2)
+            st.dataframe(list(breakdown.values()), hide_index=True, use_container_width=True)
+            st.caption(f"Total: {sum(row['Total s'] for row in breakdown.values()):.2f} s "
+                       "(nested stages are counted in the stage around them)")
+            st.caption("Most recent calls")
+            st.dataframe(
+                [
+                    {
+                        "Stage": r["stage"],
+                        "Seconds": r["duration"],
+                        "Model": r["model"] or "",
+                        "Tokens": (r["prompt_tokens"] or 0) + (r["completion_tokens"] or 0),
+                        "Cache": r["cache"] or "",
+                        "Retries": r["retries"],
+                    }
+                    for r in list(reversed(perf_records))[:10]
+                ],
+                hide_index=True,
+                use_container_width=True,
+            )
+
+startup_profiler.mark("sidebar panels")
+startup_profiler.report()
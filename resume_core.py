@@ -0,0 +1,531 @@
+import collections
+import os
+import re
+import threading
+import time
+
+from chunked_parsing import parse_in_chunks, should_chunk
+from extraction_cache import ExtractionCache
+from groq_transport import GROQ_BASE_URL, create_async_client, create_client, retry_policy
+from instrumentation import metrics, timed_stage, usage_tokens
+from llm_cache import ResponseCache
+from model_routing import DEFAULT_MODEL, get_route
+from pdf_extraction import iter_page_texts, resolve_backend
+from prompt_compaction import compact_text
+
+client = None
+async_client = None
+_client_config = None
+_client_factory = None
+_client_lock = threading.Lock()
+response_cache = ResponseCache()
+
+def configure_client(api_key=None, base_url=GROQ_BASE_URL, factory=None):
+    """Set the Groq credentials; the clients are created on the first model call
+
+    `factory`, if given, is called instead of building new clients and must
+    return (client, async_client), e.g. from a process-wide resource cache.
+    """
+    global client, async_client, _client_config, _client_factory
+    config = (api_key or os.environ.get("GROQ_API_KEY"), base_url)
+    if config != _client_config:
+        client = async_client = None
+        _client_config = config
+    _client_factory = factory
+
+def _build_clients():
+    global client, async_client
+    with _client_lock:
+        if client is not None and async_client is not None:
+            return
+        if _client_config is None:
+            configure_client()
+        if _client_factory is not None:
+            client, async_client = _client_factory()
+        else:
+            client = create_client(*_client_config)
+            async_client = create_async_client(*_client_config)
+
+def get_client():
+    """Return the shared Groq client, creating it on first use"""
+    if client is None:
+        _build_clients()
+    return client
+
+def get_async_client():
+    """Return the shared async Groq client, creating it on first use"""
+    if async_client is None:
+        _build_clients()
+    return async_client
+
+# Set RESUME_ANA_JSON_MODE=0 to stop requesting response_format=json_object
+JSON_MODE = os.environ.get("RESUME_ANA_JSON_MODE", "1") != "0"
+# Models whose endpoint rejected JSON mode; they are asked for plain text instead
+_json_mode_unsupported = set()
+_JSON_MODE_ERROR_RE = re.compile(r"response_format|json[ _-]?(mode|object)", re.IGNORECASE)
+
+def _completion_kwargs(prompt, temperature, model, json_mode):
+    kwargs = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": temperature,
+    }
+    if json_mode and JSON_MODE and model not in _json_mode_unsupported:
+        kwargs["response_format"] = {"type": "json_object"}
+    return kwargs
+
+def _json_mode_fallback(error, model):
+    """Recover from a rejected JSON-mode request without asking the model again
+
+    Groq returns the model's output as `failed_generation` when it is not
+    valid JSON; that text is returned so it can be repaired locally. A
+    rejection that names response_format or JSON mode means the endpoint
+    does not support it for this model, which is remembered, and None is
+    returned so the caller retries without it. Any other bad request, such
+    as a prompt over the context length, is re-raised.
+    """
+    body = error.body if isinstance(error.body, dict) else {}
+    details = body.get("error", body)
+    failed_generation = details.get("failed_generation") if isinstance(details, dict) else None
+    if failed_generation:
+        return failed_generation
+    message = str(details.get("message", "")) if isinstance(details, dict) else ""
+    if not _JSON_MODE_ERROR_RE.search(f"{message} {error}"):
+        raise error
+    _json_mode_unsupported.add(model)
+    return None
+
+def _retry_counter(stage):
+    def on_retry(attempt, error, delay):
+        stage["retries"] = stage.get("retries", 0) + 1
+    return on_retry
+
+def _record_usage(stage, usage):
+    stage["prompt_tokens"], stage["completion_tokens"] = usage_tokens(usage)
+
+def chat_completion(prompt, temperature, model=DEFAULT_MODEL, use_cache=True, json_mode=False,
+                    label="completion", usage=None):
+    """Send a single-message chat completion, serving repeats from the response cache
+
+    If `usage` is a dict it receives the stage record's token counts and cache status.
+    """
+    with timed_stage(label, model=model, cache="miss" if use_cache else "bypass") as stage:
+        if use_cache:
+            cached = response_cache.get(model, prompt, temperature)
+            if cached is not None:
+                stage["cache"] = "hit"
+                if usage is not None:
+                    usage.update(stage)
+                return cached
+        from openai import BadRequestError
+        kwargs = _completion_kwargs(prompt, temperature, model, json_mode)
+        create = get_client().chat.completions.create
+        try:
+            response = retry_policy.call(create, on_retry=_retry_counter(stage), **kwargs)
+        except BadRequestError as e:
+            if "response_format" not in kwargs:
+                raise
+            response = _json_mode_fallback(e, model)
+            if response is None:
+                kwargs.pop("response_format")
+                response = retry_policy.call(create, on_retry=_retry_counter(stage), **kwargs)
+        if isinstance(response, str):
+            content = response.strip()
+        else:
+            content = response.choices[0].message.content.strip()
+            _record_usage(stage, response.usage)
+        # Bypassing the cache still refreshes it with the new answer
+        response_cache.put(model, prompt, temperature, content)
+        if usage is not None:
+            usage.update(stage)
+        return content
+
+async def async_chat_completion(prompt, temperature, model=DEFAULT_MODEL, use_cache=True, json_mode=False,
+                                label="completion"):
+    """Async version of chat_completion on the shared async client"""
+    with timed_stage(label, model=model, cache="miss" if use_cache else "bypass") as stage:
+        if use_cache:
+            cached = response_cache.get(model, prompt, temperature)
+            if cached is not None:
+                stage["cache"] = "hit"
+                return cached
+        from openai import BadRequestError
+        kwargs = _completion_kwargs(prompt, temperature, model, json_mode)
+        create = get_async_client().chat.completions.create
+        try:
+            response = await retry_policy.acall(create, on_retry=_retry_counter(stage), **kwargs)
+        except BadRequestError as e:
+            if "response_format" not in kwargs:
+                raise
+            response = _json_mode_fallback(e, model)
+            if response is None:
+                kwargs.pop("response_format")
+                response = await retry_policy.acall(create, on_retry=_retry_counter(stage), **kwargs)
+        if isinstance(response, str):
+            content = response.strip()
+        else:
+            content = response.choices[0].message.content.strip()
+            _record_usage(stage, response.usage)
+        response_cache.put(model, prompt, temperature, content)
+        return content
+
+def _chunk_usage(chunk):
+    # OpenAI puts usage on the final chunk; Groq reports it under x_groq
+    usage = getattr(chunk, "usage", None)
+    if usage is None:
+        x_groq = getattr(chunk, "x_groq", None)
+        usage = x_groq.get("usage") if isinstance(x_groq, dict) else getattr(x_groq, "usage", None)
+    return usage
+
+class CompletionStream:
+    """Iterate over a streamed chat completion, recording latency as tokens arrive
+
+    After iteration, `text` holds the full reply and `time_to_first_token` /
+    `total_time` hold the measured latencies in seconds. A cache hit yields
+    the stored reply as a single chunk. With a cascade `route`, a streamed
+    answer that fails validation is replaced in `text` by the larger
+    model's answer and `escalated` is set.
+    """
+    def __init__(self, prompt, temperature, model=DEFAULT_MODEL, use_cache=True, label="completion",
+                 json_mode=False, route=None, context=None):
+        self.prompt = prompt
+        self.temperature = temperature
+        self.model = model
+        self.use_cache = use_cache
+        self.label = label
+        self.json_mode = json_mode
+        self.route = route
+        self.context = context
+        self.text = ""
+        self.cached = False
+        self.escalated = False
+        self.usage = {}
+        self.time_to_first_token = None
+        self.total_time = None
+    
+    def __iter__(self):
+        if self.route is None:
+            yield from self._stream()
+            return
+        with timed_stage("route", task=self.route.task, model=self.model, escalated=False, streamed=True) as info:
+            yield from self._stream()
+            _add_route_tokens(info, self.usage)
+            reason = self.route.check(self.text, self.context)
+            if reason:
+                self.text = _escalate(self.route, self.prompt, self.use_cache, info, reason)
+                self.escalated = True
+            _count_route(info)
+    
+    def _stream(self):
+        start = time.perf_counter()
+        with timed_stage(self.label, model=self.model, cache="miss" if self.use_cache else "bypass",
+                         streamed=True) as stage:
+            if self.use_cache:
+                cached = response_cache.get(self.model, self.prompt, self.temperature)
+                if cached is not None:
+                    stage["cache"] = "hit"
+                    self.cached = True
+                    self.text = cached
+                    self.time_to_first_token = self.total_time = time.perf_counter() - start
+                    self.usage = dict(stage)
+                    yield cached
+                    return
+            
+            from openai import BadRequestError
+            kwargs = _completion_kwargs(self.prompt, self.temperature, self.model, self.json_mode)
+            create = get_client().chat.completions.create
+            try:
+                response = retry_policy.call(create, stream=True, on_retry=_retry_counter(stage), **kwargs)
+            except BadRequestError as e:
+                if "response_format" not in kwargs:
+                    raise
+                failed_generation = _json_mode_fallback(e, self.model)
+                if failed_generation is not None:
+                    response = [failed_generation]
+                else:
+                    kwargs.pop("response_format")
+                    response = retry_policy.call(create, stream=True, on_retry=_retry_counter(stage), **kwargs)
+            parts = []
+            for chunk in response:
+                if isinstance(chunk, str):
+                    delta = chunk
+                else:
+                    usage = _chunk_usage(chunk)
+                    if usage is not None:
+                        _record_usage(stage, usage)
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if self.time_to_first_token is None:
+                    self.time_to_first_token = time.perf_counter() - start
+                    stage["time_to_first_token"] = round(self.time_to_first_token, 4)
+                parts.append(delta)
+                yield delta
+            self.total_time = time.perf_counter() - start
+            self.text = "".join(parts).strip()
+            response_cache.put(self.model, self.prompt, self.temperature, self.text)
+            self.usage = dict(stage)
+
+def _add_route_tokens(info, usage):
+    tokens = (usage.get("prompt_tokens") or 0) + (usage.get("completion_tokens") or 0)
+    info["tokens"] = info.get("tokens", 0) + tokens
+
+def _escalate(route, prompt, use_cache, info, reason):
+    """Re-ask a prompt whose fast answer failed validation on the route's larger model"""
+    usage = {}
+    text = chat_completion(prompt, route.temperature, route.escalate_to, use_cache, route.json_mode,
+                           label=f"{route.task}_escalated", usage=usage)
+    _add_route_tokens(info, usage)
+    info.update(model=route.escalate_to, escalated=True, reason=reason)
+    return text
+
+def _count_route(info):
+    metrics.inc("resume_ana_route_calls_total", help_text="Routed model calls by task, answering model and escalation",
+                task=info["task"], model=info["model"], escalated=str(info["escalated"]).lower())
+
+def routed_completion(task, prompt, use_cache=True, stream=False, context=None):
+    """Answer a task's prompt with the model and parameters its route assigns
+
+    In cascade mode the fast model answers first; an answer that fails the
+    task's validation is sent again to the larger model. Every call is
+    recorded as a "route" stage with the answering model, total tokens and
+    whether it escalated. `context` carries inputs the validator may use.
+    """
+    route = get_route(task)
+    if stream:
+        return CompletionStream(prompt, route.temperature, model=route.model, use_cache=use_cache, label=task,
+                                json_mode=route.json_mode, route=route, context=context)
+    with timed_stage("route", task=task, model=route.model, escalated=False) as info:
+        usage = {}
+        text = chat_completion(prompt, route.temperature, route.model, use_cache, route.json_mode,
+                               label=task, usage=usage)
+        _add_route_tokens(info, usage)
+        reason = route.check(text, context)
+        if reason:
+            text = _escalate(route, prompt, use_cache, info, reason)
+        _count_route(info)
+    return text
+
+# Set RESUME_ANA_PROMPT_COMPACTION=0 to embed documents in prompts verbatim
+PROMPT_COMPACTION = os.environ.get("RESUME_ANA_PROMPT_COMPACTION", "1") != "0"
+# Token savings of recent prompt compactions, newest last
+compaction_log = collections.deque(maxlen=200)
+
+def compact_for_prompt(text, prompt_type, label):
+    """Shrink a document to its prompt type's token budget and log the savings"""
+    if not PROMPT_COMPACTION:
+        return text
+    result = compact_text(text, prompt_type)
+    compaction_log.append({
+        "label": label,
+        "original_tokens": result.original_tokens,
+        "tokens": result.tokens,
+        "saved_tokens": result.saved_tokens,
+        "dropped_sections": result.dropped_sections,
+    })
+    return result.text
+
+def jd_for_prompt(job_description, label):
+    """Return the text that stands for a job description in prompts: its compiled profile by default
+
+    The profile is compiled once per job description, so scoring many
+    resumes against one JD only pays for the compact profile each time.
+    """
+    from jd_profile import USE_JD_PROFILE, get_jd_profile
+
+    if not USE_JD_PROFILE:
+        return compact_for_prompt(job_description, "job_description", label)
+    profile = get_jd_profile(job_description)
+    compaction_log.append({
+        "label": label,
+        "original_tokens": profile.original_tokens,
+        "tokens": profile.tokens,
+        "saved_tokens": max(0, profile.original_tokens - profile.tokens),
+        "dropped_sections": [],
+    })
+    return profile.prompt_text
+
+# Bump whenever extraction output changes so stale cache entries are ignored
+EXTRACTOR_VERSION = 2
+extraction_cache = ExtractionCache()
+
+def read_pdf_bytes(uploaded_file):
+    """Return the raw bytes of an uploaded file, file object, path or bytes"""
+    if isinstance(uploaded_file, (bytes, bytearray)):
+        return bytes(uploaded_file)
+    if isinstance(uploaded_file, (str, os.PathLike)):
+        with open(uploaded_file, "rb") as f:
+            return f.read()
+    if hasattr(uploaded_file, "getvalue"):
+        return uploaded_file.getvalue()
+    uploaded_file.seek(0)
+    return uploaded_file.read()
+
+def stream_text_from_pdf(uploaded_file):
+    """Yield resume text page by page, caching the full text once complete"""
+    with timed_stage("extract", cache="miss") as stage:
+        file_bytes = read_pdf_bytes(uploaded_file)
+        stage["bytes"] = len(file_bytes)
+        # Resolved here rather than at import, so a bad RESUME_ANA_PDF_BACKEND is reported where it is used
+        cache_key = extraction_cache.make_key(file_bytes, f"{resolve_backend()}-{EXTRACTOR_VERSION}")
+        cached_text = extraction_cache.get(cache_key)
+        if cached_text is not None:
+            stage["cache"] = "hit"
+            yield cached_text
+            return
+        
+        pages = []
+        for page_text in iter_page_texts(file_bytes, info=stage):
+            pages.append(page_text + "\n")
+            yield pages[-1]
+        stage["pages"] = len(pages)
+        extraction_cache.put(cache_key, "".join(pages))
+
+def extract_text_from_pdf(uploaded_file):
+    return "".join(stream_text_from_pdf(uploaded_file))
+
+def get_resume_details(resume_text, use_cache=True, chunked=None):
+    """Parse a resume into JSON, chunk by chunk for long resumes
+
+    `chunked` forces chunked parsing on or off; by default it follows
+    RESUME_ANA_CHUNKED_PARSE.
+    """
+    if chunked is None:
+        chunked = should_chunk(resume_text)
+    if chunked:
+        parsed = parse_in_chunks(resume_text, lambda prompt, field: routed_completion(
+            "parse_section", prompt, use_cache=use_cache, context={"field": field}))
+        if parsed is not None:
+            return parsed
+    resume_text = compact_for_prompt(resume_text, "parse", "parse")
+    prompt = f"""
+You are a smart AI resume parser. Extract the following from the resume:
+
+- Full Name
+- Email
+- Phone Number
+- Education
+- Work Experience
+- Skills
+- Certifications
+
+IMPORTANT: Return ONLY a valid JSON object with the following structure:
+{{
+    "full_name": "John Doe",
+    "email": "john.doe@email.com",
+    "phone": "+1-234-567-8900",
+    "education": [
+        {{
+            "degree": "Bachelor of Science in Computer Science",
+            "institution": "University Name",
+            "year": "2020"
+        }}
+    ],
+    "work_experience": [
+        {{
+            "job_title": "Software Engineer",
+            "company": "Company Name",
+            "duration": "2020-2023",
+            "responsibilities": ["Task 1", "Task 2"]
+        }}
+    ],
+    "skills": ["Python", "JavaScript", "React"],
+    "certifications": ["AWS Certified", "Google Cloud"]
+}}
+
+Resume:
+\"\"\"{resume_text}\"\"\"
+"""
+    return routed_completion("parse", prompt, use_cache=use_cache)
+
+def calculate_ats_score(resume_text, job_description, use_cache=True, stream=False):
+    context = {"resume_text": resume_text, "job_description": job_description}
+    resume_text = compact_for_prompt(resume_text, "ats", "ats")
+    job_description = jd_for_prompt(job_description, "ats_job_description")
+    prompt = f"""
+You are an expert ATS (Applicant Tracking System) analyzer. Compare the resume with the job description and provide:
+
+1. ATS Score (0-100): Based on keyword matching, skills alignment, and experience relevance
+2. Matched Keywords: List keywords from job description found in resume
+3. Missing Keywords: Critical keywords from job description missing in resume
+4. Skills Gap Analysis: What skills are required but missing
+5. Experience Alignment: How well the experience matches job requirements
+6. Overall Assessment: Brief summary of candidacy strength
+
+Provide scoring criteria:
+- 90-100: Excellent match, highly likely to pass ATS
+- 80-89: Good match, likely to pass ATS with minor gaps
+- 70-79: Fair match, moderate chance with some improvements needed
+- 60-69: Below average, significant improvements required
+- Below 60: Poor match, major changes needed
+
+IMPORTANT: Return ONLY a valid JSON object with the following structure (no additional text or formatting):
+{{
+    "ats_score": 75,
+    "score_category": "Fair",
+    "matched_keywords": ["keyword1", "keyword2"],
+    "missing_keywords": ["keyword3", "keyword4"],
+    "skills_gap": ["skill1", "skill2"],
+    "experience_alignment": "Brief assessment text",
+    "overall_assessment": "Summary text",
+    "recommendations": ["suggestion1", "suggestion2"]
+}}
+
+Job Description:
+\"\"\"{job_description}\"\"\"
+
+Resume:
+\"\"\"{resume_text}\"\"\"
+"""
+    return routed_completion("ats", prompt, use_cache=use_cache, stream=stream, context=context)
+
+def get_resume_improvement_suggestions(resume_text, ats_analysis, use_cache=True, stream=False):
+    resume_text = compact_for_prompt(resume_text, "improvements", "improvements")
+    prompt = f"""
+Based on the ATS analysis provided, give specific, actionable recommendations to improve the resume:
+
+1. Keyword Optimization: Specific keywords to add and where
+2. Skills Enhancement: What skills to highlight or add
+3. Experience Formatting: How to better present work experience
+4. Content Structure: Improvements to resume layout and sections
+5. Industry-Specific Tips: Tailored advice for the target role
+
+Make recommendations practical and specific. Focus on:
+- Adding missing keywords naturally
+- Improving existing content rather than fabricating experience
+- ATS-friendly formatting suggestions
+- Quantifying achievements where possible
+
+ATS Analysis:
+\"\"\"{ats_analysis}\"\"\"
+
+Resume:
+\"\"\"{resume_text}\"\"\"
+
+Return actionable recommendations in a clear, numbered format.
+"""
+    return routed_completion("improvements", prompt, use_cache=use_cache, stream=stream)
+
+def get_skill_upgrade_suggestions(job_description, use_cache=True, stream=False):
+    job_description = jd_for_prompt(job_description, "skills")
+    prompt = f"""
+You are a career coach and skill development expert. Based on the following job description, suggest a list of technical and soft skills that a candidate should consider upgrading or learning to be a strong fit for this role. For each skill, briefly explain why it is important for the job.
+
+Job Description:
+\"\"\"{job_description}\"\"\"
+
+Return your suggestions as a numbered list, each with a skill and a short explanation.
+"""
+    return routed_completion("skills", prompt, use_cache=use_cache, stream=stream)
+
+def get_job_role_roadmap(job_description, use_cache=True, stream=False):
+    job_description = jd_for_prompt(job_description, "roadmap")
+    prompt = f"""
+You are a career advisor. Based on the following job description, provide a step-by-step career pathway (roadmap) for someone aspiring to excel in this role. Include recommended education, certifications, skill development, experience milestones, and networking or portfolio tips. Present the roadmap as a clear, numbered or bulleted list.
+
+Job Description:
+\"\"\"{job_description}\"\"\"
+"""
+    return routed_completion("roadmap", prompt, use_cache=use_cache, stream=stream)
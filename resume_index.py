@@ -0,0 +1,332 @@
+"""Vector index for retrieving the resumes closest to a job description
+
+    python resume_index.py add resumes/*.pdf
+    python resume_index.py search job_description.txt -k 20
+    python batch_ats.py job_description.txt $(python resume_index.py search job_description.txt -k 20 --paths)
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+
+import numpy as np
+
+from extraction_cache import DEFAULT_CACHE_DIR
+from instrumentation import timed_stage
+from keyword_matcher import COMMON_JOB_TERMS, STOPWORDS, TAXONOMY_IDF, count_skills, tokenize
+
+DEFAULT_INDEX_DIR = os.environ.get("RESUME_ANA_INDEX_DIR", os.path.join(DEFAULT_CACHE_DIR, "resume_index"))
+# Width of the hashed feature space; changing it needs a fresh index directory
+EMBEDDING_DIM = int(os.environ.get("RESUME_ANA_INDEX_DIM", 1024))
+# Below this many resumes every search scans the whole matrix, which is already sub-millisecond
+EXACT_SEARCH_LIMIT = int(os.environ.get("RESUME_ANA_INDEX_EXACT_LIMIT", 4096))
+# Clusters probed per query once the index is partitioned; more is slower but closer to exact
+DEFAULT_NPROBE = int(os.environ.get("RESUME_ANA_INDEX_NPROBE", 8))
+KMEANS_ITERATIONS = 8
+KMEANS_SAMPLE = 20000
+INITIAL_CAPACITY = 1024
+INDEX_VERSION = 1
+
+
+def resume_id(text):
+    """Identify a resume by its extracted text, so re-indexing the same resume replaces it"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _feature_slot(feature, dim):
+    # crc32 rather than hash() so slots are stable across processes
+    h = zlib.crc32(feature.encode("utf-8"))
+    return h % dim, 1.0 if (h // dim) & 1 else -1.0
+
+
+def _content_features(text):
+    """Return a Counter of weighted features: taxonomy skills, unigrams and bigrams"""
+    tokens = tokenize(text)
+    features = Counter({"skill:" + skill: n for skill, n in count_skills(tokens).items()})
+    words = [token if token not in STOPWORDS and len(token) > 1 else None for token in tokens]
+    for i, word in enumerate(words):
+        if word is None:
+            continue
+        features[word] += 1
+        if i + 1 < len(words) and words[i + 1] is not None:
+            features[f"{word} {words[i + 1]}"] += 1
+    return features
+
+
+def embed_text(text, dim=EMBEDDING_DIM):
+    """Embed text as an L2-normalised float32 vector of hashed, sublinear term frequencies
+
+    Taxonomy skills are boosted the same way the keyword matcher weights
+    them and boilerplate job-ad vocabulary is damped. Corpus IDF is applied
+    at query time (see ResumeIndex.search) so stored vectors never change.
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature, tf in _content_features(text).items():
+        weight = 1.0 + math.log(tf)
+        if feature.startswith("skill:"):
+            weight *= TAXONOMY_IDF
+        elif all(word in COMMON_JOB_TERMS for word in feature.split()):
+            weight *= 0.2
+        slot, sign = _feature_slot(feature, dim)
+        vector[slot] += sign * weight
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector
+
+
+def _spherical_kmeans(vectors, clusters, iterations=KMEANS_ITERATIONS, seed=0):
+    """Cluster unit vectors by cosine similarity; returns normalised centroids"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        # Re-seed clusters that lost every member
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        norms[empty] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids
+
+
+class ResumeIndex:
+    """Append-only resume vectors in a memory-mapped float32 matrix with an IVF search
+
+    Rows live in `vectors.f32` (grown in place, so inserts never copy the
+    matrix) next to an append-only `ids.jsonl` and a small `meta.json`
+    written last, so a crash mid-insert leaves the previous state intact.
+    Once the index outgrows EXACT_SEARCH_LIMIT it is partitioned with
+    spherical k-means into about sqrt(n) clusters and queries only scan the
+    clusters nearest to them; new rows join their nearest cluster and the
+    partition is retrained whenever the index has doubled since the last
+    training. One process should write to an index at a time.
+    """
+
+    def __init__(self, index_dir=None, dim=EMBEDDING_DIM):
+        self.index_dir = index_dir or DEFAULT_INDEX_DIR
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.dim = dim
+        self.count = 0
+        self.capacity = 0
+        self.trained_count = 0
+        self.ids = []
+        self.labels = []
+        self.rows = {}
+        self.centroids = None
+        self._members = None
+        meta = self._read_json(self._path("meta.json"))
+        if meta:
+            if meta["dim"] != dim:
+                raise ValueError(f"Index at {self.index_dir} has dim {meta['dim']}, expected {dim}")
+            self.count = meta["count"]
+            self.trained_count = meta["trained_count"]
+        self._open(max(self.count, INITIAL_CAPACITY))
+        self.doc_freq = np.zeros(dim, dtype=np.float64)
+        if self.count:
+            self._load_ids()
+            self.doc_freq = np.count_nonzero(self.vectors[:self.count], axis=0).astype(np.float64)
+        if self.trained_count and os.path.exists(self._path("centroids.npy")):
+            self.centroids = np.load(self._path("centroids.npy"))
+            self._rebuild_members()
+
+    def __len__(self):
+        return self.count
+
+    def _path(self, name):
+        return os.path.join(self.index_dir, name)
+
+    @staticmethod
+    def _read_json(path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _open(self, capacity):
+        """Map the vector and cluster files, growing them to hold `capacity` rows"""
+        for name, row_bytes in (("vectors.f32", self.dim * 4), ("clusters.i32", 4)):
+            path = self._path(name)
+            with open(path, "ab") as f:
+                if f.tell() < capacity * row_bytes:
+                    f.truncate(capacity * row_bytes)
+        self.capacity = capacity
+        self.vectors = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode="r+",
+                                 shape=(capacity, self.dim))
+        self.clusters = np.memmap(self._path("clusters.i32"), dtype=np.int32, mode="r+", shape=(capacity,))
+
+    def _load_ids(self):
+        self.ids = [None] * self.count
+        self.labels = [None] * self.count
+        with open(self._path("ids.jsonl"), encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                # Lines past `count` belong to an insert that never committed its metadata
+                if entry["row"] < self.count:
+                    self.ids[entry["row"]] = entry["id"]
+                    self.labels[entry["row"]] = entry["label"]
+        self.rows = {resume_id: row for row, resume_id in enumerate(self.ids)}
+
+    def _write_meta(self):
+        meta = {"version": INDEX_VERSION, "dim": self.dim, "count": self.count,
+                "trained_count": self.trained_count}
+        tmp_path = self._path("meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._path("meta.json"))
+
+    def _rebuild_members(self):
+        clusters = np.asarray(self.clusters[:self.count])
+        order = np.argsort(clusters, kind="stable")
+        bounds = np.searchsorted(clusters[order], np.arange(len(self.centroids) + 1))
+        self._members = [list(order[bounds[i]:bounds[i + 1]]) for i in range(len(self.centroids))]
+
+    def add(self, resume_id, text, label=None):
+        """Insert or replace one resume; returns its row number"""
+        vector = embed_text(text, self.dim)
+        with self._lock:
+            row = self.rows.get(resume_id)
+            if row is not None:
+                self.doc_freq -= self.vectors[row] != 0
+                if self._members is not None:
+                    self._members[self.clusters[row]].remove(row)
+            else:
+                row = self.count
+                if row >= self.capacity:
+                    self.vectors.flush()
+                    self._open(self.capacity * 2)
+            self.vectors[row] = vector
+            self.doc_freq += vector != 0
+            if self.centroids is not None:
+                cluster = int(np.argmax(self.centroids @ vector))
+                self.clusters[row] = cluster
+                self._members[cluster].append(row)
+            self.vectors.flush()
+            self.clusters.flush()
+            with open(self._path("ids.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps({"row": row, "id": resume_id, "label": label}) + "\n")
+            if row == self.count:
+                self.count += 1
+                self.ids.append(resume_id)
+                self.labels.append(label)
+            else:
+                self.labels[row] = label
+            self.rows[resume_id] = row
+            if self.count > EXACT_SEARCH_LIMIT and self.count >= 2 * max(self.trained_count, EXACT_SEARCH_LIMIT // 2):
+                self._train()
+            self._write_meta()
+        return row
+
+    def train(self, clusters=None):
+        """Partition the index for approximate search (done automatically as it grows)"""
+        with self._lock:
+            self._train(clusters)
+            self._write_meta()
+
+    def _train(self, clusters=None):
+        if self.count < 2:
+            return
+        clusters = min(self.count, clusters or max(1, int(math.sqrt(self.count))))
+        vectors = self.vectors[:self.count]
+        if self.count > KMEANS_SAMPLE:
+            sample = np.random.default_rng(0).choice(self.count, KMEANS_SAMPLE, replace=False)
+            training = np.asarray(vectors[np.sort(sample)])
+        else:
+            training = np.asarray(vectors)
+        self.centroids = _spherical_kmeans(training, clusters)
+        for start in range(0, self.count, 8192):
+            block = np.asarray(vectors[start:start + 8192])
+            self.clusters[start:start + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+        self.clusters.flush()
+        np.save(self._path("centroids.npy"), self.centroids)
+        self.trained_count = self.count
+        self._rebuild_members()
+
+    def _query_vector(self, text):
+        """Embed a query and fold in corpus IDF (squared, since documents carry none)"""
+        query = embed_text(text, self.dim)
+        idf = np.log((1.0 + self.count) / (1.0 + self.doc_freq)) + 1.0
+        query = query * (idf * idf).astype(np.float32)
+        norm = np.linalg.norm(query)
+        return query / norm if norm else query
+
+    def search(self, text, k=10, nprobe=DEFAULT_NPROBE, exact=False):
+        """Return up to k {"id", "label", "score"} dicts for the resumes closest to `text`"""
+        with timed_stage("index_search") as info, self._lock:
+            if not self.count:
+                return []
+            query = self._query_vector(text)
+            if exact or self._members is None or self.count <= EXACT_SEARCH_LIMIT:
+                candidates = None
+                scores = self.vectors[:self.count] @ query
+            else:
+                probes = np.argsort(self.centroids @ query)[::-1][:nprobe]
+                candidates = np.concatenate([np.asarray(self._members[cluster], dtype=np.int64)
+                                             for cluster in probes])
+                scores = self.vectors[candidates] @ query
+            info["candidates"] = len(scores)
+            k = min(k, len(scores))
+            if not k:
+                return []
+            top = np.argpartition(scores, -k)[-k:]
+            top = top[np.argsort(scores[top])[::-1]]
+            rows = top if candidates is None else candidates[top]
+            return [{"id": self.ids[row], "label": self.labels[row], "score": round(float(scores[i]), 4)}
+                    for row, i in zip(rows, top)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index-dir", default=DEFAULT_INDEX_DIR, help="Directory holding the index files")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="Extract and index resumes")
+    add.add_argument("resumes", nargs="+", help="Resume PDF (or .txt) files")
+
+    search = commands.add_parser("search", help="Print the resumes closest to a job description")
+    search.add_argument("job_description", help="Path to a text file with the job description")
+    search.add_argument("-k", type=int, default=10, help="Number of resumes to return")
+    search.add_argument("--nprobe", type=int, default=DEFAULT_NPROBE, help="Clusters to scan per query")
+    search.add_argument("--exact", action="store_true", help="Scan every resume instead of the nearest clusters")
+    search.add_argument("--paths", action="store_true", help="Print only the resume paths, one per line")
+
+    commands.add_parser("train", help="Re-partition the index for approximate search")
+    args = parser.parse_args(argv)
+
+    index = ResumeIndex(args.index_dir)
+    if args.command == "add":
+        from resume_core import extract_text_from_pdf
+        for path in args.resumes:
+            if path.lower().endswith(".pdf"):
+                text = extract_text_from_pdf(path)
+            else:
+                with open(path, encoding="utf-8") as f:
+                    text = f.read()
+            index.add(resume_id(text), text, label=os.path.abspath(path))
+        print(f"Indexed {len(args.resumes)} resumes ({len(index)} in the index)", file=sys.stderr)
+    elif args.command == "search":
+        with open(args.job_description, encoding="utf-8") as f:
+            job_description = f.read()
+        start = time.perf_counter()
+        hits = index.search(job_description, args.k, args.nprobe, args.exact)
+        elapsed = time.perf_counter() - start
+        for hit in hits:
+            print(hit["label"] if args.paths else f"{hit['score']:.4f}  {hit['label'] or hit['id']}")
+        print(f"{len(hits)} of {len(index)} resumes in {elapsed * 1000:.1f} ms", file=sys.stderr)
+    elif args.command == "train":
+        index.train()
+        print(f"Partitioned {len(index)} resumes", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
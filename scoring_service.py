@@ -0,0 +1,332 @@
+"""Headless HTTP service for parsing, ATS scoring and full reports
+
+Run with:
+
+    GROQ_API_KEY=... python scoring_service.py --host 0.0.0.0 --port 8000
+"""
+import argparse
+import asyncio
+import base64
+import binascii
+import contextlib
+import functools
+import hmac
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from candidate_store import record_analysis
+from instrumentation import metrics, timed_stage
+from jd_profile import get_jd_profile
+from keyword_matcher import match_keywords
+from pdf_extraction import PdfExtractionError
+from report_pipeline import build_report
+from resume_core import calculate_ats_score, configure_client, extract_text_from_pdf, get_resume_details
+from structured_output import parse_json_response
+
+# Threads running blocking extraction and model calls
+SERVICE_WORKERS = int(os.environ.get("RESUME_ANA_SERVICE_WORKERS", 16))
+# Requests allowed to run at once, at most one per worker; a report holds one slot for all its stages
+MAX_CONCURRENT_REQUESTS = int(os.environ.get("RESUME_ANA_SERVICE_MAX_CONCURRENT", 0)) or None
+# Requests allowed to wait for a slot before new ones are rejected with 503
+MAX_QUEUED_REQUESTS = int(os.environ.get("RESUME_ANA_SERVICE_MAX_QUEUED", 64))
+REQUEST_TIMEOUT = float(os.environ.get("RESUME_ANA_SERVICE_TIMEOUT", 120))
+MAX_REQUEST_BYTES = int(os.environ.get("RESUME_ANA_SERVICE_MAX_BYTES", 10 * 1024 * 1024))
+# If set, requests must send "Authorization: Bearer <token>"
+SERVICE_TOKEN = os.environ.get("RESUME_ANA_SERVICE_TOKEN")
+# Seconds clients are told to wait after a 503
+OVERLOAD_RETRY_AFTER = 2
+
+
+class Overloaded(Exception):
+    """Raised when every slot is busy and the wait queue is full"""
+
+
+class AdmissionControl:
+    """Cap concurrent requests and shed load once too many are waiting
+
+    Requests over the concurrency limit wait in FIFO order; beyond
+    `max_queued` waiting requests, new ones fail fast so clients back off
+    instead of piling up behind work the service cannot finish in time.
+    """
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT_REQUESTS or SERVICE_WORKERS, max_queued=MAX_QUEUED_REQUESTS):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._semaphore = None
+
+    async def acquire(self):
+        if self._semaphore is None:
+            # Created here so it belongs to the server's event loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        if self.active >= self.max_concurrent and self.waiting >= self.max_queued:
+            self.rejected += 1
+            metrics.inc("resume_ana_service_rejected_total", help_text="Requests shed by admission control")
+            raise Overloaded()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self):
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+        }
+
+
+async def run_in_pool(request, func, *args):
+    """Run blocking work on the worker pool under admission control
+
+    The slot is held until the work itself finishes, even if the request
+    times out or the client goes away, so abandoned work still counts
+    against the limit.
+    """
+    admission = request.app.state.admission
+    try:
+        await admission.acquire()
+    except Overloaded:
+        raise HTTPException(503, "Service overloaded, retry later",
+                            headers={"Retry-After": str(OVERLOAD_RETRY_AFTER)})
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(request.app.state.executor, functools.partial(func, *args))
+    future.add_done_callback(lambda _: admission.release())
+    done, _ = await asyncio.wait({future}, timeout=REQUEST_TIMEOUT)
+    if not done:
+        raise HTTPException(504, f"Request did not finish within {REQUEST_TIMEOUT:g}s")
+    try:
+        return future.result()
+    except HTTPException:
+        raise
+    except Exception as e:
+        # Model failures are reported as a gateway error
+        raise HTTPException(502, f"{type(e).__name__}: {e}")
+
+
+def _check_token(request):
+    if not SERVICE_TOKEN:
+        return
+    header = request.headers.get("authorization", "")
+    if not hmac.compare_digest(header, f"Bearer {SERVICE_TOKEN}"):
+        raise HTTPException(401, "Missing or invalid bearer token")
+
+
+def _as_bool(value, default=True):
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() not in ("0", "false", "no")
+
+
+async def _read_body(request):
+    """Read the request body, rejecting it with 413 as soon as it passes MAX_REQUEST_BYTES
+
+    Content-Length is checked first, but the limit is also enforced while
+    reading, since chunked requests do not send it.
+    """
+    if int(request.headers.get("content-length") or 0) > MAX_REQUEST_BYTES:
+        raise HTTPException(413, f"Request body is larger than {MAX_REQUEST_BYTES} bytes")
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > MAX_REQUEST_BYTES:
+            raise HTTPException(413, f"Request body is larger than {MAX_REQUEST_BYTES} bytes")
+        chunks.append(chunk)
+    body = b"".join(chunks)
+    # Starlette's form() and json() read the cached body instead of the consumed stream
+    request._body = body
+    return body
+
+
+def _check_types(fields, names, types, description):
+    for name in names:
+        value = fields.get(name)
+        if value is not None and not isinstance(value, types):
+            raise HTTPException(422, f"{name} must be {description}")
+
+
+async def read_inputs(request, require_job_description):
+    """Return (resume_text, resume_pdf_bytes, job_description, use_cache) from JSON or multipart"""
+    _check_token(request)
+    body = await _read_body(request)
+    resume_pdf = None
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        form = await request.form(max_part_size=MAX_REQUEST_BYTES)
+        upload = form.get("resume")
+        if upload is not None and hasattr(upload, "read"):
+            resume_pdf = await upload.read()
+        fields = form
+    else:
+        try:
+            # ValueError covers both invalid JSON and a body that is not valid UTF-8
+            fields = json.loads(body)
+        except ValueError:
+            raise HTTPException(400, "Body must be JSON or multipart/form-data")
+        if not isinstance(fields, dict):
+            raise HTTPException(400, "JSON body must be an object")
+        _check_types(fields, ("resume_pdf_base64",), str, "a base64 string")
+        _check_types(fields, ("use_cache",), (bool, int, str), "a boolean")
+        if fields.get("resume_pdf_base64"):
+            try:
+                resume_pdf = base64.b64decode(fields["resume_pdf_base64"], validate=True)
+            except (binascii.Error, ValueError):
+                raise HTTPException(400, "resume_pdf_base64 is not valid base64")
+    _check_types(fields, ("resume_text", "job_description"), str, "a string")
+
+    resume_text = fields.get("resume_text") or None
+    job_description = (fields.get("job_description") or "").strip()
+    if resume_text is None and not resume_pdf:
+        raise HTTPException(422, "Provide resume_text, resume_pdf_base64 or a 'resume' file upload")
+    if require_job_description and not job_description:
+        raise HTTPException(422, "job_description is required")
+    return resume_text, resume_pdf, job_description, _as_bool(fields.get("use_cache"))
+
+
+def _resume_text(resume_text, resume_pdf):
+    if resume_text is not None:
+        return resume_text
+    try:
+        return extract_text_from_pdf(resume_pdf)
+    except PdfExtractionError as e:
+        raise HTTPException(422, f"Could not extract text from the resume: {e}")
+
+
+def _parse_or_raw(reply):
+    try:
+        return parse_json_response(reply)
+    except json.JSONDecodeError:
+        return {"raw": reply}
+
+
+def _parse(resume_text, resume_pdf, use_cache):
+    resume_text = _resume_text(resume_text, resume_pdf)
+    parsed = _parse_or_raw(get_resume_details(resume_text, use_cache=use_cache))
+    record_analysis(resume_text, parsed=parsed, source="service")
+    return {"resume": parsed}
+
+
+def _score(resume_text, resume_pdf, job_description, use_cache):
+    resume_text = _resume_text(resume_text, resume_pdf)
+    result = {
+        "ats": _parse_or_raw(calculate_ats_score(resume_text, job_description, use_cache=use_cache)),
+        "keyword_match": match_keywords(resume_text, job_description, get_jd_profile(job_description).keywords),
+    }
+    record_analysis(resume_text, job_description, ats=result["ats"], keyword_match=result["keyword_match"],
+                    source="service")
+    return result
+
+
+def _report(resume_text, resume_pdf, job_description, use_cache):
+    resume_text = _resume_text(resume_text, resume_pdf)
+    run = build_report(resume_text, job_description, use_cache=use_cache)
+    results = dict(run.results)
+    for name in ("parse", "ats"):
+        if name in results:
+            results[name] = _parse_or_raw(results[name])
+    record_analysis(resume_text, job_description, parsed=results.get("parse"), ats=results.get("ats"),
+                    source="service")
+    return {
+        "report": results,
+        "errors": run.errors,
+        "timings": {name: round(end - start, 3) for name, (start, end) in run.timings.items()},
+        "wall_time": round(run.wall_time, 3),
+    }
+
+
+async def parse_endpoint(request):
+    resume_text, resume_pdf, _, use_cache = await read_inputs(request, require_job_description=False)
+    with timed_stage("service_parse"):
+        return JSONResponse(await run_in_pool(request, _parse, resume_text, resume_pdf, use_cache))
+
+
+async def score_endpoint(request):
+    resume_text, resume_pdf, job_description, use_cache = await read_inputs(request, require_job_description=True)
+    with timed_stage("service_score"):
+        return JSONResponse(await run_in_pool(request, _score, resume_text, resume_pdf, job_description, use_cache))
+
+
+async def report_endpoint(request):
+    resume_text, resume_pdf, job_description, use_cache = await read_inputs(request, require_job_description=True)
+    with timed_stage("service_report"):
+        return JSONResponse(await run_in_pool(request, _report, resume_text, resume_pdf, job_description, use_cache))
+
+
+async def health_endpoint(request):
+    return JSONResponse({"status": "ok", **request.app.state.admission.stats()})
+
+
+async def metrics_endpoint(request):
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+async def http_error(request, exc):
+    return JSONResponse({"error": exc.detail}, status_code=exc.status_code, headers=exc.headers)
+
+
+
+def create_app(workers=SERVICE_WORKERS, max_concurrent=MAX_CONCURRENT_REQUESTS, max_queued=MAX_QUEUED_REQUESTS):
+    """Build the service; the worker pool lives for the lifetime of the app
+
+    `max_concurrent` defaults to, and is capped at, `workers`: a request
+    admitted without a free thread would only wait in the pool's queue,
+    out of reach of admission control's load shedding.
+    """
+    max_concurrent = min(max_concurrent or workers, workers)
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        configure_client()
+        app.state.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scoring")
+        app.state.admission = AdmissionControl(max_concurrent, max_queued)
+        try:
+            yield
+        finally:
+            app.state.executor.shutdown(wait=False, cancel_futures=True)
+
+    return Starlette(
+        routes=[
+            Route("/parse", parse_endpoint, methods=["POST"]),
+            Route("/score", score_endpoint, methods=["POST"]),
+            Route("/report", report_endpoint, methods=["POST"]),
+            Route("/healthz", health_endpoint),
+            Route("/metrics", metrics_endpoint),
+        ],
+        exception_handlers={HTTPException: http_error},
+        lifespan=lifespan,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS, help="Worker threads for blocking calls")
+    parser.add_argument("--max-concurrent", type=int, default=MAX_CONCURRENT_REQUESTS,
+                        help="Requests processed at once (default and maximum: --workers)")
+    parser.add_argument("--max-queued", type=int, default=MAX_QUEUED_REQUESTS)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+    uvicorn.run(create_app(args.workers, args.max_concurrent, args.max_queued), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
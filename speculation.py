@@ -0,0 +1,124 @@
+"""Opt-in background precomputation of results a page is likely to ask for next
+
+Work is submitted as soon as its inputs exist (a PDF upload, a pasted job
+description) and claimed when the user clicks. Results are keyed by a hash
+of the inputs, model calls are capped by a per-minute budget, and every
+claim is counted as a hit (done), pending (still running) or miss.
+"""
+import collections
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import metrics
+from prompt_compaction import count_tokens
+
+# Set RESUME_ANA_SPECULATE=1 to precompute by default; the app sidebar can still turn it off
+SPECULATE = os.environ.get("RESUME_ANA_SPECULATE", "0") == "1"
+SPECULATION_WORKERS = int(os.environ.get("RESUME_ANA_SPECULATION_WORKERS", 4))
+# Speculative model calls allowed per minute across all sessions, and their estimated tokens
+SPECULATION_CALLS_PER_MINUTE = int(os.environ.get("RESUME_ANA_SPECULATION_CALLS_PER_MINUTE", 10))
+SPECULATION_TOKENS_PER_MINUTE = int(os.environ.get("RESUME_ANA_SPECULATION_TOKENS_PER_MINUTE", 15000))
+# Unclaimed results kept; the oldest are dropped first
+MAX_SPECULATIONS = 64
+# Rough size of a reply, added to the prompt text when estimating a call's tokens
+REPLY_TOKEN_ESTIMATE = 800
+
+
+def estimate_tokens(*texts):
+    return sum(count_tokens(text) for text in texts) + REPLY_TOKEN_ESTIMATE
+
+
+class SpeculationBudget:
+    """Sliding one-minute window of speculative calls and tokens that refuses instead of waiting"""
+
+    def __init__(self, calls_per_minute=SPECULATION_CALLS_PER_MINUTE,
+                 tokens_per_minute=SPECULATION_TOKENS_PER_MINUTE, window=60.0):
+        self.calls_per_minute = calls_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window = window
+        self._events = collections.deque()
+        self._tokens_in_window = 0
+        self._lock = threading.Lock()
+
+    def try_spend(self, tokens):
+        """Record a call costing `tokens` and return True if it fits in both budgets"""
+        with self._lock:
+            now = time.monotonic()
+            while self._events and now - self._events[0][0] >= self.window:
+                self._tokens_in_window -= self._events.popleft()[1]
+            if (len(self._events) >= self.calls_per_minute
+                    or self._tokens_in_window + tokens > self.tokens_per_minute):
+                return False
+            self._events.append((now, tokens))
+            self._tokens_in_window += tokens
+            return True
+
+
+class Speculator:
+    """Shared executor and result table for speculative work"""
+
+    def __init__(self, workers=SPECULATION_WORKERS, budget=None, max_entries=MAX_SPECULATIONS):
+        self.workers = workers
+        self.budget = budget or SpeculationBudget()
+        self.max_entries = max_entries
+        self._executor = None
+        self._futures = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts_lock = threading.Lock()
+        self.counts = collections.Counter()
+
+    def _count(self, name, kind, outcome):
+        with self._counts_lock:
+            self.counts[outcome] += 1
+        metrics.inc(name, help_text="Speculative precomputation submissions and claims", kind=kind, outcome=outcome)
+
+    def submit(self, kind, key, func, *args, tokens=0, **kwargs):
+        """Start func(*args, **kwargs) in the background unless it is already running or over budget
+
+        `tokens` is the estimated cost of a model call; local work passes 0
+        and is not budgeted. Returns True if the work is (now) running.
+        """
+        with self._lock:
+            if (kind, key) in self._futures:
+                return True
+            if tokens and not self.budget.try_spend(tokens):
+                self._count("resume_ana_speculation_submitted_total", kind, "over_budget")
+                return False
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="speculation")
+            # Run in a copy of the caller's context so per-session instrumentation follows
+            context = contextvars.copy_context()
+            self._futures[(kind, key)] = self._executor.submit(context.run, func, *args, **kwargs)
+            while len(self._futures) > self.max_entries:
+                (old_kind, _), future = self._futures.popitem(last=False)
+                future.cancel()
+                self._count("resume_ana_speculation_submitted_total", old_kind, "unclaimed")
+        self._count("resume_ana_speculation_submitted_total", kind, "submitted")
+        return True
+
+    def claim(self, kind, key):
+        """Take the speculative future for these inputs, or None if there is none or it failed
+
+        A claim that finds the work finished is a hit; one that finds it
+        still running is pending, and waiting on it still saves the time
+        it has already run.
+        """
+        with self._lock:
+            future = self._futures.pop((kind, key), None)
+        if future is None or future.cancelled() or (future.done() and future.exception() is not None):
+            self._count("resume_ana_speculation_claims_total", kind, "miss")
+            return None
+        self._count("resume_ana_speculation_claims_total", kind, "hit" if future.done() else "pending")
+        return future
+
+    def hit_rate(self):
+        """Fraction of claims that found the result already done, or None before any claim"""
+        claims = self.counts["hit"] + self.counts["pending"] + self.counts["miss"]
+        return self.counts["hit"] / claims if claims else None
+
+
+speculator = Speculator()
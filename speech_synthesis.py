@@ -0,0 +1,253 @@
+import collections
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import wave
+from concurrent.futures import Future
+
+from extraction_cache import DEFAULT_CACHE_DIR
+
+VOICE_RATE = int(os.environ.get("RESUME_ANA_TTS_RATE", 150))
+VOICE_VOLUME = float(os.environ.get("RESUME_ANA_TTS_VOLUME", 0.8))
+# Substring of the preferred voice name; empty picks a female voice if there is one
+VOICE_PREFERENCE = os.environ.get("RESUME_ANA_TTS_VOICE", "")
+SPEECH_CACHE_MAX_BYTES = int(os.environ.get("RESUME_ANA_TTS_CACHE_BYTES", 256 * 1024 * 1024))
+# Chunked speech starts with a short first chunk so audio begins quickly
+FIRST_CHUNK_CHARS = int(os.environ.get("RESUME_ANA_TTS_FIRST_CHUNK_CHARS", 120))
+CHUNK_CHARS = int(os.environ.get("RESUME_ANA_TTS_CHUNK_CHARS", 400))
+MIN_CHUNK_CHARS = 40
+# Byte rate assumed for audio files whose header cannot be read (16-bit mono, 22.05 kHz)
+FALLBACK_BYTES_PER_SECOND = 44100
+
+_SPEECH_REPLACEMENTS = {
+    '**': '', '*': '', '#': '', '```': '', '•': '',
+    '✓': 'check', '✗': 'cross', '✅': 'yes', '❌': 'no', '⚠️': 'warning',
+    '🟢': 'green', '🟡': 'yellow', '🟠': 'orange', '🔴': 'red',
+    '📊': '', '📋': '', '👤': '', '🎓': '', '💼': '', '🛠️': '', '🏆': '', '🔍': '',
+    '🎯': '', '💡': '', '📈': '', '🎉': '', '🔄': '', '📚': '', '📍': '', '📅': '',
+}
+# Longest first so multi-character tokens win over their prefixes. Benchmarked
+# faster than a single regex or str.translate here: CPython's replace is a C loop,
+# and the `in` guard skips the tokens a text does not contain.
+_SPEECH_PAIRS = tuple(sorted(_SPEECH_REPLACEMENTS.items(), key=lambda item: len(item[0]), reverse=True))
+_ASCII_SPEECH_PAIRS = tuple(pair for pair in _SPEECH_PAIRS if pair[0].isascii())
+# Sentence ends, but not list numbers such as "1."
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?;])(?<!\d\.)\s+")
+
+
+def clean_text_for_speech(text):
+    """Drop markdown and replace status emoji with words"""
+    for token, spoken in (_ASCII_SPEECH_PAIRS if text.isascii() else _SPEECH_PAIRS):
+        if token in text:
+            text = text.replace(token, spoken)
+    return " ".join(text.split())
+
+
+def split_speech_chunks(text, first_chunk_chars=FIRST_CHUNK_CHARS, chunk_chars=CHUNK_CHARS):
+    """Split text into cleaned, sentence-aligned chunks for pipelined synthesis
+
+    Lines and sentences are packed into chunks of up to `chunk_chars`; the
+    first chunk is kept to about `first_chunk_chars` so it is synthesized
+    fast. Fragments such as list numbers are merged into the next sentence.
+    """
+    chunks = []
+    current = ""
+    for line in text.splitlines():
+        for sentence in _SENTENCE_END_RE.split(clean_text_for_speech(line)):
+            if not sentence:
+                continue
+            limit = chunk_chars if chunks else first_chunk_chars
+            if len(current) >= MIN_CHUNK_CHARS and len(current) + len(sentence) + 1 > limit:
+                chunks.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def audio_duration(path):
+    """Length of an audio file in seconds, estimated from its size if it is not a readable WAV"""
+    try:
+        with wave.open(path, "rb") as audio:
+            return audio.getnframes() / float(audio.getframerate())
+    except (EOFError, wave.Error):
+        return os.path.getsize(path) / FALLBACK_BYTES_PER_SECOND
+
+
+def _select_voice(engine, preference):
+    voices = engine.getProperty('voices')
+    if not voices:
+        return
+    hints = [preference.lower()] if preference else ['female', 'zira']
+    for voice in voices:
+        if any(hint in voice.name.lower() for hint in hints):
+            engine.setProperty('voice', voice.id)
+            return
+    engine.setProperty('voice', voices[0].id)
+
+
+class SpeechSynthesizer:
+    """Render speech on one shared worker thread and cache the audio files
+
+    pyttsx3 engines are not thread-safe and only one can drive the audio
+    device, so every session submits jobs to the same queue. Files are keyed
+    by the text and voice settings; a repeat request for the same text is
+    served from disk without synthesizing again.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=SPEECH_CACHE_MAX_BYTES, rate=VOICE_RATE,
+                 volume=VOICE_VOLUME, voice=VOICE_PREFERENCE):
+        self.cache_dir = os.path.join(cache_dir or DEFAULT_CACHE_DIR, "speech")
+        self.max_bytes = max_bytes
+        self.settings = {"rate": rate, "volume": volume, "voice": voice}
+        self.speaking = False
+        self._engine = None
+        self._queue = queue.Queue()
+        self._pending = {}
+        # Requests still waiting on each pending file; a job is cancelled only when this drops to zero
+        self._waiters = collections.Counter()
+        self._spoken = []
+        self._lock = threading.Lock()
+        self._thread = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, text):
+        payload = json.dumps([text, self.settings], sort_keys=True).encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def _submit(self, kind, text, path=None):
+        # Called with self._lock held
+        future = Future()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="speech-synthesis", daemon=True)
+            self._thread.start()
+        self._queue.put((kind, text, path, future))
+        return future
+
+    def synthesize(self, text):
+        """Return a Future for the path of a WAV file with `text` spoken"""
+        key = self.make_key(text)
+        path = self._path(key)
+        with self._lock:
+            if key in self._pending:
+                self._waiters[key] += 1
+                return self._pending[key]
+            if os.path.exists(path):
+                os.utime(path)
+                future = Future()
+                future.set_result(path)
+                return future
+            future = self._pending[key] = self._submit("file", text, path)
+            self._waiters[key] = 1
+        future.add_done_callback(lambda _: self._forget(key))
+        return future
+
+    def synthesize_chunks(self, text):
+        """Queue every chunk of `text` in order and return one Future per chunk
+
+        Each chunk is cached on its own, so the first can play while later
+        ones are still being rendered.
+        """
+        return [self.synthesize(chunk) for chunk in split_speech_chunks(text)]
+
+    def speak_chunks(self, text):
+        """Speak `text` chunk by chunk on the audio device; stop() drops the chunks not yet spoken"""
+        return [self.speak(chunk) for chunk in split_speech_chunks(text)]
+
+    def speak(self, text):
+        """Queue `text` to be spoken on the server's own audio device"""
+        with self._lock:
+            future = self._submit("say", text)
+            self._spoken = [queued for queued in self._spoken if not queued.done()] + [future]
+        return future
+
+    def stop(self, files=()):
+        """Stop speech on the audio device and drop queued utterances
+
+        `files` are futures from synthesize() that the caller no longer
+        needs; each queued job is cancelled unless another request is still
+        waiting for the same text, so a long text stops holding the worker.
+        """
+        with self._lock:
+            spoken, self._spoken = self._spoken, []
+            keys = {id(future): key for key, future in self._pending.items()}
+            for future in files:
+                key = keys.get(id(future))
+                if key is None:
+                    continue
+                self._waiters[key] -= 1
+                if self._waiters[key] <= 0:
+                    spoken.append(future)
+        for future in spoken:
+            future.cancel()
+        if self._engine is not None and self.speaking:
+            self._engine.stop()
+
+    def _forget(self, key):
+        with self._lock:
+            self._pending.pop(key, None)
+            self._waiters.pop(key, None)
+
+    def _get_engine(self):
+        if self._engine is None:
+            import pyttsx3
+            engine = pyttsx3.init()
+            engine.setProperty('rate', self.settings["rate"])
+            engine.setProperty('volume', self.settings["volume"])
+            _select_voice(engine, self.settings["voice"])
+            self._engine = engine
+        return self._engine
+
+    def _run(self):
+        while True:
+            kind, text, path, future = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                engine = self._get_engine()
+                if kind == "file":
+                    partial_path = f"{path[:-4]}.partial.wav"
+                    engine.save_to_file(text, partial_path)
+                    engine.runAndWait()
+                    os.replace(partial_path, path)
+                    self.evict()
+                else:
+                    self.speaking = True
+                    engine.say(text)
+                    engine.runAndWait()
+                future.set_result(path)
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                self.speaking = False
+
+    def evict(self):
+        """Delete least recently used files until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".wav") and not entry.name.endswith(".partial.wav"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    # Removed by another process's eviction since the scan listed it
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+
+# Set RESUME_ANA_PROFILE_STARTUP=1 to print where the app's first render and reruns spend time
+PROFILE_STARTUP = os.environ.get("RESUME_ANA_PROFILE_STARTUP", "0") == "1"
+# Imported on demand; listed so the report shows whether a render pulled them in
+DEFERRED_MODULES = ("openai", "httpx", "pdfplumber", "pyttsx3", "numpy")
+
+_runs = 0
+
+
+class StartupProfiler:
+    """Split one script run into named phases, each timed from the previous mark
+
+    Create it before the first import so import time is included. The first
+    run in a process is the cold start and gets a full breakdown; later
+    reruns print a single line.
+    """
+
+    def __init__(self, enabled=PROFILE_STARTUP):
+        self.enabled = enabled
+        self.start = self.last = time.perf_counter()
+        self.phases = []
+
+    def mark(self, name):
+        """Close the current phase under `name`"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def report(self, stream=None):
+        global _runs
+        if not self.enabled:
+            return
+        stream = stream or sys.stderr
+        _runs += 1
+        total = time.perf_counter() - self.start
+        if _runs > 1:
+            slowest = max(self.phases, key=lambda phase: phase[1], default=("-", 0.0))
+            print(f"[startup] rerun {_runs}: {total * 1000:.1f} ms (slowest: {slowest[0]} "
+                  f"{slowest[1] * 1000:.1f} ms)", file=stream)
+            return
+        print(f"[startup] first render: {total * 1000:.1f} ms", file=stream)
+        for name, duration in self.phases:
+            share = duration / total * 100 if total else 0
+            print(f"[startup]   {name:<28} {duration * 1000:8.1f} ms  {share:5.1f}%", file=stream)
+        loaded = [name for name in DEFERRED_MODULES if name in sys.modules]
+        deferred = [name for name in DEFERRED_MODULES if name not in sys.modules]
+        print(f"[startup]   loaded: {', '.join(loaded) or '-'}; deferred: {', '.join(deferred) or '-'}",
+              file=stream)
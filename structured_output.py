@@ -0,0 +1,154 @@
+import json
+import re
+
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL | re.IGNORECASE)
+_TRAILING_COMMA_RE = re.compile(r",(\s*[}\]])")
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def strip_code_fence(text):
+    """Return the contents of the first fenced code block, or the text itself"""
+    text = text.strip()
+    match = _FENCE_RE.search(text)
+    return match.group(1).strip() if match else text
+
+
+class IncrementalJSONParser:
+    """Parse a JSON object from a reply that arrives in chunks
+
+    The scanner state (open brackets, whether it is inside a string or a
+    bare number or literal, the last clean cut point) is kept between feeds,
+    so `partial()` knows how to close the text received so far without
+    scanning it character by character again. It still runs json.loads over
+    the buffer, at most once per feed. Fields become available as soon as
+    their values are complete, before the whole reply has arrived; a trailing
+    number such as the 8 of a coming 85 is only taken once a `,`, `}`, `]`
+    or whitespace follows it.
+    """
+
+    def __init__(self):
+        self.buffer = []
+        self.length = 0
+        self.started = False
+        self.stack = []
+        self.in_string = False
+        self.escape = False
+        # Inside a number or true/false/null that may still be growing
+        self.in_scalar = False
+        self.done = False
+        # Last position the text can be cut at and still close cleanly
+        self.safe_length = 0
+        self.safe_stack = ()
+        self._partial_length = None
+        self._partial = {}
+
+    def feed(self, chunk):
+        """Consume the next piece of the reply"""
+        for char in chunk:
+            if self.done:
+                return
+            if not self.started:
+                # Skip any prose or code fence before the object starts
+                if char != "{":
+                    continue
+                self.started = True
+            self.buffer.append(char)
+            self.length += 1
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+            self.in_scalar = not (char.isspace() or char in '"{}[]:,')
+            if char == '"':
+                self.in_string = True
+            elif char in _CLOSERS:
+                self.stack.append(char)
+                self.safe_length, self.safe_stack = self.length, tuple(self.stack)
+            elif char in "}]":
+                if self.stack:
+                    self.stack.pop()
+                if not self.stack:
+                    self.done = True
+            elif char == ",":
+                self.safe_length, self.safe_stack = self.length - 1, tuple(self.stack)
+
+    def _close(self, text, stack, in_string):
+        if in_string:
+            text += '"'
+        text = text.rstrip()
+        if text.endswith(","):
+            text = text[:-1]
+        elif text.endswith(":"):
+            text += " null"
+        return text + "".join(_CLOSERS[opener] for opener in reversed(stack))
+
+    def partial(self, final=False):
+        """Return the object parsed so far (an empty dict before anything is usable)
+
+        Pass final=True once no more text will arrive, so a number or
+        literal at the very end of a cut-off reply is taken as it is.
+        """
+        if not self.started:
+            return {}
+        if (self.length, final) == self._partial_length:
+            return self._partial
+        text = "".join(self.buffer)
+        if self.done:
+            candidates = [text]
+        elif self.in_scalar and not final:
+            candidates = [self._close(text[:self.safe_length], self.safe_stack, False)]
+        else:
+            candidates = [
+                self._close(text, self.stack, self.in_string),
+                self._close(text[:self.safe_length], self.safe_stack, False),
+            ]
+        value = {}
+        for candidate in candidates:
+            try:
+                parsed = json.loads(_TRAILING_COMMA_RE.sub(r"\1", candidate))
+            except json.JSONDecodeError:
+                continue
+            if isinstance(parsed, dict):
+                value = parsed
+                break
+        self._partial_length, self._partial = (self.length, final), value
+        return value
+
+
+def repair_json(text):
+    """Best-effort fix for almost-valid or truncated JSON from an LLM
+
+    Handles code fences, surrounding prose, trailing commas, Python literals
+    and replies cut off mid-object. Raises json.JSONDecodeError if nothing
+    usable can be recovered.
+    """
+    text = strip_code_fence(text).replace("“", '"').replace("”", '"')
+    # Python literals are only rewritten if the text does not parse as is,
+    # since the words can legitimately appear inside string values
+    pythonic = re.sub(r"\bNone\b", "null", re.sub(r"\bFalse\b", "false", re.sub(r"\bTrue\b", "true", text)))
+    best = {}
+    for candidate in (text, pythonic):
+        parser = IncrementalJSONParser()
+        parser.feed(candidate)
+        value = parser.partial(final=True)
+        # A cut-back parse of the raw text can lose fields the rewrite keeps
+        if len(value) > len(best):
+            best = value
+    if not best:
+        raise json.JSONDecodeError("No JSON object could be recovered", text, 0)
+    return best
+
+
+def parse_json_response(response_text):
+    """Parse a JSON object from a model reply, repairing it locally if needed"""
+    try:
+        value = json.loads(strip_code_fence(response_text))
+        if isinstance(value, dict):
+            return value
+    except json.JSONDecodeError:
+        pass
+    return repair_json(response_text)